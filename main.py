@@ -1,27 +1,24 @@
+import time
+INICIO_ARRANQUE = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
+import multiprocessing
 import sys
 import os
 from datetime import datetime
 from modules.models import init_db, cargar_campesinos_desde_csv
 from modules.ui_components import VentanaPrincipal
-from modules.cuotas import init_cuotas_db, migrar_folios_individuales, recrear_tabla_recibos_cuotas
+from modules.cuotas import init_cuotas_db
 
 def main():
     try:
+        # Con las bases al día (PRAGMA user_version) no se repiten tablas ni migraciones
         print("Inicializando base de datos de RIEGOS...")
         init_db()
         
         print("Inicializando base de datos de CUOTAS...")
         init_cuotas_db()
-        migrar_folios_individuales()
-        recrear_tabla_recibos_cuotas() 
-        
-        from modules.models import migrar_campos_documentos
-        migrar_campos_documentos()
-        
-        from modules.documentos import inicializar_directorio_documentos
-        inicializar_directorio_documentos()
 
         from modules.models import contar_campesinos
         
@@ -85,6 +82,20 @@ def main():
         
         app = VentanaPrincipal(root)
         
+        # Tiempo hasta que la ventana principal se dibuja con el grid cargado;
+        # lo que no necesita la ventana se hace después
+        def reportar_arranque():
+            print(f"✓ Ventana principal lista en {time.perf_counter() - INICIO_ARRANQUE:.2f} s")
+            
+            from modules.models import recuperar_auditoria_pendiente
+            from modules.documentos import inicializar_directorio_documentos
+            try:
+                recuperar_auditoria_pendiente()
+            except Exception as e:
+                print(f"Advertencia: no se pudo recuperar la auditoría pendiente: {e}")
+            inicializar_directorio_documentos()
+        root.after_idle(reportar_arranque)
+        
         def on_closing():
             if messagebox.askokcancel("Salir", "¿Desea cerrar el sistema?"):
                 root.destroy()
@@ -97,4 +108,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Necesario en el ejecutable empaquetado: las gráficas se dibujan en un proceso aparte
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,237 @@
+# modules/auditoria.py - Escritor de Auditoría con Commit Agrupado
+# Los eventos se encolan y se escriben por lotes en una sola transacción
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+# Segundos que se esperan para juntar eventos antes de escribir el lote
+INTERVALO_VACIADO = 0.5
+
+SQL_INSERTAR = '''
+    INSERT INTO auditoria (fecha_hora, tipo_evento, usuario, descripcion, datos_previos, evento_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Al recuperar un diario: el índice único sobre evento_id descarta lo ya escrito
+SQL_RECUPERAR = '''
+    INSERT OR IGNORE INTO auditoria (fecha_hora, tipo_evento, usuario, descripcion, datos_previos, evento_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+
+def _proceso_vivo(pid: int) -> bool:
+    """True si el proceso con ese pid sigue en ejecución"""
+    if os.name == 'nt':
+        # En Windows os.kill(pid, 0) terminaría el proceso
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        codigo = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(codigo))
+        kernel32.CloseHandle(handle)
+        return codigo.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class EscritorAuditoria:
+    """
+    Escribe los eventos de auditoría sin abrir una transacción por evento.
+
+    - Dentro de una transacción de negocio (GestorConexiones.transaccion) el
+      evento se inserta con esa misma transacción: se confirma o revierte junto
+      con la operación que lo originó.
+    - Fuera de ella el evento se encola y un hilo de fondo lo escribe, junto con
+      los demás pendientes, tras INTERVALO_VACIADO segundos.
+    - Cada evento encolado se anota antes en un diario (JSON por línea) junto a
+      la base de datos; si el programa se cae, recuperar_pendientes() lo reinserta.
+      Cada proceso tiene su propio diario (el pid va en el nombre) y sólo se
+      recuperan los de procesos que ya terminaron. Cada evento lleva un
+      evento_id (uuid) para no insertarlo dos veces.
+    """
+
+    def __init__(self, gestor, obtener_ruta_diario: Callable[[], str],
+                 intervalo: float = INTERVALO_VACIADO):
+        self.gestor = gestor
+        self.obtener_ruta_diario = obtener_ruta_diario
+        self.intervalo = intervalo
+        self._pendientes: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._lock_vaciado = threading.Lock()
+        self._hay_eventos = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    # ---------- Registro ----------
+
+    def registrar(self, tipo_evento: str, descripcion: str, datos_previos=None,
+                  usuario: str = 'Sistema'):
+        fila = (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                tipo_evento, usuario, descripcion, datos_previos, uuid.uuid4().hex)
+
+        if self.gestor.en_transaccion():
+            self.gestor.obtener().execute(SQL_INSERTAR, fila)
+            return
+
+        with self._lock:
+            self._anotar_en_diario([fila])
+            self._pendientes.append(fila)
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._trabajar, name='auditoria', daemon=True)
+                self._hilo.start()
+        self._hay_eventos.set()
+
+    def _trabajar(self):
+        while True:
+            self._hay_eventos.wait()
+            time.sleep(self.intervalo)  # Juntar los eventos que lleguen mientras tanto
+            self._hay_eventos.clear()
+            try:
+                self.vaciar()
+            except sqlite3.Error as e:
+                # Los eventos siguen en memoria y en el diario; se reintenta
+                print(f"Error al escribir auditoría (se reintentará): {e}")
+                self._hay_eventos.set()
+
+    # ---------- Escritura por lotes ----------
+
+    def vaciar(self) -> int:
+        """Escribe todos los eventos pendientes en una sola transacción"""
+        with self._lock_vaciado:
+            with self._lock:
+                lote = self._pendientes
+                self._pendientes = []
+            if not lote:
+                return 0
+
+            try:
+                with self.gestor.transaccion() as conn:
+                    conn.executemany(SQL_INSERTAR, lote)
+            except BaseException:
+                with self._lock:
+                    self._pendientes = lote + self._pendientes
+                raise
+
+            with self._lock:
+                # El diario sólo conserva lo que aún no llegó a la BD
+                self._reescribir_diario(self._pendientes)
+            return len(lote)
+
+    def pendientes(self) -> int:
+        with self._lock:
+            return len(self._pendientes)
+
+    # ---------- Diario de respaldo ----------
+
+    def ruta_diario(self, pid: Optional[int] = None) -> str:
+        """Diario del proceso indicado (por omisión, el actual)"""
+        base, extension = os.path.splitext(self.obtener_ruta_diario())
+        return f"{base}.{pid or os.getpid()}{extension}"
+
+    def _diarios_de_otros_procesos(self) -> List[str]:
+        """Diarios cuyo proceso ya terminó (incluye el diario único de versiones anteriores)"""
+        ruta_base = self.obtener_ruta_diario()
+        directorio = os.path.dirname(ruta_base) or '.'
+        base, extension = os.path.splitext(os.path.basename(ruta_base))
+        patron = re.compile(re.escape(base) + r'(?:\.(\d+))?' + re.escape(extension) + '$')
+        if not os.path.isdir(directorio):
+            return []
+
+        diarios = []
+        for nombre in sorted(os.listdir(directorio)):
+            coincide = patron.match(nombre)
+            if not coincide:
+                continue
+            pid = coincide.group(1)
+            if pid is not None and (int(pid) == os.getpid() or _proceso_vivo(int(pid))):
+                continue
+            diarios.append(os.path.join(directorio, nombre))
+        return diarios
+
+    def _anotar_en_diario(self, filas: List[Tuple]):
+        ruta = self.ruta_diario()
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        with open(ruta, 'a', encoding='utf-8') as f:
+            for fila in filas:
+                f.write(json.dumps(fila, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+
+    def _reescribir_diario(self, filas: List[Tuple]):
+        ruta = self.ruta_diario()
+        if not filas:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+            return
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            for fila in filas:
+                f.write(json.dumps(fila, ensure_ascii=False, default=str) + '\n')
+        os.replace(temporal, ruta)
+
+    @staticmethod
+    def _leer_diario(ruta: str) -> List[Tuple]:
+        filas = []
+        with open(ruta, encoding='utf-8') as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    fila = tuple(json.loads(linea))
+                except ValueError:
+                    continue  # Última línea truncada por la caída
+                if len(fila) == 5:
+                    # Diario de una versión anterior, sin evento_id
+                    fila = fila + (None,)
+                filas.append(fila)
+        return filas
+
+    def recuperar_pendientes(self) -> int:
+        """
+        Reinserta los eventos que quedaron en los diarios de procesos que ya
+        terminaron (cierre inesperado). Los diarios de instancias que siguen
+        abiertas no se tocan. Los eventos que ya estaban escritos (caída entre
+        el commit y la limpieza del diario) se reconocen por su evento_id.
+        """
+        recuperados = 0
+        for ruta in self._diarios_de_otros_procesos():
+            try:
+                filas = self._leer_diario(ruta)
+            except FileNotFoundError:
+                continue  # Otra instancia lo recuperó primero
+
+            with self.gestor.transaccion() as conn:
+                for fila in filas:
+                    if fila[5] is None:
+                        cursor = conn.execute('''
+                            INSERT INTO auditoria (fecha_hora, tipo_evento, usuario, descripcion, datos_previos)
+                            SELECT ?, ?, ?, ?, ?
+                            WHERE NOT EXISTS (
+                                SELECT 1 FROM auditoria
+                                WHERE fecha_hora = ? AND tipo_evento = ? AND descripcion = ?
+                            )
+                        ''', fila[:5] + (fila[0], fila[1], fila[3]))
+                    else:
+                        cursor = conn.execute(SQL_RECUPERAR, fila)
+                    recuperados += cursor.rowcount
+
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+        if recuperados:
+            print(f"✓ {recuperados} eventos de auditoría recuperados del diario")
+        return recuperados
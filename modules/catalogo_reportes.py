@@ -0,0 +1,222 @@
+# modules/catalogo_reportes.py - Catálogo de Reportes Generados
+# Cada generador registra su archivo (tipo, periodo, tamaño, sha256); el gestor
+# de reportes consulta esta tabla en lugar de recorrer database/reportes
+import os
+import re
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from modules.models import get_connection, obtener_configuracion, actualizar_configuracion
+
+DIRECTORIO_REPORTES = os.path.join('database', 'reportes')
+
+# Clave de configuración: ya se importaron los reportes anteriores al catálogo
+CLAVE_IMPORTADO = 'catalogo_reportes_importado'
+
+# Tipos de reporte, en el orden en que los muestra el gestor
+MENSUAL = 'mensual'
+VENTA_DIA_EXCEL = 'venta_dia_excel'
+VENTA_DIA_PDF = 'venta_dia_pdf'
+ESTADISTICAS = 'estadisticas'
+CUOTAS_PDF = 'cuotas_pdf'
+CUOTAS_EXCEL = 'cuotas_excel'
+AUDITORIA = 'auditoria'
+OTROS = 'otros'
+
+CATEGORIAS = [
+    (MENSUAL, '📅 REPORTES MENSUALES'),
+    (VENTA_DIA_EXCEL, '📊 EXCEL VENTA DEL DÍA'),
+    (VENTA_DIA_PDF, '📄 PDF VENTA DEL DÍA'),
+    (ESTADISTICAS, '📊 ESTADÍSTICAS PDF'),
+    (CUOTAS_PDF, '💰 CUOTAS PDF'),
+    (CUOTAS_EXCEL, '💰 CUOTAS EXCEL'),
+    (AUDITORIA, '🔍 AUDITORÍA PDF'),
+    (OTROS, '📁 OTROS'),
+]
+
+EXTENSIONES = ('.pdf', '.xlsx')
+
+_PERIODO_DIA = re.compile(r'_(\d{4})(\d{2})(\d{2})(?:\D|$)')
+_PERIODO_MES = re.compile(r'reporte_mensual_(\d{4})_(\d{2})')
+
+# Orden de categoría para ORDER BY (tipos desconocidos al final)
+_ORDEN_TIPO = 'CASE tipo ' + ' '.join(
+    f"WHEN '{tipo}' THEN {i}" for i, (tipo, _) in enumerate(CATEGORIAS)
+) + f' ELSE {len(CATEGORIAS)} END'
+
+
+def _sha256(ruta: str) -> str:
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def clasificar_archivo(nombre: str) -> Tuple[str, str]:
+    """
+    (tipo, periodo) de un archivo por su nombre. Sólo se usa para archivos que
+    no pasaron por registrar_reporte (generados antes del catálogo).
+    """
+    nombre_min = nombre.lower()
+    xlsx = nombre_min.endswith('.xlsx')
+
+    coincidencia = _PERIODO_MES.search(nombre_min)
+    if coincidencia:
+        return MENSUAL, f"{coincidencia.group(1)}-{coincidencia.group(2)}"
+
+    if 'cuota' in nombre_min:
+        tipo = CUOTAS_EXCEL if xlsx else CUOTAS_PDF
+    elif 'estadisticas' in nombre_min:
+        tipo = ESTADISTICAS
+    elif 'auditoria' in nombre_min:
+        tipo = AUDITORIA
+    else:
+        tipo = VENTA_DIA_EXCEL if xlsx else VENTA_DIA_PDF
+
+    periodo = ''
+    if tipo in (VENTA_DIA_EXCEL, VENTA_DIA_PDF):
+        coincidencia = _PERIODO_DIA.search(nombre_min)
+        if coincidencia:
+            periodo = '-'.join(coincidencia.groups())
+    return tipo, periodo
+
+
+def registrar_reporte(ruta: str, tipo: str, periodo: str = '') -> Optional[Dict]:
+    """
+    Registra (o actualiza, si se regeneró) un reporte en el catálogo.
+    Un error aquí no debe impedir entregar el reporte: se avisa y regresa None.
+    """
+    try:
+        ruta = os.path.normpath(ruta)
+        datos = {
+            'ruta': ruta,
+            'archivo': os.path.basename(ruta),
+            'tipo': tipo,
+            'formato': os.path.splitext(ruta)[1].lstrip('.').lower(),
+            'periodo': periodo or '',
+            'bytes': os.path.getsize(ruta),
+            'sha256': _sha256(ruta),
+            'fecha_creacion': datetime.fromtimestamp(os.path.getmtime(ruta)).strftime('%Y-%m-%d %H:%M:%S')
+        }
+        conn = get_connection()
+        conn.execute('''
+            INSERT INTO reportes (ruta, archivo, tipo, formato, periodo, bytes, sha256, fecha_creacion)
+            VALUES (:ruta, :archivo, :tipo, :formato, :periodo, :bytes, :sha256, :fecha_creacion)
+            ON CONFLICT (ruta) DO UPDATE SET
+                tipo = excluded.tipo, formato = excluded.formato, periodo = excluded.periodo,
+                bytes = excluded.bytes, sha256 = excluded.sha256,
+                fecha_creacion = excluded.fecha_creacion
+        ''', datos)
+        conn.close()
+        return datos
+    except Exception as e:
+        print(f"Advertencia: no se pudo registrar el reporte {ruta} en el catálogo: {e}")
+        return None
+
+
+def _filtros_sql(tipo: Optional[str], texto: Optional[str],
+                 desde: Optional[str], hasta: Optional[str]) -> Tuple[str, list]:
+    condiciones = []
+    params = []
+    if tipo:
+        condiciones.append('tipo = ?')
+        params.append(tipo)
+    if texto:
+        condiciones.append('(archivo LIKE ? OR periodo LIKE ?)')
+        params.extend([f'%{texto}%', f'{texto}%'])
+    if desde:
+        condiciones.append('fecha_creacion >= ?')
+        params.append(desde)
+    if hasta:
+        condiciones.append('fecha_creacion < ?')
+        params.append(hasta)
+    return (' WHERE ' + ' AND '.join(condiciones)) if condiciones else '', params
+
+
+def buscar_reportes(tipo: Optional[str] = None, texto: Optional[str] = None,
+                    desde: Optional[str] = None, hasta: Optional[str] = None,
+                    limite: int = 50, desplazamiento: int = 0) -> List[Dict]:
+    """
+    Reportes del catálogo agrupados por categoría y del más nuevo al más viejo.
+
+    Args:
+        tipo: Uno de los tipos de CATEGORIAS (None = todos)
+        texto: Parte del nombre del archivo o inicio del periodo ('2025-06')
+        desde, hasta: Rango semiabierto sobre fecha_creacion ('YYYY-MM-DD')
+        limite, desplazamiento: Paginación
+    """
+    where, params = _filtros_sql(tipo, texto, desde, hasta)
+    conn = get_connection()
+    cursor = conn.execute(f'''
+        SELECT * FROM reportes{where}
+        ORDER BY {_ORDEN_TIPO}, fecha_creacion DESC, archivo
+        LIMIT ? OFFSET ?
+    ''', params + [limite, desplazamiento])
+    resultados = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return resultados
+
+
+def contar_reportes(tipo: Optional[str] = None, texto: Optional[str] = None,
+                    desde: Optional[str] = None, hasta: Optional[str] = None) -> int:
+    """Total de reportes con los mismos filtros que buscar_reportes"""
+    where, params = _filtros_sql(tipo, texto, desde, hasta)
+    conn = get_connection()
+    total = conn.execute(f'SELECT COUNT(*) FROM reportes{where}', params).fetchone()[0]
+    conn.close()
+    return total
+
+
+def eliminar_reporte(ruta: str):
+    """Borra el archivo (si existe) y su registro del catálogo"""
+    ruta = os.path.normpath(ruta)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    conn = get_connection()
+    conn.execute('DELETE FROM reportes WHERE ruta = ?', (ruta,))
+    conn.close()
+
+
+def sincronizar_directorio(directorio: str = DIRECTORIO_REPORTES) -> Tuple[int, int]:
+    """
+    Pone el catálogo al día con el directorio: registra archivos que no estén
+    (copiados a mano o anteriores al catálogo) y quita los que ya no existen.
+    Recorre el directorio, así que sólo se usa al pedirlo el usuario o la
+    primera vez.
+
+    Returns:
+        (agregados, eliminados)
+    """
+    en_disco = set()
+    if os.path.exists(directorio):
+        en_disco = {os.path.normpath(os.path.join(directorio, nombre))
+                    for nombre in os.listdir(directorio) if nombre.lower().endswith(EXTENSIONES)}
+
+    conn = get_connection()
+    prefijo = os.path.normpath(directorio) + os.sep
+    en_catalogo = {row['ruta'] for row in conn.execute('SELECT ruta FROM reportes')}
+    faltantes = [ruta for ruta in en_catalogo if ruta.startswith(prefijo) and ruta not in en_disco]
+    conn.executemany('DELETE FROM reportes WHERE ruta = ?', [(ruta,) for ruta in faltantes])
+    conn.close()
+
+    agregados = 0
+    for ruta in sorted(en_disco - en_catalogo):
+        tipo, periodo = clasificar_archivo(os.path.basename(ruta))
+        if registrar_reporte(ruta, tipo, periodo):
+            agregados += 1
+    return agregados, len(faltantes)
+
+
+def importar_reportes_existentes(directorio: str = DIRECTORIO_REPORTES) -> int:
+    """
+    Importa una sola vez los reportes que ya estaban en la carpeta antes del
+    catálogo. Se marca en configuración (no se mira si la tabla está vacía:
+    otras pantallas registran reportes antes de abrir el gestor).
+    """
+    if obtener_configuracion(CLAVE_IMPORTADO):
+        return 0
+    agregados = sincronizar_directorio(directorio)[0]
+    actualizar_configuracion(CLAVE_IMPORTADO, '1')
+    return agregados
@@ -0,0 +1,176 @@
+# modules/conexion.py - Gestor de Conexiones SQLite
+# Conexiones persistentes por hilo, compartidas por todas las funciones CRUD
+import sqlite3
+import os
+import threading
+import atexit
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+# Sentencias preparadas que SQLite conserva por conexión
+SENTENCIAS_EN_CACHE = 256
+
+
+class ConexionPersistente(sqlite3.Connection):
+    """
+    Conexión SQLite de larga vida.
+
+    - close() NO cierra: la conexión se reutiliza en la siguiente llamada.
+    - commit()/rollback() se ignoran dentro de una transacción abierta con
+      GestorConexiones.transaccion(); la confirma (o revierte) quien la abrió.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profundidad_transaccion = 0
+
+    def close(self):
+        # Las funciones CRUD siguen llamando a close(); la conexión permanece abierta
+        pass
+
+    def cerrar_definitivamente(self):
+        super().close()
+
+    def commit(self):
+        if self.profundidad_transaccion > 0:
+            return
+        super().commit()
+
+    def rollback(self):
+        if self.profundidad_transaccion > 0:
+            return
+        super().rollback()
+
+
+class GestorConexiones:
+    """
+    Administra una conexión por hilo y por archivo de base de datos.
+
+    La ruta se resuelve en cada llamada (obtener_ruta), así que cambiar
+    DB_PATH / CUOTAS_DB_PATH en tiempo de ejecución abre una conexión nueva.
+    Los PRAGMA se ejecutan una sola vez al abrir la conexión; al_abrir(conn)
+    permite preparar algo más (p.ej. ATTACH de otra base).
+    """
+
+    def __init__(self, obtener_ruta: Callable[[], str],
+                 al_abrir: Optional[Callable[[sqlite3.Connection], None]] = None):
+        self.obtener_ruta = obtener_ruta
+        self.al_abrir = al_abrir
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._todas = []  # (hilo, conexión) para cerrar al salir
+
+    def _conexiones_del_hilo(self) -> Dict[str, ConexionPersistente]:
+        # Tras un fork el proceso hijo no debe reutilizar conexiones del padre
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.pid = os.getpid()
+            self._local.conexiones = {}
+        return self._local.conexiones
+
+    def _abrir(self, ruta: str) -> ConexionPersistente:
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        conn = sqlite3.connect(
+            ruta,
+            timeout=10.0,
+            factory=ConexionPersistente,
+            cached_statements=SENTENCIAS_EN_CACHE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.isolation_level = None  # Autocommit; las transacciones son explícitas
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA busy_timeout = 10000")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if self.al_abrir is not None:
+            self.al_abrir(conn)
+
+        with self._lock:
+            self._todas.append((threading.get_ident(), conn))
+        return conn
+
+    def obtener(self) -> ConexionPersistente:
+        """Devuelve la conexión del hilo actual, abriéndola si no existe"""
+        ruta = os.path.abspath(self.obtener_ruta())
+        conexiones = self._conexiones_del_hilo()
+        conn = conexiones.get(ruta)
+        if conn is None:
+            conn = self._abrir(ruta)
+            conexiones[ruta] = conn
+        return conn
+
+    @contextmanager
+    def conexion(self):
+        """Context manager que entrega la conexión compartida sin cerrarla"""
+        yield self.obtener()
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Abre una transacción (BEGIN IMMEDIATE) sobre la conexión del hilo.
+
+        Las transacciones anidadas se unen a la exterior: sólo el nivel más
+        externo confirma. Cualquier excepción revierte todo.
+        """
+        conn = self.obtener()
+        if conn.profundidad_transaccion == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        conn.profundidad_transaccion += 1
+        try:
+            yield conn
+        except BaseException:
+            conn.profundidad_transaccion -= 1
+            if conn.profundidad_transaccion == 0 and conn.in_transaction:
+                conn.rollback()
+            raise
+        else:
+            conn.profundidad_transaccion -= 1
+            if conn.profundidad_transaccion == 0:
+                conn.commit()
+
+    def en_transaccion(self) -> bool:
+        """Indica si el hilo actual tiene una transacción abierta con transaccion()"""
+        conn = self._conexiones_del_hilo().get(os.path.abspath(self.obtener_ruta()))
+        return conn is not None and conn.profundidad_transaccion > 0
+
+    def cerrar_hilo_actual(self):
+        """Cierra las conexiones del hilo actual (p.ej. antes de restaurar un backup)"""
+        conexiones = self._conexiones_del_hilo()
+        with self._lock:
+            for conn in conexiones.values():
+                self._todas = [(h, c) for h, c in self._todas if c is not conn]
+                conn.cerrar_definitivamente()
+        conexiones.clear()
+
+    def cerrar_todas(self):
+        """Cierra las conexiones abiertas por este hilo al terminar el proceso"""
+        hilo = threading.get_ident()
+        with self._lock:
+            pendientes = self._todas
+            self._todas = []
+        for ident, conn in pendientes:
+            if ident != hilo:
+                continue  # sqlite3 no permite cerrar desde otro hilo
+            try:
+                conn.cerrar_definitivamente()
+            except sqlite3.Error:
+                pass
+        self._conexiones_del_hilo().clear()
+
+
+_gestores = []
+
+
+def crear_gestor(obtener_ruta: Callable[[], str],
+                 al_abrir: Optional[Callable[[sqlite3.Connection], None]] = None) -> GestorConexiones:
+    """Crea un gestor y lo registra para cerrarse al salir del programa"""
+    gestor = GestorConexiones(obtener_ruta, al_abrir)
+    _gestores.append(gestor)
+    return gestor
+
+
+@atexit.register
+def _cerrar_al_salir():
+    for gestor in _gestores:
+        gestor.cerrar_todas()
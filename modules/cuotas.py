@@ -5,24 +5,39 @@ import os
 import json
 from datetime import datetime
 from typing import Optional, List, Dict, Tuple
+from modules.conexion import crear_gestor
 
 # Ruta de la base de datos de CUOTAS (separada de riego.db)
 CUOTAS_DB_PATH = os.path.join('database', 'cuotas.db')
 
+# Resultado por campesino de asignar_cuota_masiva
+ASIGNADA = 'ASIGNADA'
+YA_ASIGNADA = 'YA_ASIGNADA'
+DATOS_INVALIDOS = 'DATOS_INVALIDOS'
+
+# Versión del esquema de cuotas.db (PRAGMA user_version). Subirla al agregar
+# tablas, índices o migraciones a init_cuotas_db
+VERSION_ESQUEMA_CUOTAS = 1
+
+# Conexión persistente por hilo (ver modules/conexion.py)
+_gestor_cuotas = crear_gestor(lambda: CUOTAS_DB_PATH)
+
 def get_cuotas_connection():
-    """Obtiene una conexión a la base de datos de cuotas"""
-    os.makedirs('database', exist_ok=True)
-    conn = sqlite3.connect(CUOTAS_DB_PATH, timeout=10.0)
-    conn.row_factory = sqlite3.Row
-    conn.isolation_level = None
-    conn.execute("PRAGMA journal_mode = WAL")
-    conn.execute("PRAGMA busy_timeout = 10000")
-    conn.execute("PRAGMA synchronous = NORMAL")
-    return conn
+    """Obtiene la conexión compartida a la base de datos de cuotas del hilo actual"""
+    return _gestor_cuotas.obtener()
+
+def transaccion_cuotas():
+    """Context manager: ejecuta varias operaciones de cuotas.db en una sola transacción"""
+    return _gestor_cuotas.transaccion()
 
 def init_cuotas_db():
-    """Inicializa la base de datos de cuotas"""
+    """
+    Inicializa la base de datos de cuotas y aplica sus migraciones.
+    Si PRAGMA user_version ya es VERSION_ESQUEMA_CUOTAS no hace nada.
+    """
     conn = get_cuotas_connection()
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= VERSION_ESQUEMA_CUOTAS:
+        return
     cursor = conn.cursor()
     
     # Tabla de tipos de cuotas (ej: "Limpieza Canal", "Mantenimiento Bomba")
@@ -89,6 +104,15 @@ def init_cuotas_db():
     
     # Índices
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_cuota_campesino ON cuotas_campesinos(campesino_id)')
+    try:
+        # Un campesino no puede tener dos veces la misma cuota
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_cuota_campesino_tipo
+            ON cuotas_campesinos(campesino_id, tipo_cuota_id)
+        ''')
+    except sqlite3.IntegrityError:
+        print("⚠ Hay cuotas asignadas más de una vez al mismo campesino; "
+              "no se pudo crear el índice único (campesino_id, tipo_cuota_id)")
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_cuota_pagado ON cuotas_campesinos(pagado)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_recibo_cuota_folio ON recibos_cuotas(folio)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_recibo_cuota_fecha ON recibos_cuotas(fecha)')
@@ -99,10 +123,112 @@ def init_cuotas_db():
         VALUES ('folio_actual_cuotas', '1')
     ''')
     
+    # Resumen por tipo de cuota; lo mantienen los triggers de cuotas_campesinos
+    resumen_nuevo = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resumen_tipos_cuota'"
+    ).fetchone() is None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_tipos_cuota (
+            tipo_cuota_id INTEGER PRIMARY KEY,
+            total_asignados INTEGER NOT NULL DEFAULT 0,
+            monto_total REAL NOT NULL DEFAULT 0,
+            total_pagados INTEGER NOT NULL DEFAULT 0,
+            monto_recaudado REAL NOT NULL DEFAULT 0,
+            total_pendientes INTEGER NOT NULL DEFAULT 0,
+            monto_pendiente REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    _crear_triggers_resumen_cuotas(cursor)
+    if resumen_nuevo:
+        reconstruir_resumen_cuotas(cursor)
+    
     conn.commit()
     conn.close()
+    
+    migrar_folios_individuales()
+    recrear_tabla_recibos_cuotas()
+    
+    # Sólo se anota la versión si las migraciones (que atrapan sus errores) se aplicaron
+    cursor = get_cuotas_connection().cursor()
+    cursor.execute("PRAGMA table_info(tipos_cuota)")
+    if 'folio_actual' in [col[1] for col in cursor.fetchall()] and _recibos_cuotas_migrados(cursor):
+        cursor.execute(f'PRAGMA user_version = {VERSION_ESQUEMA_CUOTAS}')
+    else:
+        print("⚠ Migraciones de cuotas.db incompletas; se reintentarán en el próximo arranque")
     print("✓ Base de datos de CUOTAS inicializada correctamente")
 
+# ==================== RESUMEN POR TIPO DE CUOTA ====================
+
+def _mover_resumen_cuota(fila: str, signo: str) -> str:
+    """Sentencia que suma (signo '+') o resta ('-') la asignación OLD/NEW al resumen de su tipo"""
+    return f'''
+        INSERT INTO resumen_tipos_cuota (tipo_cuota_id, total_asignados, monto_total,
+                                         total_pagados, monto_recaudado,
+                                         total_pendientes, monto_pendiente)
+        VALUES ({fila}.tipo_cuota_id, {signo}1, {signo}{fila}.monto,
+                {signo}(CASE WHEN {fila}.pagado THEN 1 ELSE 0 END),
+                {signo}(CASE WHEN {fila}.pagado THEN {fila}.monto ELSE 0 END),
+                {signo}(CASE WHEN {fila}.pagado THEN 0 ELSE 1 END),
+                {signo}(CASE WHEN {fila}.pagado THEN 0 ELSE {fila}.monto END))
+        ON CONFLICT (tipo_cuota_id) DO UPDATE SET
+            total_asignados = total_asignados + excluded.total_asignados,
+            monto_total = monto_total + excluded.monto_total,
+            total_pagados = total_pagados + excluded.total_pagados,
+            monto_recaudado = monto_recaudado + excluded.monto_recaudado,
+            total_pendientes = total_pendientes + excluded.total_pendientes,
+            monto_pendiente = monto_pendiente + excluded.monto_pendiente;
+    '''
+
+def _crear_triggers_resumen_cuotas(cursor):
+    """
+    Cada asignación cuenta en el resumen de su tipo de cuota; al pagarla, cambiar
+    su monto o borrarla, los triggers restan la fila anterior y suman la nueva.
+    """
+    limpiar = 'DELETE FROM resumen_tipos_cuota WHERE total_asignados = 0;'
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cuotas_resumen_ai
+        AFTER INSERT ON cuotas_campesinos BEGIN
+            {_mover_resumen_cuota('NEW', '+')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cuotas_resumen_au
+        AFTER UPDATE OF tipo_cuota_id, monto, pagado ON cuotas_campesinos BEGIN
+            {_mover_resumen_cuota('OLD', '-')}
+            {_mover_resumen_cuota('NEW', '+')}
+            {limpiar}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cuotas_resumen_ad
+        AFTER DELETE ON cuotas_campesinos BEGIN
+            {_mover_resumen_cuota('OLD', '-')}
+            {limpiar}
+        END
+    ''')
+
+def reconstruir_resumen_cuotas(cursor=None):
+    """Recalcula resumen_tipos_cuota desde cero (migración o reparación)"""
+    conn = None
+    if cursor is None:
+        conn = get_cuotas_connection()
+        cursor = conn.cursor()
+    cursor.execute('DELETE FROM resumen_tipos_cuota')
+    cursor.execute('''
+        INSERT INTO resumen_tipos_cuota (tipo_cuota_id, total_asignados, monto_total,
+                                         total_pagados, monto_recaudado,
+                                         total_pendientes, monto_pendiente)
+        SELECT tipo_cuota_id, COUNT(*), SUM(monto),
+               SUM(CASE WHEN pagado THEN 1 ELSE 0 END),
+               SUM(CASE WHEN pagado THEN monto ELSE 0 END),
+               SUM(CASE WHEN pagado THEN 0 ELSE 1 END),
+               SUM(CASE WHEN pagado THEN 0 ELSE monto END)
+        FROM cuotas_campesinos
+        GROUP BY tipo_cuota_id
+    ''')
+    if conn is not None:
+        conn.close()
+
 # ==================== TIPOS DE CUOTA ====================
 
 def crear_tipo_cuota(nombre: str, monto: float, descripcion: str = "") -> int:
@@ -204,19 +330,34 @@ def asignar_cuota_a_campesino(campesino_id: int, numero_lote: str, nombre_campes
     # ✅ CALCULAR MONTO SEGÚN SUPERFICIE (igual que riegos)
     monto = superficie * tarifa_por_hectarea
     
-    cursor.execute('''
-        INSERT INTO cuotas_campesinos 
-        (campesino_id, tipo_cuota_id, numero_lote, nombre_campesino, barrio, monto)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (campesino_id, tipo_cuota_id, numero_lote, nombre_campesino, barrio, monto))
-    
+    try:
+        cursor.execute('''
+            INSERT INTO cuotas_campesinos
+            (campesino_id, tipo_cuota_id, numero_lote, nombre_campesino, barrio, monto)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (campesino_id, tipo_cuota_id, numero_lote, nombre_campesino, barrio, monto))
+    except sqlite3.IntegrityError:
+        conn.close()
+        raise ValueError(f"{nombre_campesino} ya tiene asignada la cuota '{row['nombre']}'")
+
     cuota_id = cursor.lastrowid
     conn.commit()
     conn.close()
     return cuota_id
 
-def asignar_cuota_masiva(tipo_cuota_id: int, campesinos_lista: List[Dict]) -> int:
-    """Asigna una cuota a múltiples campesinos (MONTO PROPORCIONAL A SUPERFICIE)"""
+def asignar_cuota_masiva(tipo_cuota_id: int, campesinos_lista: List[Dict]) -> Dict:
+    """
+    Asigna una cuota a múltiples campesinos (MONTO PROPORCIONAL A SUPERFICIE).
+    
+    Los montos se calculan para todo el grupo y se insertan con un solo
+    executemany dentro de una transacción. Se omiten los campesinos que ya
+    tienen la cuota (o que vienen repetidos en la lista).
+    
+    Returns:
+        Dict con total_asignados, total_ya_asignados, total_invalidos y
+        'resultados': un renglón por campesino con campesino_id, numero_lote,
+        nombre, resultado (ASIGNADA / YA_ASIGNADA / DATOS_INVALIDOS), monto y detalle
+    """
     conn = get_cuotas_connection()
     cursor = conn.cursor()
     
@@ -229,32 +370,65 @@ def asignar_cuota_masiva(tipo_cuota_id: int, campesinos_lista: List[Dict]) -> in
         raise ValueError("Tipo de cuota no encontrado")
     
     tarifa_por_hectarea = row['monto']
-    total_asignados = 0
+    resultados = []
+    filas = []
     
-    for campesino in campesinos_lista:
-        try:
-            # ✅ CALCULAR MONTO SEGÚN SUPERFICIE
-            monto = campesino['superficie'] * tarifa_por_hectarea
+    with transaccion_cuotas():
+        cursor.execute('SELECT campesino_id FROM cuotas_campesinos WHERE tipo_cuota_id = ?',
+                       (tipo_cuota_id,))
+        ya_asignados = {r['campesino_id'] for r in cursor.fetchall()}
+        
+        for campesino in campesinos_lista:
+            resultado = {
+                'campesino_id': campesino.get('id'),
+                'numero_lote': campesino.get('numero_lote'),
+                'nombre': campesino.get('nombre'),
+                'resultado': ASIGNADA,
+                'monto': None,
+                'detalle': ''
+            }
+            resultados.append(resultado)
             
-            cursor.execute('''
-                INSERT INTO cuotas_campesinos 
-                (campesino_id, tipo_cuota_id, numero_lote, nombre_campesino, barrio, monto)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                campesino['id'],
-                tipo_cuota_id,
-                campesino['numero_lote'],
-                campesino['nombre'],
-                campesino['barrio'],
-                monto
-            ))
-            total_asignados += 1
-        except:
-            continue
+            try:
+                campesino_id = int(campesino['id'])
+                # ✅ CALCULAR MONTO SEGÚN SUPERFICIE
+                monto = float(campesino['superficie']) * tarifa_por_hectarea
+                fila = (campesino_id, tipo_cuota_id, str(campesino['numero_lote']),
+                        campesino['nombre'], campesino['barrio'], monto)
+                if None in fila:
+                    raise ValueError("faltan nombre o barrio")
+            except (KeyError, TypeError, ValueError) as e:
+                resultado['resultado'] = DATOS_INVALIDOS
+                resultado['detalle'] = f"Datos inválidos: {e}"
+                continue
+            
+            if campesino_id in ya_asignados:
+                resultado['resultado'] = YA_ASIGNADA
+                resultado['detalle'] = "Ya tenía asignada esta cuota"
+                continue
+            
+            ya_asignados.add(campesino_id)
+            resultado['monto'] = monto
+            filas.append(fila)
+        
+        cursor.executemany('''
+            INSERT INTO cuotas_campesinos 
+            (campesino_id, tipo_cuota_id, numero_lote, nombre_campesino, barrio, monto)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', filas)
     
-    conn.commit()
     conn.close()
-    return total_asignados
+    
+    conteo = {ASIGNADA: 0, YA_ASIGNADA: 0, DATOS_INVALIDOS: 0}
+    for resultado in resultados:
+        conteo[resultado['resultado']] += 1
+    
+    return {
+        'total_asignados': conteo[ASIGNADA],
+        'total_ya_asignados': conteo[YA_ASIGNADA],
+        'total_invalidos': conteo[DATOS_INVALIDOS],
+        'resultados': resultados
+    }
 
 
 def obtener_cuotas_campesino(campesino_id: int) -> List[Dict]:
@@ -296,39 +470,29 @@ def obtener_resumen_cuota(tipo_cuota_id: int) -> Dict:
     conn = get_cuotas_connection()
     cursor = conn.cursor()
     
-    # Total asignados
     cursor.execute('''
-        SELECT COUNT(*) as total, SUM(monto) as monto_total
-        FROM cuotas_campesinos
+        SELECT total_asignados, monto_total, total_pagados, monto_recaudado,
+               total_pendientes, monto_pendiente
+        FROM resumen_tipos_cuota
         WHERE tipo_cuota_id = ?
     ''', (tipo_cuota_id,))
-    row_total = cursor.fetchone()
-    
-    # Pagados
-    cursor.execute('''
-        SELECT COUNT(*) as pagados, SUM(monto) as monto_pagado
-        FROM cuotas_campesinos
-        WHERE tipo_cuota_id = ? AND pagado = 1
-    ''', (tipo_cuota_id,))
-    row_pagados = cursor.fetchone()
-    
-    # Pendientes
-    cursor.execute('''
-        SELECT COUNT(*) as pendientes, SUM(monto) as monto_pendiente
-        FROM cuotas_campesinos
-        WHERE tipo_cuota_id = ? AND pagado = 0
-    ''', (tipo_cuota_id,))
-    row_pendientes = cursor.fetchone()
-    
+    row = cursor.fetchone()
     conn.close()
     
+    if row is None:
+        return {
+            'total_asignados': 0, 'monto_total': 0.0,
+            'total_pagados': 0, 'monto_recaudado': 0.0,
+            'total_pendientes': 0, 'monto_pendiente': 0.0
+        }
+    
     return {
-        'total_asignados': row_total['total'] or 0,
-        'monto_total': row_total['monto_total'] or 0.0,
-        'total_pagados': row_pagados['pagados'] or 0,
-        'monto_recaudado': row_pagados['monto_pagado'] or 0.0,
-        'total_pendientes': row_pendientes['pendientes'] or 0,
-        'monto_pendiente': row_pendientes['monto_pendiente'] or 0.0
+        'total_asignados': row['total_asignados'],
+        'monto_total': round(row['monto_total'], 2),
+        'total_pagados': row['total_pagados'],
+        'monto_recaudado': round(row['monto_recaudado'], 2),
+        'total_pendientes': row['total_pendientes'],
+        'monto_pendiente': round(row['monto_pendiente'], 2)
     }
 
 def obtener_todas_cuotas_con_estado() -> List[Dict]:
@@ -338,15 +502,14 @@ def obtener_todas_cuotas_con_estado() -> List[Dict]:
     
     cursor.execute('''
         SELECT tc.id, tc.nombre, tc.monto, tc.descripcion, tc.fecha_creacion,
-               COUNT(cc.id) as total_asignados,
-               SUM(CASE WHEN cc.pagado = 1 THEN 1 ELSE 0 END) as total_pagados,
-               SUM(CASE WHEN cc.pagado = 0 THEN 1 ELSE 0 END) as total_pendientes,
-               SUM(CASE WHEN cc.pagado = 1 THEN cc.monto ELSE 0 END) as monto_recaudado,
-               SUM(CASE WHEN cc.pagado = 0 THEN cc.monto ELSE 0 END) as monto_pendiente
+               COALESCE(r.total_asignados, 0) as total_asignados,
+               COALESCE(r.total_pagados, 0) as total_pagados,
+               COALESCE(r.total_pendientes, 0) as total_pendientes,
+               ROUND(COALESCE(r.monto_recaudado, 0), 2) as monto_recaudado,
+               ROUND(COALESCE(r.monto_pendiente, 0), 2) as monto_pendiente
         FROM tipos_cuota tc
-        LEFT JOIN cuotas_campesinos cc ON tc.id = cc.tipo_cuota_id
+        LEFT JOIN resumen_tipos_cuota r ON r.tipo_cuota_id = tc.id
         WHERE tc.activa = 1
-        GROUP BY tc.id
         ORDER BY tc.fecha_creacion DESC
     ''')
     
@@ -358,80 +521,98 @@ def obtener_todas_cuotas_con_estado() -> List[Dict]:
 
 def pagar_cuota(cuota_campesino_id: int) -> Dict:
     """Marca una cuota como pagada y genera un recibo"""
-    conn = get_cuotas_connection()
-    cursor = conn.cursor()
-    
-    # Obtener datos de la cuota
-    cursor.execute('''
-        SELECT cc.*, tc.nombre as nombre_cuota, tc.folio_actual
-        FROM cuotas_campesinos cc
-        JOIN tipos_cuota tc ON cc.tipo_cuota_id = tc.id
-        WHERE cc.id = ?
-    ''', (cuota_campesino_id,))
+    return pagar_cuotas([cuota_campesino_id])[0]
+
+
+def pagar_cuotas(cuota_campesino_ids: List[int]) -> List[Dict]:
+    """
+    Cobra varias cuotas en una sola transacción y genera un recibo por cada una.
     
-    cuota = cursor.fetchone()
+    El folio de cada recibo se toma de su tipo de cuota dentro de la misma
+    transacción, así que dos cobros simultáneos nunca repiten folio. Si alguna
+    cuota no existe o ya fue pagada no se cobra ninguna.
     
-    if not cuota:
-        conn.close()
-        raise ValueError("Cuota no encontrada")
+    Returns:
+        Lista de recibos en el orden recibido (mismas claves que pagar_cuota)
     
-    if cuota['pagado']:
-        conn.close()
-        raise ValueError("Esta cuota ya fue pagada")
-    
-    # Obtener folio individual del tipo de cuota
-    folio = cuota['folio_actual']
-    tipo_cuota_id = cuota['tipo_cuota_id']
+    Raises:
+        ValueError: Si la lista está vacía, o alguna cuota no existe o ya fue pagada
+    """
+    ids = list(dict.fromkeys(cuota_campesino_ids))
+    if not ids:
+        raise ValueError("No hay cuotas seleccionadas")
     
-    # Datos del recibo
     ahora = datetime.now()
     fecha = ahora.strftime('%Y-%m-%d')
     hora = ahora.strftime('%H:%M:%S')
     
-    # Crear recibo (✅ AHORA INCLUYE tipo_cuota_id)
-    cursor.execute('''
-        INSERT INTO recibos_cuotas 
-        (folio, tipo_cuota_id, fecha, hora, cuota_campesino_id, campesino_id, numero_lote, 
-         nombre_campesino, barrio, nombre_cuota, monto)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        folio, tipo_cuota_id, fecha, hora, cuota_campesino_id,
-        cuota['campesino_id'], cuota['numero_lote'],
-        cuota['nombre_campesino'], cuota['barrio'],
-        cuota['nombre_cuota'], cuota['monto']
-    ))
-    
-    recibo_id = cursor.lastrowid
-    
-    # Marcar cuota como pagada
-    cursor.execute('''
-        UPDATE cuotas_campesinos 
-        SET pagado = 1, fecha_pago = ?, recibo_folio = ?
-        WHERE id = ?
-    ''', (fecha, folio, cuota_campesino_id))
-    
-    # Incrementar el folio solo para este tipo de cuota
-    nuevo_folio = folio + 1
-    cursor.execute('''
-        UPDATE tipos_cuota 
-        SET folio_actual = ? 
-        WHERE id = ?
-    ''', (nuevo_folio, tipo_cuota_id))
+    conn = get_cuotas_connection()
+    cursor = conn.cursor()
+    recibos = []
+    
+    with transaccion_cuotas():
+        marcas = ','.join('?' * len(ids))
+        cursor.execute(f'''
+            SELECT cc.*, tc.nombre as nombre_cuota
+            FROM cuotas_campesinos cc
+            JOIN tipos_cuota tc ON cc.tipo_cuota_id = tc.id
+            WHERE cc.id IN ({marcas})
+        ''', ids)
+        cuotas_por_id = {row['id']: row for row in cursor.fetchall()}
+        
+        for cuota_id in ids:
+            cuota = cuotas_por_id.get(cuota_id)
+            if not cuota:
+                raise ValueError(f"Cuota {cuota_id} no encontrada")
+            if cuota['pagado']:
+                raise ValueError(f"La cuota {cuota['nombre_cuota']} del lote "
+                                 f"{cuota['numero_lote']} ya fue pagada")
+        
+        for cuota_id in ids:
+            cuota = cuotas_por_id[cuota_id]
+            
+            # Tomar el folio del tipo de cuota y avanzarlo en el mismo paso
+            cursor.execute('''
+                UPDATE tipos_cuota
+                SET folio_actual = folio_actual + 1
+                WHERE id = ?
+                RETURNING folio_actual - 1
+            ''', (cuota['tipo_cuota_id'],))
+            folio = cursor.fetchone()[0]
+            
+            cursor.execute('''
+                INSERT INTO recibos_cuotas 
+                (folio, tipo_cuota_id, fecha, hora, cuota_campesino_id, campesino_id, numero_lote, 
+                 nombre_campesino, barrio, nombre_cuota, monto)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                folio, cuota['tipo_cuota_id'], fecha, hora, cuota_id,
+                cuota['campesino_id'], cuota['numero_lote'],
+                cuota['nombre_campesino'], cuota['barrio'],
+                cuota['nombre_cuota'], cuota['monto']
+            ))
+            recibo_id = cursor.lastrowid
+            
+            cursor.execute('''
+                UPDATE cuotas_campesinos 
+                SET pagado = 1, fecha_pago = ?, recibo_folio = ?
+                WHERE id = ?
+            ''', (fecha, folio, cuota_id))
+            
+            recibos.append({
+                'recibo_id': recibo_id,
+                'folio': folio,
+                'fecha': fecha,
+                'hora': hora,
+                'monto': cuota['monto'],
+                'nombre_cuota': cuota['nombre_cuota'],
+                'numero_lote': cuota['numero_lote'],
+                'nombre_campesino': cuota['nombre_campesino'],
+                'barrio': cuota['barrio']
+            })
     
-    conn.commit()
     conn.close()
-    
-    return {
-        'recibo_id': recibo_id,
-        'folio': folio,
-        'fecha': fecha,
-        'hora': hora,
-        'monto': cuota['monto'],
-        'nombre_cuota': cuota['nombre_cuota'],
-        'numero_lote': cuota['numero_lote'],
-        'nombre_campesino': cuota['nombre_campesino'],
-        'barrio': cuota['barrio']
-    }
+    return recibos
 
 
 def obtener_recibo_cuota(recibo_id: int) -> Optional[Dict]:
@@ -445,6 +626,20 @@ def obtener_recibo_cuota(recibo_id: int) -> Optional[Dict]:
     conn.close()
     return dict(row) if row else None
 
+def obtener_recibos_cuota(recibo_ids: List[int]) -> List[Dict]:
+    """Obtiene varios recibos de cuota en el orden de los IDs (omite los que no existen)"""
+    if not recibo_ids:
+        return []
+    conn = get_cuotas_connection()
+    cursor = conn.cursor()
+    
+    marcas = ','.join('?' * len(recibo_ids))
+    cursor.execute(f'SELECT * FROM recibos_cuotas WHERE id IN ({marcas})', list(recibo_ids))
+    por_id = {row['id']: dict(row) for row in cursor.fetchall()}
+    
+    conn.close()
+    return [por_id[i] for i in recibo_ids if i in por_id]
+
 def obtener_recibos_cuotas_dia(fecha: Optional[str] = None) -> List[Dict]:
     """Obtiene todos los recibos de cuotas de un día específico"""
     if not fecha:
@@ -465,19 +660,7 @@ def obtener_recibos_cuotas_dia(fecha: Optional[str] = None) -> List[Dict]:
 
 def calcular_total_recaudado_cuota(tipo_cuota_id: int) -> float:
     """Calcula el total recaudado de una cuota específica"""
-    conn = get_cuotas_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT SUM(monto) as total
-        FROM cuotas_campesinos
-        WHERE tipo_cuota_id = ? AND pagado = 1
-    ''', (tipo_cuota_id,))
-    
-    row = cursor.fetchone()
-    conn.close()
-    
-    return row['total'] or 0.0
+    return obtener_resumen_cuota(tipo_cuota_id)['monto_recaudado']
 
 # ==================== ESTADÍSTICAS ====================
 
@@ -486,32 +669,23 @@ def obtener_estadisticas_generales_cuotas() -> Dict:
     conn = get_cuotas_connection()
     cursor = conn.cursor()
     
-    # Total de tipos de cuotas activas
-    cursor.execute("SELECT COUNT(*) FROM tipos_cuota WHERE activa = 1")
-    total_tipos_cuotas = cursor.fetchone()[0]
-    
-    # Total de cuotas asignadas
-    cursor.execute("SELECT COUNT(*) FROM cuotas_campesinos")
-    total_cuotas_asignadas = cursor.fetchone()[0]
-    
-    # Total pagadas
-    cursor.execute("SELECT COUNT(*) FROM cuotas_campesinos WHERE pagado = 1")
-    total_pagadas = cursor.fetchone()[0]
-    
-    # Total pendientes
-    cursor.execute("SELECT COUNT(*) FROM cuotas_campesinos WHERE pagado = 0")
-    total_pendientes = cursor.fetchone()[0]
-    
-    # Monto total recaudado
-    cursor.execute("SELECT SUM(monto) FROM cuotas_campesinos WHERE pagado = 1")
-    monto_recaudado = cursor.fetchone()[0] or 0.0
-    
-    # Monto total pendiente
-    cursor.execute("SELECT SUM(monto) FROM cuotas_campesinos WHERE pagado = 0")
-    monto_pendiente = cursor.fetchone()[0] or 0.0
+    cursor.execute('''
+        SELECT (SELECT COUNT(*) FROM tipos_cuota WHERE activa = 1),
+               COALESCE(SUM(total_asignados), 0),
+               COALESCE(SUM(total_pagados), 0),
+               COALESCE(SUM(total_pendientes), 0),
+               COALESCE(SUM(monto_recaudado), 0),
+               COALESCE(SUM(monto_pendiente), 0)
+        FROM resumen_tipos_cuota
+    ''')
+    (total_tipos_cuotas, total_cuotas_asignadas, total_pagadas, total_pendientes,
+     monto_recaudado, monto_pendiente) = cursor.fetchone()
     
     conn.close()
     
+    monto_recaudado = round(monto_recaudado, 2)
+    monto_pendiente = round(monto_pendiente, 2)
+    
     return {
         'total_tipos_cuotas': total_tipos_cuotas,
         'total_cuotas_asignadas': total_cuotas_asignadas,
@@ -519,7 +693,7 @@ def obtener_estadisticas_generales_cuotas() -> Dict:
         'total_pendientes': total_pendientes,
         'monto_recaudado': monto_recaudado,
         'monto_pendiente': monto_pendiente,
-        'monto_total': monto_recaudado + monto_pendiente
+        'monto_total': round(monto_recaudado + monto_pendiente, 2)
     }
     
 def migrar_folios_individuales():
@@ -567,72 +741,142 @@ def migrar_folios_individuales():
     finally:
         conn.close()
 
+def _recibos_cuotas_migrados(cursor) -> bool:
+    """La estructura nueva tiene tipo_cuota_id y folios únicos por tipo de cuota"""
+    cursor.execute("PRAGMA table_info(recibos_cuotas)")
+    if 'tipo_cuota_id' not in [col['name'] for col in cursor.fetchall()]:
+        return False
+    
+    cursor.execute("PRAGMA index_list(recibos_cuotas)")
+    for indice in cursor.fetchall():
+        if indice['unique']:
+            cursor.execute(f"PRAGMA index_info('{indice['name']}')")
+            if [col['name'] for col in cursor.fetchall()] == ['tipo_cuota_id', 'folio']:
+                return True
+    return False
+
 def recrear_tabla_recibos_cuotas():
-    """Recrea la tabla recibos_cuotas con la nueva estructura"""
+    """
+    Recrea la tabla recibos_cuotas con la nueva estructura.
+    Si la tabla ya está migrada no hace nada (antes se recreaba en cada arranque).
+    """
     conn = get_cuotas_connection()
     cursor = conn.cursor()
     
+    if _recibos_cuotas_migrados(cursor):
+        conn.close()
+        return
+    
     try:
-        # Respaldar datos existentes
-        cursor.execute("SELECT * FROM recibos_cuotas")
-        recibos_viejos = cursor.fetchall()
+        with transaccion_cuotas():
+            # Respaldar datos existentes
+            cursor.execute("SELECT * FROM recibos_cuotas")
+            recibos_viejos = cursor.fetchall()
+            columnas = [d[0] for d in cursor.description]
         
-        # Eliminar tabla vieja
-        cursor.execute("DROP TABLE IF EXISTS recibos_cuotas")
+            # Eliminar tabla vieja
+            cursor.execute("DROP TABLE IF EXISTS recibos_cuotas")
         
-        # Crear tabla nueva
-        cursor.execute('''
-            CREATE TABLE recibos_cuotas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                folio INTEGER NOT NULL,
-                tipo_cuota_id INTEGER NOT NULL,
-                fecha TEXT NOT NULL,
-                hora TEXT NOT NULL,
-                cuota_campesino_id INTEGER NOT NULL,
-                campesino_id INTEGER NOT NULL,
-                numero_lote TEXT NOT NULL,
-                nombre_campesino TEXT NOT NULL,
-                barrio TEXT NOT NULL,
-                nombre_cuota TEXT NOT NULL,
-                monto REAL NOT NULL,
-                eliminado BOOLEAN DEFAULT 0,
-                fecha_eliminacion TEXT,
-                motivo_eliminacion TEXT,
-                FOREIGN KEY (cuota_campesino_id) REFERENCES cuotas_campesinos(id),
-                UNIQUE(tipo_cuota_id, folio)
-            )
-        ''')
+            # Crear tabla nueva
+            cursor.execute('''
+                CREATE TABLE recibos_cuotas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    folio INTEGER NOT NULL,
+                    tipo_cuota_id INTEGER NOT NULL,
+                    fecha TEXT NOT NULL,
+                    hora TEXT NOT NULL,
+                    cuota_campesino_id INTEGER NOT NULL,
+                    campesino_id INTEGER NOT NULL,
+                    numero_lote TEXT NOT NULL,
+                    nombre_campesino TEXT NOT NULL,
+                    barrio TEXT NOT NULL,
+                    nombre_cuota TEXT NOT NULL,
+                    monto REAL NOT NULL,
+                    eliminado BOOLEAN DEFAULT 0,
+                    fecha_eliminacion TEXT,
+                    motivo_eliminacion TEXT,
+                    FOREIGN KEY (cuota_campesino_id) REFERENCES cuotas_campesinos(id),
+                    UNIQUE(tipo_cuota_id, folio)
+                )
+            ''')
         
-        # Restaurar datos con tipo_cuota_id
-        for recibo in recibos_viejos:
-            # Obtener tipo_cuota_id del nombre
-            cursor.execute('SELECT id FROM tipos_cuota WHERE nombre = ?', (recibo['nombre_cuota'],))
-            tipo = cursor.fetchone()
-            tipo_cuota_id = tipo[0] if tipo else 1
+            # Restaurar datos con tipo_cuota_id
+            for recibo in recibos_viejos:
+                # Obtener tipo_cuota_id del nombre
+                cursor.execute('SELECT id FROM tipos_cuota WHERE nombre = ?', (recibo['nombre_cuota'],))
+                tipo = cursor.fetchone()
+                tipo_cuota_id = tipo[0] if tipo else 1
             
-            cursor.execute('''
-                INSERT INTO recibos_cuotas 
-                (id, folio, tipo_cuota_id, fecha, hora, cuota_campesino_id, campesino_id, 
-                 numero_lote, nombre_campesino, barrio, nombre_cuota, monto, eliminado)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                recibo['id'], recibo['folio'], tipo_cuota_id, recibo['fecha'], 
-                recibo['hora'], recibo['cuota_campesino_id'], recibo['campesino_id'],
-                recibo['numero_lote'], recibo['nombre_campesino'], recibo['barrio'],
-                recibo['nombre_cuota'], recibo['monto'], recibo['eliminado']
-            ))
+                cursor.execute('''
+                    INSERT INTO recibos_cuotas 
+                    (id, folio, tipo_cuota_id, fecha, hora, cuota_campesino_id, campesino_id, 
+                     numero_lote, nombre_campesino, barrio, nombre_cuota, monto, eliminado,
+                     fecha_eliminacion, motivo_eliminacion)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    recibo['id'], recibo['folio'], tipo_cuota_id, recibo['fecha'], 
+                    recibo['hora'], recibo['cuota_campesino_id'], recibo['campesino_id'],
+                    recibo['numero_lote'], recibo['nombre_campesino'], recibo['barrio'],
+                    recibo['nombre_cuota'], recibo['monto'], recibo['eliminado'],
+                    recibo['fecha_eliminacion'] if 'fecha_eliminacion' in columnas else None,
+                    recibo['motivo_eliminacion'] if 'motivo_eliminacion' in columnas else None
+                ))
         
-        conn.commit()
         print("✓ Tabla recibos_cuotas migrada correctamente")
         
     except Exception as e:
         print(f"Error en migración: {e}")
-        conn.rollback()
     finally:
         conn.close()
 
 # ==================== SINCRONIZACIÓN CON RIEGO.DB ====================
 
+def _recalcular_pendientes(cursor, superficies: Dict[int, float]) -> int:
+    """
+    Monto = superficie * tarifa del tipo de cuota, para todas las cuotas
+    PENDIENTES de los campesinos dados, en un solo UPDATE ... FROM.
+    """
+    cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS superficies_nuevas (
+            campesino_id INTEGER PRIMARY KEY,
+            superficie REAL NOT NULL
+        )
+    ''')
+    cursor.execute('DELETE FROM superficies_nuevas')
+    cursor.executemany('INSERT OR REPLACE INTO superficies_nuevas (campesino_id, superficie) VALUES (?, ?)',
+                       [(int(campesino_id), float(superficie)) for campesino_id, superficie in superficies.items()])
+    cursor.execute('''
+        UPDATE cuotas_campesinos
+        SET monto = sn.superficie * tc.monto
+        FROM superficies_nuevas sn, tipos_cuota tc
+        WHERE cuotas_campesinos.campesino_id = sn.campesino_id
+          AND tc.id = cuotas_campesinos.tipo_cuota_id
+          AND cuotas_campesinos.pagado = 0
+    ''')
+    actualizadas = cursor.rowcount
+    cursor.execute('DELETE FROM superficies_nuevas')
+    return actualizadas
+
+def recalcular_cuotas_pendientes(superficies: Dict[int, float]) -> int:
+    """
+    Versión por lotes: recalcula las cuotas pendientes de muchos campesinos a
+    la vez (p.ej. después de recargar el CSV o de partir lotes).
+    
+    Args:
+        superficies: {campesino_id: superficie_en_hectareas}
+    
+    Returns:
+        Número de cuotas pendientes recalculadas
+    """
+    if not superficies:
+        return 0
+    
+    conn = get_cuotas_connection()
+    with transaccion_cuotas():
+        actualizadas = _recalcular_pendientes(conn.cursor(), superficies)
+    conn.close()
+    return actualizadas
+
 def actualizar_datos_campesino_en_cuotas(campesino_id: int, nuevos_datos: Dict):
     """
     Sincroniza los cambios de datos del campesino (riego.db) hacia cuotas.db.
@@ -648,80 +892,31 @@ def actualizar_datos_campesino_en_cuotas(campesino_id: int, nuevos_datos: Dict):
     cursor = conn.cursor()
     
     try:
-        # 1. Actualizar datos básicos en todas las cuotas del campesino
-        campos_basicos = []
-        valores_basicos = []
-        
-        if 'nombre' in nuevos_datos:
-            campos_basicos.append("nombre_campesino = ?")
-            valores_basicos.append(nuevos_datos['nombre'])
-            
-        if 'numero_lote' in nuevos_datos:
-            campos_basicos.append("numero_lote = ?")
-            valores_basicos.append(nuevos_datos['numero_lote'])
-            
-        if 'barrio' in nuevos_datos:
-            campos_basicos.append("barrio = ?")
-            valores_basicos.append(nuevos_datos['barrio'])
-            
-        if campos_basicos:
-            valores_basicos.append(campesino_id)
-            sql_basico = f"UPDATE cuotas_campesinos SET {', '.join(campos_basicos)} WHERE campesino_id = ?"
-            cursor.execute(sql_basico, valores_basicos)
-            print(f"✓ Datos básicos actualizados en cuotas para campesino {campesino_id}")
-
-        # 2. Si cambió la superficie, recalcular montos de cuotas PENDIENTES
-        if 'superficie' in nuevos_datos:
-            nueva_superficie = float(nuevos_datos['superficie'])
-            print(f"DEBUG: Detectado cambio de superficie a {nueva_superficie}")
+        with transaccion_cuotas():
+            # 1. Actualizar datos básicos en todas las cuotas del campesino
+            campos_basicos = []
+            valores_basicos = []
             
-            # Obtener cuotas pendientes
-            cursor.execute('''
-                SELECT id, tipo_cuota_id, pagado
-                FROM cuotas_campesinos 
-                WHERE campesino_id = ?
-            ''', (campesino_id,))
-            
-            todas_cuotas = cursor.fetchall()
-            print(f"DEBUG: Total cuotas encontradas para campesino {campesino_id}: {len(todas_cuotas)}")
-            for c in todas_cuotas:
-                print(f"DEBUG: Cuota {c['id']} - Pagado: {c['pagado']}")
-
-            cursor.execute('''
-                SELECT id, tipo_cuota_id 
-                FROM cuotas_campesinos 
-                WHERE campesino_id = ? AND pagado = 0
-            ''', (campesino_id,))
-            
-            pendientes = cursor.fetchall()
-            print(f"DEBUG: Pendientes encontradas query: {len(pendientes)}")
-            
-            if pendientes:
-                print(f"⚠ Recalculando {len(pendientes)} cuotas pendientes por cambio de superficie...")
+            if 'nombre' in nuevos_datos:
+                campos_basicos.append("nombre_campesino = ?")
+                valores_basicos.append(nuevos_datos['nombre'])
                 
-                for cuota in pendientes:
-                    cuota_id = cuota['id']
-                    tipo_id = cuota['tipo_cuota_id']
-                    
-                    # Obtener tarifa actual de ese tipo de cuota
-                    cursor.execute('SELECT monto FROM tipos_cuota WHERE id = ?', (tipo_id,))
-                    row_tipo = cursor.fetchone()
-                    
-                    if row_tipo:
-                        tarifa = row_tipo['monto']
-                        nuevo_monto = nueva_superficie * tarifa
-                        print(f"DEBUG: Recalculando Cuota {cuota_id}: Tarifa {tarifa} * Sup {nueva_superficie} = {nuevo_monto}")
-                        
-                        # Actualizar monto de la cuota
-                        cursor.execute('''
-                            UPDATE cuotas_campesinos 
-                            SET monto = ? 
-                            WHERE id = ?
-                        ''', (nuevo_monto, cuota_id))
+            if 'numero_lote' in nuevos_datos:
+                campos_basicos.append("numero_lote = ?")
+                valores_basicos.append(nuevos_datos['numero_lote'])
                 
-                print(f"✓ Montos recalculados correctamente.")
-        
-        conn.commit()
+            if 'barrio' in nuevos_datos:
+                campos_basicos.append("barrio = ?")
+                valores_basicos.append(nuevos_datos['barrio'])
+                
+            if campos_basicos:
+                valores_basicos.append(campesino_id)
+                sql_basico = f"UPDATE cuotas_campesinos SET {', '.join(campos_basicos)} WHERE campesino_id = ?"
+                cursor.execute(sql_basico, valores_basicos)
+
+            # 2. Si cambió la superficie, recalcular montos de cuotas PENDIENTES
+            if 'superficie' in nuevos_datos:
+                _recalcular_pendientes(cursor, {campesino_id: nuevos_datos['superficie']})
         
     except Exception as e:
         print(f"Error al sincronizar con cuotas: {e}")
@@ -0,0 +1,158 @@
+# modules/estadisticas.py - Estadísticas del Sistema en una Sola Pasada
+# Todos los indicadores salen de dos recorridos (padrón y siembras) más el resumen de ventas
+import threading
+from typing import Dict
+
+from modules import models
+
+# Instantánea por hilo (cada hilo tiene su propia conexión). Se reutiliza mientras:
+# - PRAGMA data_version no cambie (nadie más confirmó cambios) y
+# - total_changes de la conexión no cambie (este hilo no escribió).
+_instantanea = threading.local()
+
+
+def _ordenar_desc(valores: Dict) -> Dict:
+    return dict(sorted(valores.items(), key=lambda item: item[1], reverse=True))
+
+
+def calcular_estadisticas(conn) -> Dict:
+    """
+    Calcula todos los indicadores de la ventana y del PDF de estadísticas.
+
+    Las claves de obtener_estadisticas_generales() se conservan; además incluye
+    'por_cultivo' (lo que antes daba obtener_estadisticas_por_cultivo para cada
+    cultivo) y los totales que usa el PDF (lotes, siembras, recibos e ingresos).
+    """
+    cursor = conn.cursor()
+
+    # 1. Padrón activo: un renglón por campesino con sus siembras activas
+    cursor.execute('''
+        SELECT c.barrio, COALESCE(c.superficie, 0) AS superficie,
+               (SELECT COUNT(*) FROM siembras s
+                WHERE s.campesino_id = c.id AND s.activa = 1) AS siembras_activas
+        FROM campesinos c
+        WHERE c.activo = 1
+    ''')
+    total_campesinos = 0
+    total_hectareas = 0.0
+    hectareas_sembradas = 0.0
+    campesinos_sin_siembra = 0
+    hectareas_por_barrio: Dict = {}
+    for barrio, superficie, siembras_activas in cursor:
+        total_campesinos += 1
+        total_hectareas += superficie
+        # Igual que el JOIN anterior: cada siembra activa suma la superficie del lote
+        hectareas_sembradas += superficie * siembras_activas
+        if not siembras_activas:
+            campesinos_sin_siembra += 1
+        hectareas_por_barrio[barrio] = hectareas_por_barrio.get(barrio, 0) + superficie
+
+    # 2. Siembras activas agrupadas por cultivo
+    cursor.execute('''
+        SELECT s.cultivo,
+               COUNT(*) AS siembras,
+               COUNT(DISTINCT s.campesino_id) AS campesinos,
+               SUM(c.superficie) AS hectareas,
+               AVG(s.numero_riegos) AS riegos_promedio,
+               SUM(s.numero_riegos) AS riegos
+        FROM siembras s
+        LEFT JOIN campesinos c ON s.campesino_id = c.id
+        WHERE s.activa = 1
+        GROUP BY s.cultivo
+    ''')
+    siembras_por_cultivo = {}
+    hectareas_por_cultivo = {}
+    por_cultivo = {}
+    for cultivo, siembras, campesinos, hectareas, riegos_promedio, riegos in cursor.fetchall():
+        siembras_por_cultivo[cultivo] = siembras
+        if hectareas is not None:
+            hectareas_por_cultivo[cultivo] = hectareas
+        por_cultivo[cultivo] = {
+            'cultivo': cultivo,
+            'total_campesinos': campesinos,
+            'total_hectareas': round(hectareas or 0, 2),
+            'riegos_promedio': round(riegos_promedio or 0, 1),
+            'total_riegos': riegos or 0,
+            'num_recibos': 0,
+            'ingresos_totales': 0.0
+        }
+
+    # 3. Ventas del ciclo (tabla resumen_ventas, mantenida por triggers)
+    configuracion = models.obtener_toda_configuracion()
+    ciclo_actual = configuracion.get('ciclo_actual') or ""
+    try:
+        tarifa_hectarea = float(configuracion.get('tarifa_hectarea'))
+    except (TypeError, ValueError):
+        tarifa_hectarea = 450.0
+
+    cursor.execute('''
+        SELECT cultivo, SUM(cantidad), SUM(total)
+        FROM resumen_ventas
+        WHERE ciclo = ?
+        GROUP BY cultivo
+    ''', (ciclo_actual,))
+    total_recibos = 0
+    ingreso_real = 0.0
+    for cultivo, cantidad, total in cursor.fetchall():
+        total_recibos += cantidad
+        ingreso_real += total
+        if cultivo in por_cultivo:
+            por_cultivo[cultivo]['num_recibos'] = cantidad
+            por_cultivo[cultivo]['ingresos_totales'] = round(total, 2)
+
+    porcentaje_sembrado = (hectareas_sembradas / total_hectareas * 100) if total_hectareas > 0 else 0
+    ingreso_potencial = total_hectareas * tarifa_hectarea
+    eficiencia_recaudacion = (ingreso_real / ingreso_potencial * 100) if ingreso_potencial > 0 else 0
+
+    return {
+        'total_campesinos': total_campesinos,
+        'total_hectareas': round(total_hectareas, 2),
+        'hectareas_sembradas': round(hectareas_sembradas, 2),
+        'hectareas_sin_sembrar': round(total_hectareas - hectareas_sembradas, 2),
+        'porcentaje_sembrado': round(porcentaje_sembrado, 2),
+        'siembras_por_cultivo': _ordenar_desc(siembras_por_cultivo),
+        'hectareas_por_cultivo': _ordenar_desc(hectareas_por_cultivo),
+        'campesinos_sin_siembra': campesinos_sin_siembra,
+        'ingreso_potencial': round(ingreso_potencial, 2),
+        'ingreso_real': round(ingreso_real, 2),
+        'eficiencia_recaudacion': round(eficiencia_recaudacion, 2),
+        'hectareas_por_barrio': _ordenar_desc(hectareas_por_barrio),
+        'ciclo_actual': ciclo_actual,
+        # Claves que usa generar_pdf_estadisticas
+        'total_lotes': total_campesinos,
+        'superficie_total': round(total_hectareas, 2),
+        'siembras_activas': sum(siembras_por_cultivo.values()),
+        'total_recibos': total_recibos,
+        'ingresos_totales': round(ingreso_real, 2),
+        'por_cultivo': por_cultivo
+    }
+
+
+def _version_datos(conn):
+    return (conn.execute('PRAGMA data_version').fetchone()[0], conn.total_changes)
+
+
+def obtener_estadisticas() -> Dict:
+    """
+    Instantánea de estadísticas; sólo se recalcula si la BD cambió desde la
+    última llamada. Mientras no cambie regresa el MISMO objeto, así quien la
+    pide puede saber con 'is' si hay datos nuevos. No debe modificarse.
+    """
+    conn = models.get_connection()
+    if models._gestor_riego.en_transaccion():
+        # Dentro de una transacción los datos aún pueden revertirse
+        return calcular_estadisticas(conn)
+
+    version = _version_datos(conn)
+    if (getattr(_instantanea, 'datos', None) is None
+            or _instantanea.conexion is not conn
+            or _instantanea.version != version):
+        _instantanea.datos = calcular_estadisticas(conn)
+        _instantanea.conexion = conn
+        _instantanea.version = version
+    return _instantanea.datos
+
+
+def invalidar_estadisticas():
+    """Descarta la instantánea del hilo actual"""
+    _instantanea.datos = None
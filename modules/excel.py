@@ -0,0 +1,103 @@
+# modules/excel.py - Escritor de Excel en Modo Streaming
+# Libros openpyxl write_only: cada fila se escribe al agregarla y no se guarda en memoria
+import os
+from typing import Dict, Optional, Sequence, Union
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
+
+# ==================== ESTILOS COMPARTIDOS ====================
+# Se crean una vez por proceso; openpyxl los guarda una sola vez en la tabla de estilos
+
+FORMATO_MONEDA = '$#,##0.00'
+FORMATO_MONEDA_CUOTAS = '"$"#,##0.00'
+
+BORDE_DELGADO = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+RELLENO_AZUL = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
+RELLENO_AZUL_OSCURO = PatternFill(start_color='1F497D', end_color='1F497D', fill_type='solid')
+RELLENO_VERDE_CLARO = PatternFill(start_color='E2EFDA', end_color='E2EFDA', fill_type='solid')
+RELLENO_AMARILLO = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
+
+CENTRADO = Alignment(horizontal='center')
+CENTRADO_VERTICAL = Alignment(horizontal='center', vertical='center')
+DERECHA = Alignment(horizontal='right')
+
+# Un estilo es un dict con cualquiera de: font, fill, border, alignment, number_format
+Estilo = Dict[str, object]
+
+ESTILO_ENCABEZADO = {'font': Font(bold=True, color='FFFFFF'), 'fill': RELLENO_AZUL, 'alignment': CENTRADO}
+ESTILO_NEGRITA = {'font': Font(bold=True)}
+ESTILO_MONEDA = {'number_format': FORMATO_MONEDA}
+
+
+class EscritorExcel:
+    """
+    Escribe una hoja de Excel fila por fila en modo write_only.
+
+    La memoria no crece con el número de filas, a cambio de dos reglas:
+    - Los anchos de columna se fijan al crear el escritor (no se pueden medir
+      después de escribir las filas).
+    - Las filas sólo se agregan hacia abajo; combinar() actúa sobre la última.
+    """
+
+    def __init__(self, ruta: str, titulo_hoja: str, anchos: Sequence[float]):
+        self.ruta = ruta
+        self.libro = Workbook(write_only=True)
+        self.hoja = self.libro.create_sheet(titulo_hoja)
+        for columna, ancho in enumerate(anchos, 1):
+            self.hoja.column_dimensions[get_column_letter(columna)].width = ancho
+        self.filas = 0
+
+    def celda(self, valor, estilo: Optional[Estilo] = None) -> WriteOnlyCell:
+        celda = WriteOnlyCell(self.hoja, value=valor)
+        if estilo:
+            for atributo, valor_estilo in estilo.items():
+                setattr(celda, atributo, valor_estilo)
+        return celda
+
+    def agregar_fila(self, valores: Sequence = (),
+                     estilos: Union[Estilo, Sequence[Optional[Estilo]], None] = None):
+        """
+        Agrega una fila.
+
+        Args:
+            valores: Valores de la fila desde la columna A
+            estilos: Un estilo para toda la fila o una lista con uno por columna
+        """
+        if isinstance(estilos, dict):
+            estilos = [estilos] * len(valores)
+        elif estilos is None:
+            estilos = [None] * len(valores)
+
+        self.hoja.append([
+            self.celda(valor, estilo) if estilo else valor
+            for valor, estilo in zip(valores, estilos)
+        ])
+        self.filas += 1
+
+    def fila_vacia(self, cantidad: int = 1):
+        for _ in range(cantidad):
+            self.hoja.append([])
+            self.filas += 1
+
+    def combinar(self, columna_inicio: int, columna_fin: int):
+        """Combina columnas de la última fila agregada"""
+        self.hoja.merged_cells.add(
+            f"{get_column_letter(columna_inicio)}{self.filas}:{get_column_letter(columna_fin)}{self.filas}"
+        )
+
+    def guardar(self) -> str:
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.libro.save(self.ruta)
+        return self.ruta
+
@@ -0,0 +1,343 @@
+# modules/graficas.py - Gráficas con Caché en Disco
+# Cada imagen se nombra por el hash de sus datos: si los datos no cambian, no se vuelve a
+# dibujar (ni se importa matplotlib). Las que faltan se dibujan en un proceso aparte.
+import os
+import json
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Tuple
+
+DIRECTORIO_GRAFICAS = os.path.join('database', 'graficas')
+
+# Subir al cambiar el estilo de cualquier gráfica (invalida la caché completa)
+VERSION_GRAFICAS = 1
+
+# Imágenes que se conservan en disco; se borran las menos usadas
+MAX_GRAFICAS_EN_CACHE = 200
+
+_ejecutor = None
+_lock = threading.Lock()
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import numpy as np
+    return plt, np
+
+
+# ==================== GRÁFICAS DEL PDF DE ESTADÍSTICAS ====================
+
+def _grafico_barras_cultivos_pro(datos: Dict, ruta_imagen: str):
+    """Crea un gráfico de barras profesional con gradientes"""
+    plt, np = _pyplot()
+    cultivos = datos['cultivos']
+    superficies = datos['superficies']
+
+    fig, ax = plt.subplots(figsize=(11, 6), facecolor='white')
+
+    # Colores degradados profesionales
+    colores_base = ['#2e7d32', '#1976d2', '#f57c00', '#d32f2f', '#7b1fa2', '#0097a7', '#fbc02d', '#5d4037']
+    colores = colores_base[:len(cultivos)]
+
+    # Crear barras con efecto visual
+    barras = ax.bar(range(len(cultivos)), superficies, color=colores, 
+                    edgecolor='white', linewidth=2.5, alpha=0.9)
+
+    # Añadir valores sobre las barras con mejor formato
+    for i, (barra, valor) in enumerate(zip(barras, superficies)):
+        altura = barra.get_height()
+        ax.text(barra.get_x() + barra.get_width()/2., altura + max(superficies)*0.03,
+                f'{valor:.2f} ha',
+                ha='center', va='bottom', fontsize=11, fontweight='bold',
+                bbox=dict(boxstyle='round,pad=0.4', facecolor='white', 
+                        edgecolor=colores[i % len(colores)], linewidth=2, alpha=0.95))
+
+    ax.set_xticks(range(len(cultivos)))
+    ax.set_xticklabels(cultivos, rotation=35, ha='right', fontsize=11, fontweight='600')
+    ax.set_xlabel('Tipo de Cultivo', fontsize=13, fontweight='bold', labelpad=10)
+    ax.set_ylabel('Superficie (hectáreas)', fontsize=13, fontweight='bold', labelpad=10)
+    ax.set_title('Distribución de Superficie por Tipo de Cultivo', 
+                 fontsize=15, fontweight='bold', pad=20, color='#1a5490')
+
+    # Mejorar grid
+    ax.grid(axis='y', alpha=0.3, linestyle='--', linewidth=1)
+    ax.set_axisbelow(True)
+
+    # Añadir línea promedio
+    promedio = np.mean(superficies)
+    ax.axhline(y=promedio, color='red', linestyle='--', linewidth=2, alpha=0.7, 
+              label=f'Promedio: {promedio:.2f} ha')
+    ax.legend(loc='upper right', fontsize=10, framealpha=0.95)
+
+    # Mejorar estilo de ejes
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_linewidth(1.5)
+    ax.spines['bottom'].set_linewidth(1.5)
+
+    plt.tight_layout()
+    plt.savefig(ruta_imagen, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close()
+
+
+def _grafico_dona_cultivos_pro(datos: Dict, ruta_imagen: str):
+    """Crea un gráfico de dona profesional con detalles mejorados"""
+    plt, np = _pyplot()
+    cultivos = datos['cultivos']
+    superficies = datos['superficies']
+
+    fig, ax = plt.subplots(figsize=(10, 10), facecolor='white')
+
+    # Colores profesionales
+    colores = ['#2e7d32', '#1976d2', '#f57c00', '#d32f2f', '#7b1fa2', '#0097a7', '#fbc02d', '#5d4037']
+    colores = colores[:len(cultivos)]
+
+    # Crear efecto de explosión sutil para el mayor valor
+    explode = [0.08 if i == superficies.index(max(superficies)) else 0 for i in range(len(superficies))]
+
+    def autopct_format(pct):
+        return f'{pct:.1f}%' if pct > 2 else ''
+
+    # Crear gráfico de dona
+    wedges, texts, autotexts = ax.pie(superficies, labels=None, autopct=autopct_format,
+                                        colors=colores, startangle=90, explode=explode,
+                                        textprops={'fontsize': 12, 'fontweight': 'bold'},
+                                        wedgeprops={'edgecolor': 'white', 'linewidth': 3, 
+                                                   'antialiased': True},
+                                        pctdistance=0.82)
+
+    # Crear el agujero de la dona
+    centre_circle = plt.Circle((0, 0), 0.65, fc='white', linewidth=2.5, edgecolor='#1a5490')
+    ax.add_artist(centre_circle)
+
+    # Texto central
+    total_superficie = sum(superficies)
+    ax.text(0, 0.08, f'{total_superficie:.2f}', ha='center', va='center',
+            fontsize=30, fontweight='bold', color='#1a5490')
+    ax.text(0, -0.18, 'hectáreas\ntotales', ha='center', va='center',
+            fontsize=12, color='#666666', style='italic')
+
+    # Mejorar textos de porcentaje
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(11)
+
+    # Leyenda mejorada con superficie
+    leyendas = [f'{cultivo}: {sup:.2f} ha' for cultivo, sup in zip(cultivos, superficies)]
+    ax.legend(wedges, leyendas, title="Cultivos", loc="center left",
+             bbox_to_anchor=(1, 0, 0.5, 1), fontsize=11, title_fontsize=13,
+             frameon=True, shadow=True, fancybox=True)
+
+    ax.set_title('Distribución Porcentual de Cultivos', 
+                 fontsize=16, fontweight='bold', pad=25, color='#1a5490')
+
+    plt.tight_layout()
+    plt.savefig(ruta_imagen, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close()
+
+
+def _grafico_comparativo(datos: Dict, ruta_imagen: str):
+    """Crea un gráfico comparativo de campesinos vs superficie"""
+    plt, np = _pyplot()
+    cultivos = datos['cultivos']
+    campesinos = datos['siembras']
+    superficies = datos['superficies']
+
+    fig, ax1 = plt.subplots(figsize=(11, 6), facecolor='white')
+
+    x = np.arange(len(cultivos))
+    width = 0.38
+
+    # Primer eje: Campesinos
+    color1 = '#1976d2'
+    ax1.bar(x - width/2, campesinos, width, label='Campesinos', 
+            color=color1, alpha=0.85, edgecolor='white', linewidth=2.5)
+    ax1.set_xlabel('Cultivo', fontsize=13, fontweight='bold', labelpad=10)
+    ax1.set_ylabel('Número de Campesinos', color=color1, fontsize=12, fontweight='bold', labelpad=10)
+    ax1.tick_params(axis='y', labelcolor=color1, labelsize=10)
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(cultivos, rotation=35, ha='right', fontsize=10, fontweight='600')
+
+    # Segundo eje: Superficie
+    ax2 = ax1.twinx()
+    color2 = '#2e7d32'
+    ax2.bar(x + width/2, superficies, width, label='Superficie (ha)',
+            color=color2, alpha=0.85, edgecolor='white', linewidth=2.5)
+    ax2.set_ylabel('Superficie (hectáreas)', color=color2, fontsize=12, fontweight='bold', labelpad=10)
+    ax2.tick_params(axis='y', labelcolor=color2, labelsize=10)
+
+    # Título y leyenda
+    plt.title('Comparativa: Campesinos vs Superficie por Cultivo',
+             fontsize=15, fontweight='bold', pad=20, color='#1a5490')
+
+    # Leyenda combinada
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper right', 
+              fontsize=10, framealpha=0.95, shadow=True)
+
+    ax1.grid(axis='y', alpha=0.3, linestyle='--', linewidth=1)
+    ax1.set_axisbelow(True)
+
+    fig.tight_layout()
+    plt.savefig(ruta_imagen, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close()
+
+
+# ==================== GRÁFICAS DE LA VENTANA DE ESTADÍSTICAS ====================
+
+def _figura(ancho: float, alto: float):
+    from matplotlib.figure import Figure
+    return Figure(figsize=(ancho, alto), dpi=100)
+
+
+def _grafica_pastel(datos: Dict, ruta_imagen: str):
+    """Gráfica de pastel"""
+    fig = _figura(5, 4)
+    ax = fig.add_subplot(111)
+
+    # Colores personalizados
+    colors = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D', '#6A994E', '#BC4B51']
+
+    ax.pie(datos['valores'], labels=datos['etiquetas'], autopct='%1.1f%%', startangle=90, colors=colors)
+    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
+    fig.savefig(ruta_imagen)
+
+
+def _grafica_barras(datos: Dict, ruta_imagen: str):
+    """Gráfica de barras vertical"""
+    fig = _figura(6, 4)
+    ax = fig.add_subplot(111)
+
+    ax.bar(datos['etiquetas'], datos['valores'], color='#2E86AB')
+    ax.set_title(datos['titulo'], fontsize=10)
+    ax.set_xlabel(datos['xlabel'], fontsize=9)
+    ax.set_ylabel(datos['ylabel'], fontsize=9)
+    ax.tick_params(axis='x', rotation=45, labelsize=8)
+
+    fig.tight_layout()
+    fig.savefig(ruta_imagen)
+
+
+def _grafica_barras_horizontal(datos: Dict, ruta_imagen: str):
+    """Gráfica de barras horizontal (ordenada de menor a mayor)"""
+    fig = _figura(6, 6)
+    ax = fig.add_subplot(111)
+
+    ordenados = sorted(zip(datos['etiquetas'], datos['valores']), key=lambda x: x[1])
+    ax.barh([k for k, v in ordenados], [v for k, v in ordenados], color='#6A994E')
+    ax.set_title(datos['titulo'], fontsize=10)
+    ax.set_xlabel(datos['xlabel'], fontsize=9)
+    ax.tick_params(axis='y', labelsize=8)
+
+    fig.tight_layout()
+    fig.savefig(ruta_imagen)
+
+
+# Tipo de gráfica -> función(datos, ruta_imagen). El proceso de trabajo las busca por nombre.
+RENDERIZADORES: Dict[str, Callable[[Dict, str], None]] = {
+    'barras_cultivos': _grafico_barras_cultivos_pro,
+    'dona_cultivos': _grafico_dona_cultivos_pro,
+    'comparativo_cultivos': _grafico_comparativo,
+    'pastel': _grafica_pastel,
+    'barras': _grafica_barras,
+    'barras_horizontal': _grafica_barras_horizontal,
+}
+
+
+# ==================== CACHÉ ====================
+
+def ruta_grafica(tipo: str, datos: Dict, directorio: str = None) -> str:
+    """Ruta de la imagen para estos datos (exista o no); datos debe ser serializable a JSON"""
+    contenido = json.dumps([VERSION_GRAFICAS, tipo, datos], sort_keys=True, ensure_ascii=False)
+    huella = hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:24]
+    return os.path.join(directorio or DIRECTORIO_GRAFICAS, f"{tipo}_{huella}.png")
+
+
+def renderizar(tipo: str, datos: Dict, directorio: str = None) -> str:
+    """Dibuja la gráfica si no está en caché. Se ejecuta en el proceso de trabajo."""
+    ruta = ruta_grafica(tipo, datos, directorio)
+    if os.path.exists(ruta):
+        return ruta
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+    # Escribir a un temporal y renombrar: nunca queda una imagen a medias en la caché
+    temporal = f"{ruta[:-4]}.{os.getpid()}.tmp.png"
+    try:
+        RENDERIZADORES[tipo](datos, temporal)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return ruta
+
+
+def _obtener_ejecutor() -> ProcessPoolExecutor:
+    global _ejecutor
+    with _lock:
+        if _ejecutor is None:
+            # spawn: un fork del proceso con Tk abierto no es seguro
+            _ejecutor = ProcessPoolExecutor(max_workers=1,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _ejecutor
+
+
+def _descartar_ejecutor():
+    global _ejecutor
+    with _lock:
+        if _ejecutor is not None:
+            _ejecutor.shutdown(wait=False, cancel_futures=True)
+        _ejecutor = None
+
+
+def obtener_grafica(tipo: str, datos: Dict, directorio: str = None) -> Future:
+    """
+    Future con la ruta de la imagen. Si ya está en caché el Future se entrega
+    resuelto y no se toca matplotlib; si no, se dibuja en el proceso de trabajo.
+    """
+    ruta = ruta_grafica(tipo, datos, directorio)
+    if os.path.exists(ruta):
+        os.utime(ruta)  # marca de uso para limpiar_cache
+        futuro = Future()
+        futuro.set_result(ruta)
+        return futuro
+    try:
+        return _obtener_ejecutor().submit(renderizar, tipo, datos, directorio)
+    except BrokenProcessPool:
+        # El proceso anterior murió (p.ej. se cerró a la fuerza): abrir otro
+        _descartar_ejecutor()
+        return _obtener_ejecutor().submit(renderizar, tipo, datos, directorio)
+
+
+def obtener_graficas(peticiones: List[Tuple[str, Dict]], directorio: str = None) -> List[str]:
+    """Rutas de varias gráficas; las faltantes se piden juntas y se espera a todas"""
+    futuros = [obtener_grafica(tipo, datos, directorio) for tipo, datos in peticiones]
+    rutas = [futuro.result() for futuro in futuros]
+    limpiar_cache(directorio=directorio)
+    return rutas
+
+
+def limpiar_cache(mantener: int = MAX_GRAFICAS_EN_CACHE, directorio: str = None) -> int:
+    """Borra las imágenes menos usadas por encima de 'mantener'; regresa cuántas borró"""
+    directorio = directorio or DIRECTORIO_GRAFICAS
+    if not os.path.exists(directorio):
+        return 0
+    imagenes = [os.path.join(directorio, n) for n in os.listdir(directorio)
+                if n.endswith('.png') and '.tmp.' not in n]
+    if len(imagenes) <= mantener:
+        return 0
+    imagenes.sort(key=os.path.getmtime, reverse=True)
+    eliminadas = 0
+    for ruta in imagenes[mantener:]:
+        try:
+            os.remove(ruta)
+            eliminadas += 1
+        except OSError:
+            pass
+    return eliminadas
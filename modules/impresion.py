@@ -0,0 +1,285 @@
+# modules/impresion.py - Cola de Impresión en Segundo Plano
+# La caja no espera a la impresora: los trabajos se envían desde un hilo propio
+import os
+import time
+import queue
+import atexit
+import platform
+import itertools
+import threading
+import subprocess
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+# Comando de impresión en Linux/macOS (CUPS); las pruebas lo sustituyen por uno falso
+COMANDO_LP = 'lp'
+TIEMPO_LIMITE_LP = 30
+
+# Reintentos: 1 s, 2 s, 4 s ...
+MAX_INTENTOS = 3
+ESPERA_INICIAL = 1.0
+FACTOR_ESPERA = 2.0
+
+# En Windows el visor abre el archivo después de ShellExecute; se borra más tarde
+ESPERA_BORRADO_WINDOWS = 10.0
+
+# PDFs temporales que quedaron de una sesión anterior (p.ej. el programa se
+# cerró antes de poder borrarlos) se eliminan al arrancar la cola
+ANTIGUEDAD_TEMPORALES = 3600.0
+
+# Estados de un trabajo
+EN_COLA = 'EN_COLA'
+IMPRIMIENDO = 'IMPRIMIENDO'
+REINTENTANDO = 'REINTENTANDO'
+COMPLETADO = 'COMPLETADO'
+FALLIDO = 'FALLIDO'
+
+
+def directorio_temporal() -> str:
+    """Carpeta de los recibos PDF temporales: /tmp (Mac/Linux) o %TEMP% (Windows)"""
+    if platform.system() == 'Windows':
+        return os.path.join(os.environ.get('TEMP', os.getcwd()), 'recibos_temp')
+    return os.path.join('/tmp', 'recibos_temp')
+
+
+def limpiar_temporales(directorio: str, antiguedad: float = ANTIGUEDAD_TEMPORALES) -> int:
+    """Elimina los PDF de la carpeta con más de `antiguedad` segundos; regresa cuántos"""
+    if not os.path.isdir(directorio):
+        return 0
+    limite = time.time() - antiguedad
+    eliminados = 0
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if not nombre.lower().endswith('.pdf'):
+            continue
+        try:
+            if os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+                eliminados += 1
+        except OSError:
+            pass  # Aún abierto en el visor: se intentará en el próximo arranque
+    if eliminados:
+        print(f"✓ {eliminados} recibos temporales anteriores eliminados")
+    return eliminados
+
+
+class ErrorImpresionPermanente(Exception):
+    """Error que no se corrige reintentando (p.ej. no hay CUPS instalado)"""
+
+
+class TrabajoImpresion:
+    """Un PDF en la cola; al_cambiar(trabajo) se llama en cada cambio de estado"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, ruta_pdf: str, impresora: Optional[str] = None,
+                 eliminar_al_terminar: bool = True,
+                 al_cambiar: Optional[Callable[['TrabajoImpresion'], None]] = None):
+        self.id = next(self._ids)
+        self.ruta_pdf = ruta_pdf
+        self.impresora = impresora or None
+        self.eliminar_al_terminar = eliminar_al_terminar
+        self.al_cambiar = al_cambiar
+        self.estado = EN_COLA
+        self.intentos = 0
+        self.error: Optional[str] = None
+        self.fecha_hora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._terminado = threading.Event()
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que el trabajo termine (completado o fallido)"""
+        return self._terminado.wait(timeout)
+
+    def __repr__(self):
+        return f"<TrabajoImpresion {self.id} {os.path.basename(self.ruta_pdf)} {self.estado}>"
+
+
+def enviar_a_impresora(ruta_pdf: str, impresora: Optional[str] = None):
+    """Envía un PDF a la impresora; lanza excepción si el sistema lo rechaza"""
+    if not os.path.exists(ruta_pdf):
+        raise ErrorImpresionPermanente(f"El archivo PDF no existe: {ruta_pdf}")
+
+    if platform.system() == 'Windows':
+        try:
+            import win32api
+            win32api.ShellExecute(0, "print", ruta_pdf, None, ".", 0)
+        except ImportError:
+            os.startfile(ruta_pdf, "print")
+        return
+
+    cmd = [COMANDO_LP] + (['-d', impresora] if impresora else []) + [ruta_pdf]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, timeout=TIEMPO_LIMITE_LP)
+    except FileNotFoundError:
+        raise ErrorImpresionPermanente(
+            f"Comando '{COMANDO_LP}' no encontrado. Verifique la instalación de CUPS.")
+
+
+class ColaImpresion:
+    """
+    Cola FIFO de trabajos de impresión atendida por un hilo de fondo.
+
+    - Cada trabajo se reintenta hasta max_intentos con espera exponencial.
+    - Al terminar (bien o mal) se borra el PDF si es temporal. En Windows el
+      borrado se pospone espera_borrado segundos y lo hace el mismo hilo de
+      la cola; lo que quede al salir se limpia al arrancar la siguiente vez
+      (limpiar_temporales sobre directorio_temporal).
+    - El callback del trabajo se invoca desde el hilo de la cola; la UI debe
+      pasar el aviso a Tk con after().
+    """
+
+    def __init__(self, enviar: Callable = None, max_intentos: int = MAX_INTENTOS,
+                 espera_inicial: float = ESPERA_INICIAL, factor: float = FACTOR_ESPERA,
+                 espera_borrado: Optional[float] = None,
+                 directorio_temporal: Optional[str] = None):
+        self.enviar = enviar or enviar_a_impresora
+        self.max_intentos = max_intentos
+        self.espera_inicial = espera_inicial
+        self.factor = factor
+        if espera_borrado is None:
+            espera_borrado = ESPERA_BORRADO_WINDOWS if platform.system() == 'Windows' else 0.0
+        self.espera_borrado = espera_borrado
+        self.directorio_temporal = directorio_temporal
+        self._cola: 'queue.Queue[TrabajoImpresion]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        self._por_borrar: List[Tuple[float, str]] = []  # (momento, ruta)
+
+    def encolar(self, ruta_pdf: str, impresora: Optional[str] = None,
+                eliminar_al_terminar: bool = True,
+                al_cambiar: Optional[Callable[[TrabajoImpresion], None]] = None) -> TrabajoImpresion:
+        """Agrega un PDF a la cola y regresa de inmediato"""
+        trabajo = TrabajoImpresion(ruta_pdf, impresora, eliminar_al_terminar, al_cambiar)
+        self._cola.put(trabajo)
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._trabajar, name='impresion', daemon=True)
+                self._hilo.start()
+        self._notificar(trabajo)
+        return trabajo
+
+    def pendientes(self) -> int:
+        return self._cola.unfinished_tasks
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que la cola quede vacía; False si se agotó el tiempo"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._cola.unfinished_tasks:
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(0.05)
+        return True
+
+    # ---------- Hilo de la cola ----------
+
+    def _trabajar(self):
+        if self.directorio_temporal:
+            limpiar_temporales(self.directorio_temporal)
+        while True:
+            try:
+                trabajo = self._cola.get(timeout=self._espera_siguiente_borrado())
+            except queue.Empty:
+                self.borrar_pendientes()
+                continue
+            try:
+                self._procesar(trabajo)
+            finally:
+                self._cola.task_done()
+            self.borrar_pendientes()
+
+    def _espera_siguiente_borrado(self) -> Optional[float]:
+        with self._lock:
+            if not self._por_borrar:
+                return None
+            return max(0.0, min(momento for momento, _ in self._por_borrar) - time.monotonic())
+
+    def borrar_pendientes(self, todos: bool = False):
+        """Borra los temporales cuya espera ya pasó (o todos, al salir)"""
+        ahora = time.monotonic()
+        with self._lock:
+            vencidos = [ruta for momento, ruta in self._por_borrar if todos or momento <= ahora]
+            self._por_borrar = [(m, r) for m, r in self._por_borrar if not (todos or m <= ahora)]
+        for ruta in vencidos:
+            self._borrar(ruta)
+
+    def _procesar(self, trabajo: TrabajoImpresion):
+        espera = self.espera_inicial
+        while True:
+            trabajo.intentos += 1
+            self._cambiar_estado(trabajo, IMPRIMIENDO)
+            try:
+                self.enviar(trabajo.ruta_pdf, trabajo.impresora)
+            except ErrorImpresionPermanente as e:
+                trabajo.error = str(e)
+                break
+            except Exception as e:
+                trabajo.error = str(e)
+                if trabajo.intentos >= self.max_intentos:
+                    break
+                print(f"Impresión de {os.path.basename(trabajo.ruta_pdf)} falló "
+                      f"(intento {trabajo.intentos}), reintentando en {espera:.0f} s: {e}")
+                self._cambiar_estado(trabajo, REINTENTANDO)
+                time.sleep(espera)
+                espera *= self.factor
+            else:
+                trabajo.error = None
+                break
+
+        if trabajo.eliminar_al_terminar:
+            self._eliminar_temporal(trabajo.ruta_pdf)
+
+        if trabajo.error:
+            print(f"Error al imprimir {trabajo.ruta_pdf}: {trabajo.error}")
+            self._cambiar_estado(trabajo, FALLIDO)
+        else:
+            print(f"PDF enviado a impresión: {trabajo.ruta_pdf}")
+            self._cambiar_estado(trabajo, COMPLETADO)
+        trabajo._terminado.set()
+
+    def _cambiar_estado(self, trabajo: TrabajoImpresion, estado: str):
+        trabajo.estado = estado
+        self._notificar(trabajo)
+
+    def _notificar(self, trabajo: TrabajoImpresion):
+        if trabajo.al_cambiar is None:
+            return
+        try:
+            trabajo.al_cambiar(trabajo)
+        except Exception as e:
+            print(f"Error en aviso de impresión: {e}")
+
+    def _eliminar_temporal(self, ruta_pdf: str):
+        if self.espera_borrado > 0:
+            # El visor de Windows aún puede estar leyendo el archivo
+            with self._lock:
+                self._por_borrar.append((time.monotonic() + self.espera_borrado, ruta_pdf))
+        else:
+            # lp copia el archivo al spool antes de regresar
+            self._borrar(ruta_pdf)
+
+    @staticmethod
+    def _borrar(ruta_pdf: str):
+        try:
+            os.remove(ruta_pdf)
+            print(f"Archivo temporal eliminado: {ruta_pdf}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error al eliminar archivo temporal {ruta_pdf}: {e}")
+
+
+_cola = ColaImpresion(directorio_temporal=directorio_temporal())
+
+
+def obtener_cola_impresion() -> ColaImpresion:
+    """Cola compartida por todas las ventanas"""
+    return _cola
+
+
+@atexit.register
+def _esperar_al_salir():
+    # Dar unos segundos a los recibos que aún no llegan a la impresora
+    if _cola.pendientes():
+        _cola.esperar(timeout=10)
+    # Lo que no se pueda borrar aún lo limpia el próximo arranque
+    _cola.borrar_pendientes(todos=True)
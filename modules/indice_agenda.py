@@ -0,0 +1,98 @@
+# modules/indice_agenda.py - Índice en Memoria para la Agenda
+# Búsqueda mientras se escribe sin consultar la BD en cada tecla
+import re
+from typing import Dict, List, Optional, Tuple
+
+from modules import models
+
+_NUMERO = re.compile(r'\d+')
+
+# Lotes sin número van al final
+SIN_NUMERO = float('inf')
+
+
+def clave_orden_lote(numero_lote) -> Tuple:
+    """Clave de orden por el número contenido en el lote (ej: '12-A' -> 12)"""
+    texto = str(numero_lote)
+    coincidencia = _NUMERO.search(texto)
+    return (int(coincidencia.group()) if coincidencia else SIN_NUMERO, texto)
+
+
+class IndiceAgenda:
+    """
+    Padrón de campesinos activos normalizado una sola vez (sin acentos,
+    minúsculas) y ordenado por lote.
+
+    - Se recarga sólo cuando cambia models.version_campesinos() o la BD.
+    - Si el término nuevo extiende al anterior (el usuario sigue escribiendo),
+      se filtra sobre los resultados previos en lugar de todo el padrón.
+    """
+
+    def __init__(self):
+        self._entradas: Optional[List[Tuple[str, Dict]]] = None
+        self._version = None
+        self._ruta_bd = None
+        self._ultimo_termino = ''
+        self._ultimos: List[Tuple[str, Dict]] = []
+
+    def _vigente(self) -> bool:
+        return (self._entradas is not None
+                and self._ruta_bd == models.DB_PATH
+                and self._version == models.version_campesinos())
+
+    def cargar(self):
+        """Lee y normaliza el padrón completo"""
+        version = models.version_campesinos()
+        campesinos = models.obtener_todos_campesinos()
+        campesinos.sort(key=lambda c: (clave_orden_lote(c['numero_lote']), c['nombre']))
+
+        self._entradas = [
+            (models.normalizar_texto_busqueda(
+                f"{c['nombre']} {c['numero_lote']} {c['barrio'] or ''}"), c)
+            for c in campesinos
+        ]
+        self._version = version
+        self._ruta_bd = models.DB_PATH
+        self._ultimo_termino = ''
+        self._ultimos = self._entradas
+
+    def invalidar(self):
+        self._entradas = None
+
+    def _asegurar_cargado(self):
+        if not self._vigente():
+            self.cargar()
+
+    def todos(self) -> List[Dict]:
+        """Todos los campesinos activos ordenados por lote"""
+        self._asegurar_cargado()
+        return [c for _, c in self._entradas]
+
+    def buscar(self, termino: str) -> List[Dict]:
+        """
+        Campesinos cuyo nombre, lote o barrio contienen todas las palabras del
+        término (sin distinguir acentos), en orden de lote.
+        """
+        self._asegurar_cargado()
+        termino = models.normalizar_texto_busqueda(termino)
+        if not termino:
+            self._ultimo_termino = ''
+            self._ultimos = self._entradas
+            return self.todos()
+
+        # Cada palabra del término anterior sigue contenida en el nuevo
+        base = self._ultimos if termino.startswith(self._ultimo_termino) else self._entradas
+        palabras = termino.split()
+        resultados = [e for e in base if all(p in e[0] for p in palabras)]
+
+        self._ultimo_termino = termino
+        self._ultimos = resultados
+        return [c for _, c in resultados]
+
+
+_indice = IndiceAgenda()
+
+
+def obtener_indice_agenda() -> IndiceAgenda:
+    """Índice compartido por las ventanas de agenda"""
+    return _indice
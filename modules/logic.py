@@ -1,16 +1,16 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
-import shutil
 import os
 
 from modules.models import (
     obtener_configuracion, actualizar_configuracion,
     obtener_siembra_activa, crear_siembra, cerrar_siembra,
-    incrementar_riegos, crear_recibo, registrar_auditoria,
-    obtener_campesino_por_id, obtener_recibos_dia, DB_PATH,
+    incrementar_riegos, crear_recibo, crear_recibos, registrar_auditoria,
+    obtener_campesino_por_id, obtener_recibos_dia, obtener_resumen_dia,
     actualizar_siembra, eliminar_siembra, decrementar_riegos,
     obtener_siembra_por_id, actualizar_recibo, eliminar_recibo as eliminar_recibo_db,
-    obtener_recibo_por_id  
+    obtener_recibo_por_id, transaccion,
+    consultar_folio, reservar_folio, liberar_folio, fijar_folio
 )
 
 # ==================== CÁLCULOS ====================
@@ -158,23 +158,15 @@ def validar_recibo(datos: Dict) -> Tuple[bool, str]:
 
 def obtener_folio_actual() -> int:
 
-    """Obtiene el folio actual del sistema"""
+    """Obtiene el folio actual del sistema (el siguiente que se emitirá)"""
 
-    folio_str = obtener_configuracion('folio_actual') or '1'
-
-    return int(folio_str)
+    return consultar_folio()
 
 def incrementar_folio() -> int:
 
-    """Incrementa el folio y devuelve el nuevo valor"""
-
-    folio_actual = obtener_folio_actual()
-
-    nuevo_folio = folio_actual + 1
+    """Reserva el folio actual de forma atómica y devuelve el folio reservado"""
 
-    actualizar_configuracion('folio_actual', str(nuevo_folio))
-
-    return folio_actual
+    return reservar_folio()
 
 def reiniciar_folios_y_ciclo(nuevo_ciclo: str) -> bool:
 
@@ -188,7 +180,7 @@ def reiniciar_folios_y_ciclo(nuevo_ciclo: str) -> bool:
         crear_backup(f"Reinicio de ciclo - {nuevo_ciclo}")
 
         # Solo actualizar el folio actual y el ciclo
-        actualizar_configuracion('folio_actual', '1')
+        fijar_folio(1)
 
         actualizar_configuracion('ciclo_actual', nuevo_ciclo)
 
@@ -216,11 +208,7 @@ def actualizar_folio_actual(nuevo_folio: int) -> bool:
 
     try:
 
-        if nuevo_folio < 1:
-
-            raise ValueError("El folio debe ser un número entero positivo.")
-
-        actualizar_configuracion('folio_actual', str(nuevo_folio))
+        fijar_folio(nuevo_folio)
 
         registrar_auditoria(
 
@@ -242,144 +230,112 @@ def actualizar_folio_actual(nuevo_folio: int) -> bool:
 
 # ==================== OPERACIONES DE VENTA ====================
 
-def nueva_siembra(campesino_id: int, cultivo: str, cantidad: int = 1) -> Dict:
+def _registrar_recibos_venta(campesino: Dict, siembra: Dict, cantidad: int,
+                             primer_tipo_accion: str, ciclo: str) -> Dict:
     """
-    Inicia una nueva siembra para un campesino.
-    Si cantidad > 1, genera múltiples recibos con el MISMO folio.
+    Registra los recibos de una venta dentro de la transacción abierta.
+    Los números de riego se calculan a partir del contador leído una sola vez.
     """
-    campesino = obtener_campesino_por_id(campesino_id)
-    if not campesino:
-        raise ValueError("Campesino no encontrado")
-
-    siembra_anterior = obtener_siembra_activa(campesino_id)
-    if siembra_anterior:
-        cerrar_siembra(siembra_anterior['id'])
-
-    if cantidad < 1 or cantidad > 25:
-        raise ValueError("La cantidad de riegos debe estar entre 1 y 25")
+    # Un solo folio para todos los riegos de la venta
+    folio_actual = reservar_folio()
+    costo_unitario = calcular_costo(campesino['superficie'], siembra['cultivo'])
+    ahora = datetime.now()
+    fecha = ahora.strftime('%Y-%m-%d')
+    hora = ahora.strftime('%H:%M:%S')
+    riegos_previos = siembra['numero_riegos'] or 0
 
-    ciclo_actual = obtener_configuracion('ciclo_actual') or 'SIN CICLO'
-    siembra_id = crear_siembra(campesino_id, cultivo, ciclo_actual)
-    
-    folio_actual = obtener_folio_actual()
-    recibos_ids = []
-    costo_unitario = calcular_costo(campesino['superficie'], cultivo)
-    costo_total = costo_unitario * cantidad
-    
-    for i in range(cantidad):
-        # El primer riego es "Nueva siembra", los siguientes "Riego adicional"
-        # O podemos poner "Nueva siembra" a todos, o "Riego X"
-        # Para consistencia con el reporte, lo importante es el numero_riego
-        
-        # Incrementar riegos en la siembra
-        incrementar_riegos(siembra_id)
-        
-        # Obtener el número de riego actualizado (debería ser i+1)
-        siembra_actualizada = obtener_siembra_por_id(siembra_id)
-        numero_riego = siembra_actualizada['numero_riegos']
-        
-        tipo_accion = "Nueva siembra" if i == 0 else "Riego adicional"
-        
-        datos_recibo = {
+    recibos = [
+        {
             'folio': folio_actual,
-            'fecha': datetime.now().strftime('%Y-%m-%d'),
-            'hora': datetime.now().strftime('%H:%M:%S'),
+            'fecha': fecha,
+            'hora': hora,
             'campesino_id': campesino['id'],
-            'siembra_id': siembra_id,
-            'cultivo': cultivo,
-            'numero_riego': numero_riego,
-            'tipo_accion': tipo_accion,
+            'siembra_id': siembra['id'],
+            'cultivo': siembra['cultivo'],
+            'numero_riego': riegos_previos + i + 1,
+            'tipo_accion': primer_tipo_accion if i == 0 else "Riego adicional",
             'costo': costo_unitario,
-            'ciclo': ciclo_actual
+            'ciclo': ciclo
         }
-        
-        recibo_id = crear_recibo(datos_recibo)
-        recibos_ids.append(recibo_id)
+        for i in range(cantidad)
+    ]
 
-    incrementar_folio()
-
-    registrar_auditoria(
-        'NUEVA_SIEMBRA',
-        f"Nueva siembra ({cantidad} riegos): {campesino['nombre']} - {cultivo} - Folio {folio_actual}",
-        None
-    )
+    incrementar_riegos(siembra['id'], cantidad)
+    recibos_ids = crear_recibos(recibos)
 
+    costo_total = costo_unitario * cantidad
     return {
-        'recibo_ids': recibos_ids,
-        'recibo_id': recibos_ids[0],
-        'siembra_id': siembra_id,
+        'recibo_ids': recibos_ids, # Lista de IDs
+        'recibo_id': recibos_ids[0], # Para compatibilidad
+        'siembra_id': siembra['id'],
         'folio': folio_actual,
         'cantidad': cantidad,
         'costo_total': costo_total,
-        'costo': costo_total
+        'costo': costo_total # Para compatibilidad
     }
 
-def vender_riego(campesino_id: int, cantidad: int = 1) -> Dict:
+def nueva_siembra(campesino_id: int, cultivo: str, cantidad: int = 1) -> Dict:
     """
-    Vende uno o más riegos adicionales a un campesino con siembra activa.
+    Inicia una nueva siembra para un campesino.
     Si cantidad > 1, genera múltiples recibos con el MISMO folio.
+    Todo (cierre de la siembra anterior, recibos, folio y auditoría) ocurre
+    en una sola transacción: si algo falla no queda ningún recibo a medias.
     """
-    campesino = obtener_campesino_por_id(campesino_id)
-    if not campesino:
-        raise ValueError("Campesino no encontrado")
+    if cantidad < 1 or cantidad > 25:
+        raise ValueError("La cantidad de riegos debe estar entre 1 y 25")
 
-    siembra_activa = obtener_siembra_activa(campesino_id)
-    if not siembra_activa:
-        raise ValueError("El campesino no tiene siembra activa. Debe iniciar una nueva siembra primero.")
+    with transaccion():
+        campesino = obtener_campesino_por_id(campesino_id)
+        if not campesino:
+            raise ValueError("Campesino no encontrado")
+
+        siembra_anterior = obtener_siembra_activa(campesino_id)
+        if siembra_anterior:
+            cerrar_siembra(siembra_anterior['id'])
+
+        ciclo_actual = obtener_configuracion('ciclo_actual') or 'SIN CICLO'
+        siembra_id = crear_siembra(campesino_id, cultivo, ciclo_actual)
+        siembra = {'id': siembra_id, 'cultivo': cultivo, 'numero_riegos': 0}
+
+        venta = _registrar_recibos_venta(campesino, siembra, cantidad, "Nueva siembra", ciclo_actual)
+
+        registrar_auditoria(
+            'NUEVA_SIEMBRA',
+            f"Nueva siembra ({cantidad} riegos): {campesino['nombre']} - {cultivo} - Folio {venta['folio']}",
+            None
+        )
 
+    return venta
+
+def vender_riego(campesino_id: int, cantidad: int = 1) -> Dict:
+    """
+    Vende uno o más riegos adicionales a un campesino con siembra activa.
+    Si cantidad > 1, genera múltiples recibos con el MISMO folio.
+    La venta completa se registra en una sola transacción.
+    """
     if cantidad < 1 or cantidad > 25:
         raise ValueError("La cantidad de riegos debe estar entre 1 y 25")
 
-    ciclo_actual = obtener_configuracion('ciclo_actual') or 'SIN CICLO'
-    folio_actual = obtener_folio_actual()
-    
-    recibos_ids = []
-    costo_unitario = calcular_costo(campesino['superficie'], siembra_activa['cultivo'])
-    costo_total = costo_unitario * cantidad
-    
-    # Generar los recibos (uno por cada riego)
-    for i in range(cantidad):
-        # Incrementar riegos en la siembra (para obtener el número correcto)
-        incrementar_riegos(siembra_activa['id'])
-        
-        # Obtener el número de riego actualizado
-        siembra_actualizada = obtener_siembra_por_id(siembra_activa['id'])
-        numero_riego = siembra_actualizada['numero_riegos']
-        
-        datos_recibo = {
-            'folio': folio_actual,
-            'fecha': datetime.now().strftime('%Y-%m-%d'),
-            'hora': datetime.now().strftime('%H:%M:%S'),
-            'campesino_id': campesino['id'],
-            'siembra_id': siembra_activa['id'],
-            'cultivo': siembra_activa['cultivo'],
-            'numero_riego': numero_riego,
-            'tipo_accion': "Riego adicional",
-            'costo': costo_unitario,
-            'ciclo': ciclo_actual
-        }
-        
-        recibo_id = crear_recibo(datos_recibo)
-        recibos_ids.append(recibo_id)
+    with transaccion():
+        campesino = obtener_campesino_por_id(campesino_id)
+        if not campesino:
+            raise ValueError("Campesino no encontrado")
 
-    # Incrementar el folio GLOBAL una sola vez por transacción
-    incrementar_folio()
+        siembra_activa = obtener_siembra_activa(campesino_id)
+        if not siembra_activa:
+            raise ValueError("El campesino no tiene siembra activa. Debe iniciar una nueva siembra primero.")
 
-    registrar_auditoria(
-        'VENTA_RIEGO',
-        f"Venta de {cantidad} riegos: {campesino['nombre']} - Folio {folio_actual}",
-        None
-    )
+        ciclo_actual = obtener_configuracion('ciclo_actual') or 'SIN CICLO'
 
-    return {
-        'recibo_ids': recibos_ids, # Lista de IDs
-        'recibo_id': recibos_ids[0], # Para compatibilidad
-        'siembra_id': siembra_activa['id'],
-        'folio': folio_actual,
-        'cantidad': cantidad,
-        'costo_total': costo_total,
-        'costo': costo_total # Para compatibilidad
-    }
+        venta = _registrar_recibos_venta(campesino, siembra_activa, cantidad, "Riego adicional", ciclo_actual)
+
+        registrar_auditoria(
+            'VENTA_RIEGO',
+            f"Venta de {cantidad} riegos: {campesino['nombre']} - Folio {venta['folio']}",
+            None
+        )
+
+    return venta
 
 def _generar_datos_recibo(campesino: Dict, siembra_id: int, cultivo: str, numero_riego: int, tipo_accion: str, ciclo: str) -> Dict:
 
@@ -429,11 +385,7 @@ def calcular_total_dia(fecha: Optional[str] = None) -> float:
 
         fecha = datetime.now().strftime('%Y-%m-%d')
 
-    recibos = obtener_recibos_dia(fecha)
-
-    total = sum(r['costo'] for r in recibos)
-
-    return total
+    return obtener_resumen_dia(fecha)['total']
 
 def eliminar_recibo_dia(recibo_id: int, motivo: str = "") -> float:
     """
@@ -498,19 +450,16 @@ def eliminar_recibo_dia(recibo_id: int, motivo: str = "") -> float:
                 f"Campesino: {recibo['nombre']}. Motivo: {motivo}"
             )
     
-    # ===== VERIFICAR SI ES EL ÚLTIMO RECIBO =====
     folio_actual = obtener_folio_actual()
-    es_ultimo_recibo = (recibo['folio'] == folio_actual - 1)
     
     # Eliminar el recibo (marcarlo como eliminado en la BD)
     eliminar_recibo_db(recibo_id, motivo)
     
-    # ===== DECREMENTAR FOLIO SI ES EL ÚLTIMO =====
-    if es_ultimo_recibo:
-        nuevo_folio = decrementar_folio()
-        mensaje_auditoria += f" | Folio decrementado de {folio_actual} a {nuevo_folio}."
+    # ===== DEVOLVER EL FOLIO SI ES EL ÚLTIMO (reglas en liberar_folio) =====
+    if liberar_folio(recibo['folio'], recibo['fecha']):
+        mensaje_auditoria += f" | Folio decrementado de {folio_actual} a {recibo['folio']}."
     else:
-        mensaje_auditoria += f" | Folio NO decrementado (no era el más reciente)."
+        mensaje_auditoria += f" | Folio NO decrementado (no era el más reciente o sigue en uso)."
     
     # Registrar en auditoría
     registrar_auditoria('RECIBO_ELIMINADO', mensaje_auditoria, None)
@@ -519,18 +468,14 @@ def eliminar_recibo_dia(recibo_id: int, motivo: str = "") -> float:
 
 def decrementar_folio() -> int:
     """
-    Decrementa el folio actual en 1 (usado al eliminar el último recibo).
+    Devuelve a la secuencia el último folio emitido (usado al eliminar el último recibo).
     No permite que el folio baje de 1.
     """
     folio_actual = obtener_folio_actual()
-    
-    if folio_actual > 1:
-        nuevo_folio = folio_actual - 1
-        actualizar_configuracion('folio_actual', str(nuevo_folio))
-        return nuevo_folio
-    else:
-        # Si ya está en 1, mantenerlo
-        return 1
+    fecha_hoy = datetime.now().strftime('%Y-%m-%d')
+    if liberar_folio(folio_actual - 1, fecha_hoy):
+        return folio_actual - 1
+    return folio_actual
 
 def cerrar_dia() -> Dict:
 
@@ -540,7 +485,7 @@ def cerrar_dia() -> Dict:
 
     recibos = obtener_recibos_dia(fecha_hoy)
 
-    total = calcular_total_dia(fecha_hoy)
+    total = obtener_resumen_dia(fecha_hoy)['total']
 
     actualizar_configuracion('fecha_ultimo_cierre', fecha_hoy)
 
@@ -568,30 +513,25 @@ def cerrar_dia() -> Dict:
 
 # ==================== BACKUPS ====================
 
-def crear_backup(motivo: str) -> str:
+def crear_backup(motivo: str) -> list:
+
+    """
+    Crea un respaldo comprimido de riego.db y cuotas.db con la API de backup
+    de SQLite (consistente aunque haya ventas en curso) y su manifiesto.
+    """
 
-    """Crea un backup de la base de datos"""
+    from modules import models
+    from modules.cuotas import CUOTAS_DB_PATH
+    from modules.respaldos import crear_respaldo
 
     try:
-        backup_dir = os.path.join('database', 'backups')
-        os.makedirs(backup_dir, exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        backups_generados = []
+        # Que el respaldo incluya los eventos de auditoría aún en cola
+        models.vaciar_auditoria()
 
-        # Backup Riego
-        backup_filename = f"riego_backup_{timestamp}.db"
-        backup_path = os.path.join(backup_dir, backup_filename)
-        shutil.copy2(DB_PATH, backup_path)
-        backups_generados.append(backup_path)
-        
-        # Backup Cuotas
-        from modules.cuotas import CUOTAS_DB_PATH
-        if os.path.exists(CUOTAS_DB_PATH):
-            backup_cuotas_filename = f"cuotas_backup_{timestamp}.db"
-            backup_cuotas_path = os.path.join(backup_dir, backup_cuotas_filename)
-            shutil.copy2(CUOTAS_DB_PATH, backup_cuotas_path)
-            backups_generados.append(backup_cuotas_path)
+        backups_generados = crear_respaldo(
+            {'riego': models.DB_PATH, 'cuotas': CUOTAS_DB_PATH},
+            motivo
+        )
 
         registrar_auditoria(
             'BACKUP_CREADO',
@@ -609,42 +549,13 @@ def crear_backup(motivo: str) -> str:
 
 def limpiar_backups_antiguos(mantener: int = 10):
 
-    """Mantiene solo los últimos N backups"""
-
-    try:
-
-        backup_dir = os.path.join('database', 'backups')
-
-        if not os.path.exists(backup_dir):
-
-            return
-
-        backups = []
+    """Mantiene solo los últimos N respaldos (riego y cuotas)"""
 
-        for filename in os.listdir(backup_dir):
-
-            if filename.startswith('riego_backup_') and filename.endswith('.db'):
-
-                filepath = os.path.join(backup_dir, filename)
-
-                backups.append((filepath, os.path.getmtime(filepath)))
-
-        backups.sort(key=lambda x: x[1], reverse=True)
-
-        for backup_path, _ in backups[mantener:]:
-
-            try:
-
-                os.remove(backup_path)
-
-                print(f"Backup antiguo eliminado: {os.path.basename(backup_path)}")
-
-            except:
-
-                pass
+    from modules.respaldos import limpiar_respaldos
 
+    try:
+        limpiar_respaldos(mantener)
     except Exception as e:
-
         print(f"Error al limpiar backups: {e}")
 
 # ==================== CAMBIO DE CULTIVO ====================
@@ -751,6 +662,10 @@ def crear_riego_manual(campesino_id: int, siembra_id: int, folio: int, fecha: st
 
 # ==================== BÚSQUEDA Y FILTROS ====================
 
+def dia_siguiente(fecha: str) -> str:
+    """'YYYY-MM-DD' del día posterior a fecha (acepta también 'YYYY-MM-DD HH:MM:SS')"""
+    return (datetime.strptime(fecha[:10], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
 def buscar_recibos_avanzado(filtros: Dict) -> list:
 
     """Búsqueda avanzada de recibos con múltiples filtros"""
@@ -783,9 +698,11 @@ def buscar_recibos_avanzado(filtros: Dict) -> list:
 
     if filtros.get('fecha_fin'):
 
-        query += ' AND r.fecha <= ?'
+        # Rango semiabierto: hasta antes del día siguiente a fecha_fin (inclusive)
+
+        query += ' AND r.fecha < ?'
 
-        params.append(filtros['fecha_fin'])
+        params.append(dia_siguiente(filtros['fecha_fin']))
 
     if filtros.get('cultivo'):
 
@@ -811,9 +728,9 @@ def buscar_recibos_avanzado(filtros: Dict) -> list:
 
     query += ' ORDER BY r.fecha DESC, r.hora DESC'
 
-    limite = filtros.get('limite', 100)
+    query += ' LIMIT ?'
 
-    query += f' LIMIT {limite}'
+    params.append(int(filtros.get('limite', 100)))
 
     cursor.execute(query, params)
 
@@ -829,9 +746,10 @@ def generar_archivo_auditoria() -> str:
     import csv
     from datetime import datetime
     import os
-    from modules.models import get_connection
+    from modules.models import get_connection, vaciar_auditoria
     
     try:
+        vaciar_auditoria()
         conn = get_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM auditoria ORDER BY fecha_hora DESC')
@@ -3,32 +3,51 @@
 import sqlite3
 import os
 import json
-import pandas as pd
-import chardet
+import atexit
+import threading
 from datetime import datetime
 from typing import Optional, List, Dict, Tuple
-from modules.cuotas import actualizar_datos_campesino_en_cuotas
+from modules.cuotas import actualizar_datos_campesino_en_cuotas, recalcular_cuotas_pendientes
+from modules.conexion import crear_gestor
+from modules.auditoria import EscritorAuditoria
 # Ruta de la base de datos
 DB_PATH = os.path.join('database', 'riego.db')
+# Nombre de la secuencia del folio de recibos de riego
+SECUENCIA_FOLIO = 'folio_recibos'
+SECUENCIA_VERSION_CAMPESINOS = 'version_campesinos'
+# Versión del esquema de riego.db (PRAGMA user_version). Subirla al agregar
+# tablas, índices o migraciones a init_db: con la base al día init_db no hace nada
+VERSION_ESQUEMA = 1
+# Conexión persistente por hilo (ver modules/conexion.py)
+_gestor_riego = crear_gestor(lambda: DB_PATH)
+# Auditoría por lotes; el diario de respaldo vive junto a riego.db
+_escritor_auditoria = EscritorAuditoria(
+    _gestor_riego,
+    lambda: os.path.join(os.path.dirname(DB_PATH), 'auditoria_pendiente.jsonl')
+)
+atexit.register(lambda: _escritor_auditoria.vaciar())
+
 def get_connection():
-    """Obtiene una conexión a la base de datos con mejor manejo de timeouts"""
-    os.makedirs('database', exist_ok=True)
-    
-    # Crear conexión con timeout más alto y modo journal
-    conn = sqlite3.connect(DB_PATH, timeout=10.0)  # 10 segundos de timeout
-    conn.row_factory = sqlite3.Row
-    
-    # Configurar para evitar bloqueos
-    conn.isolation_level = None  # Autocommit mode para mejor concurrencia
-    conn.execute("PRAGMA journal_mode = WAL")  # Write-Ahead Logging
-    conn.execute("PRAGMA busy_timeout = 10000")  # 10 segundos en modo busy
-    conn.execute("PRAGMA synchronous = NORMAL")  # Mejor rendimiento
-    
-    return conn
+    """
+    Obtiene la conexión compartida a riego.db del hilo actual.
+    Los PRAGMA (WAL, busy_timeout, synchronous) se aplican una sola vez al abrirla;
+    llamar a close() sobre ella no la cierra.
+    """
+    return _gestor_riego.obtener()
+
+def transaccion():
+    """Context manager: ejecuta varias operaciones de riego.db en una sola transacción"""
+    return _gestor_riego.transaccion()
 
 def init_db():
-    """Inicializa la base de datos con todas las tablas necesarias"""
+    """
+    Inicializa la base de datos con todas las tablas necesarias y aplica las
+    migraciones. Si PRAGMA user_version ya es VERSION_ESQUEMA no hace nada.
+    """
     conn = get_connection()
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= VERSION_ESQUEMA:
+        invalidar_cache_configuracion()
+        return
     cursor = conn.cursor()
     # Tabla campesinos
     cursor.execute('''
@@ -102,6 +121,14 @@ def init_db():
             datos_previos TEXT
         )
     ''')
+    # evento_id (uuid): identifica cada evento al recuperarlo del diario
+    cursor.execute("PRAGMA table_info(auditoria)")
+    if 'evento_id' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE auditoria ADD COLUMN evento_id TEXT')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_auditoria_evento
+        ON auditoria(evento_id) WHERE evento_id IS NOT NULL
+    ''')
     # Crear índices
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_campesino_lote ON campesinos(numero_lote)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_campesino_nombre ON campesinos(nombre)')
@@ -109,7 +136,16 @@ def init_db():
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_recibo_folio ON recibos(folio)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_siembra_activa ON siembras(activa)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_siembra_campesino ON siembras(campesino_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_recibo_eliminado ON recibos(eliminado)')
+    # Índices parciales sobre recibos activos: las consultas de caja, reportes y
+    # estadísticas siempre filtran eliminado = 0 junto con la fecha o el ciclo
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_recibo_activo_fecha ON recibos(fecha, hora) WHERE eliminado = 0')
+    # costo y eliminado en el índice: SUM(costo) del ciclo se responde sin leer la tabla
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_recibo_activo_ciclo ON recibos(ciclo, costo, eliminado) WHERE eliminado = 0')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_recibo_campesino ON recibos(campesino_id, fecha, hora)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_recibo_siembra ON recibos(siembra_id)')
+    # Casi todos los recibos tienen eliminado = 0; este índice llevaba al
+    # planificador a recorrer la tabla completa en lugar de usar la fecha
+    cursor.execute('DROP INDEX IF EXISTS idx_recibo_eliminado')
     
     # Tabla de contactos de correo
     cursor.execute('''
@@ -121,9 +157,16 @@ def init_db():
         )
     ''')
     
+    # Secuencias atómicas (folio de recibos de riego)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS secuencias (
+            nombre TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL CHECK(valor >= 1)
+        )
+    ''')
+    
     # Insertar configuración por defecto
     configuracion_default = {
-        'folio_actual': '1',
         'ciclo_actual': 'OCTUBRE 2025',
         'nombre_oficina': 'ASOCIACION DE USUARIOS DE LA SECCION 14 EL BEXHA, A.C.',
         'tarifa_hectarea': '450',
@@ -137,8 +180,68 @@ def init_db():
             INSERT OR IGNORE INTO configuracion (clave, valor) 
             VALUES (?, ?)
         ''', (clave, valor))
+    
+    # Migración: el folio vivía como texto en configuracion('folio_actual')
+    cursor.execute('''
+        INSERT OR IGNORE INTO secuencias (nombre, valor)
+        VALUES (?, COALESCE(
+            (SELECT MAX(CAST(valor AS INTEGER), 1) FROM configuracion WHERE clave = 'folio_actual'),
+            1
+        ))
+    ''', (SECUENCIA_FOLIO,))
+    cursor.execute("DELETE FROM configuracion WHERE clave = 'folio_actual'")
+    
+    # Versión del padrón: cualquier alta/cambio/baja de campesinos la incrementa,
+    # así las cachés en memoria (agenda) saben cuándo recargar
+    cursor.execute('INSERT OR IGNORE INTO secuencias (nombre, valor) VALUES (?, 1)',
+                   (SECUENCIA_VERSION_CAMPESINOS,))
+    for sufijo, evento in (('ai', 'INSERT'), ('au', 'UPDATE'), ('ad', 'DELETE')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_campesinos_version_{sufijo}
+            AFTER {evento} ON campesinos BEGIN
+                UPDATE secuencias SET valor = valor + 1
+                WHERE nombre = '{SECUENCIA_VERSION_CAMPESINOS}';
+            END
+        ''')
+    
+    # Resumen de ventas por día, ciclo y cultivo; lo mantienen los triggers de recibos
+    resumen_nuevo = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resumen_ventas'"
+    ).fetchone() is None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_ventas (
+            fecha TEXT NOT NULL,
+            ciclo TEXT NOT NULL,
+            cultivo TEXT NOT NULL,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, ciclo, cultivo)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_resumen_ventas_ciclo ON resumen_ventas(ciclo, cultivo)')
+    _crear_triggers_resumen_ventas(cursor)
+    if resumen_nuevo:
+        reconstruir_resumen_ventas(cursor)
+
+    # Catálogo de reportes generados (lo consulta el gestor de reportes)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reportes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ruta TEXT NOT NULL UNIQUE,
+            archivo TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            formato TEXT NOT NULL,
+            periodo TEXT NOT NULL DEFAULT '',
+            bytes INTEGER NOT NULL DEFAULT 0,
+            sha256 TEXT,
+            fecha_creacion TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reportes_tipo_fecha ON reportes(tipo, fecha_creacion)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reportes_periodo ON reportes(periodo)')
     conn.commit()
     conn.close()
+    invalidar_cache_configuracion()
     print("Base de datos inicializada correctamente")
     print(""" 
                  █████╗ ██╗      ██████╗ ███╗   ██╗███████╗ ██████╗      ██████╗ ██████╗ ██████╗ ██╗███╗   ██╗ ██████╗ 
@@ -151,6 +254,26 @@ def init_db():
     
     # Migración de correo antiguo a contactos
     migrar_correo_a_contactos()
+    
+    # Índice de búsqueda sin acentos
+    crear_indice_busqueda()
+    
+    # Columnas de documentos en bases anteriores
+    migrar_campos_documentos()
+    
+    _marcar_version_esquema()
+
+def _marcar_version_esquema():
+    """Anota la versión del esquema sólo si las migraciones que atrapan sus errores sí se aplicaron"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(campesinos)")
+    columnas = {col[1] for col in cursor.fetchall()}
+    if {'ruta_ine', 'ruta_documento_agrario'} <= columnas:
+        cursor.execute(f'PRAGMA user_version = {VERSION_ESQUEMA}')
+    else:
+        print("⚠ Migraciones de riego.db incompletas; se reintentarán en el próximo arranque")
+    conn.close()
 
 def migrar_correo_a_contactos():
     """Migra la configuración antigua de correo a la tabla de contactos"""
@@ -179,12 +302,133 @@ def migrar_correo_a_contactos():
     finally:
         conn.close()
 
+# ==================== ÍNDICE DE BÚSQUEDA (FTS5) ====================
+# campesinos_busqueda guarda nombre/lote/barrio sin acentos y en minúsculas,
+# indexado por trigramas: "pena" encuentra "PEÑA" y las búsquedas por
+# subcadena no recorren toda la tabla. Los triggers lo mantienen al día y
+# normalizan en SQL puro, así funcionan desde cualquier cliente de SQLite.
+
+_SIN_ACENTOS = {
+    'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ü': 'u', 'ñ': 'n',
+    'Á': 'A', 'É': 'E', 'Í': 'I', 'Ó': 'O', 'Ú': 'U', 'Ü': 'U', 'Ñ': 'N'
+}
+_TABLA_SIN_ACENTOS = str.maketrans(_SIN_ACENTOS)
+
+def _sql_normalizado(expr: str) -> str:
+    """Expresión SQL que quita acentos y pasa a minúsculas"""
+    for con_acento, sin_acento in _SIN_ACENTOS.items():
+        expr = f"replace({expr}, '{con_acento}', '{sin_acento}')"
+    return f"lower({expr})"
+
+def normalizar_texto_busqueda(texto: str) -> str:
+    """Normaliza un término igual que el índice (sin acentos, minúsculas)"""
+    return str(texto).translate(_TABLA_SIN_ACENTOS).lower().strip()
+
+def crear_indice_busqueda():
+    """Crea (si falta) el índice FTS5 de campesinos y sus triggers de sincronización"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    valores_nuevos = (
+        f"new.id, {_sql_normalizado('new.nombre')}, "
+        f"{_sql_normalizado('new.numero_lote')}, {_sql_normalizado('new.barrio')}"
+    )
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS campesinos_busqueda
+            USING fts5(nombre, numero_lote, barrio, tokenize = 'trigram')
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"Advertencia: índice de búsqueda FTS5 no disponible ({e}). Se usará LIKE.")
+        conn.close()
+        return
+    
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_campesinos_busqueda_ai
+        AFTER INSERT ON campesinos BEGIN
+            INSERT INTO campesinos_busqueda (rowid, nombre, numero_lote, barrio)
+            VALUES ({valores_nuevos});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_campesinos_busqueda_au
+        AFTER UPDATE OF nombre, numero_lote, barrio ON campesinos BEGIN
+            DELETE FROM campesinos_busqueda WHERE rowid = old.id;
+            INSERT INTO campesinos_busqueda (rowid, nombre, numero_lote, barrio)
+            VALUES ({valores_nuevos});
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_campesinos_busqueda_ad
+        AFTER DELETE ON campesinos BEGIN
+            DELETE FROM campesinos_busqueda WHERE rowid = old.id;
+        END
+    ''')
+    
+    # Poblar/reconstruir si el índice no corresponde a la tabla (primera vez)
+    total_campesinos = cursor.execute('SELECT COUNT(*) FROM campesinos').fetchone()[0]
+    total_indice = cursor.execute('SELECT COUNT(*) FROM campesinos_busqueda').fetchone()[0]
+    if total_campesinos != total_indice:
+        with transaccion():
+            cursor.execute('DELETE FROM campesinos_busqueda')
+            cursor.execute(f'''
+                INSERT INTO campesinos_busqueda (rowid, nombre, numero_lote, barrio)
+                SELECT id, {_sql_normalizado('nombre')}, {_sql_normalizado('numero_lote')},
+                       {_sql_normalizado('barrio')}
+                FROM campesinos
+            ''')
+        print(f"✓ Índice de búsqueda reconstruido ({total_campesinos} campesinos)")
+    conn.close()
+
+def _buscar_campesino_fts(cursor, termino: str, incluir_barrio: bool) -> List[Dict]:
+    """Búsqueda por subcadena con el índice FTS5, ordenada por relevancia"""
+    palabras = termino.split()
+    # El tokenizador trigram necesita al menos 3 caracteres para MATCH
+    largas = [p for p in palabras if len(p) >= 3]
+    cortas = [p for p in palabras if len(p) < 3]
+    
+    columnas = ['nombre', 'numero_lote'] + (['barrio'] if incluir_barrio else [])
+    condiciones = ['c.activo = 1']
+    params: list = []
+    
+    if largas:
+        filtro = '{' + ' '.join(columnas) + '}'
+        frases = ['"' + p.replace('"', '""') + '"' for p in largas]
+        condiciones.append('campesinos_busqueda MATCH ?')
+        params.append(' AND '.join(f"{filtro} : {frase}" for frase in frases))
+    for palabra in cortas:
+        condiciones.append('(' + ' OR '.join(f"b.{col} LIKE ?" for col in columnas) + ')')
+        params.extend([f"%{palabra}%"] * len(columnas))
+    
+    # Relevancia: lote exacto, nombre que empieza con el término,
+    # palabra del nombre que empieza con el término, resto (bm25)
+    orden = '''
+        CASE WHEN b.numero_lote = ? THEN 0
+             WHEN b.nombre LIKE ? THEN 1
+             WHEN b.nombre LIKE ? THEN 2
+             ELSE 3 END
+    '''
+    params.extend([termino, f"{termino}%", f"% {termino}%"])
+    if largas:
+        orden += ', b.rank'
+    
+    cursor.execute(f'''
+        SELECT c.*
+        FROM campesinos_busqueda b
+        JOIN campesinos c ON c.id = b.rowid
+        WHERE {' AND '.join(condiciones)}
+        ORDER BY {orden}, c.nombre
+    ''', params)
+    return [dict(row) for row in cursor.fetchall()]
+
 # ==================== FUNCIONES DE CAMPESINOS ====================
-def buscar_campesino(termino: str) -> List[Dict]:
+def buscar_campesino(termino: str, incluir_barrio: bool = False) -> List[Dict]:
     """
     Busca campesinos de forma INTELIGENTE:
     - Si es número puro (ej: 1, 5, 10): búsqueda EXACTA por lote
-    - Si tiene letras: búsqueda PARCIAL por nombre o lote
+    - Si tiene letras: búsqueda por subcadena en nombre o lote (y barrio si
+      incluir_barrio), sin distinguir acentos ni mayúsculas, con los
+      resultados más relevantes primero
     """
     conn = get_connection()
     cursor = conn.cursor()
@@ -193,30 +437,37 @@ def buscar_campesino(termino: str) -> List[Dict]:
     termino = termino.strip()
     
     # DETECTAR SI ES SOLO NÚMEROS
-    es_numero_puro = termino.isdigit()
-    
-    if es_numero_puro:
+    if termino.isdigit():
         # ✅ BÚSQUEDA EXACTA por lote (sin LIKE)
-        try:
-            cursor.execute('''
-                SELECT * FROM campesinos
-                WHERE numero_lote = ? AND activo = 1
-                ORDER BY numero_lote
-            ''', (termino,))
-        except:
-            conn.close()
-            return []
-    else:
-        # ✅ BÚSQUEDA PARCIAL (contiene letras)
-        termino_busqueda = f"%{termino}%"
         cursor.execute('''
             SELECT * FROM campesinos
-            WHERE (nombre LIKE ? OR numero_lote LIKE ?)
+            WHERE numero_lote = ? AND activo = 1
+            ORDER BY numero_lote
+        ''', (termino,))
+        resultados = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return resultados
+    
+    termino_normalizado = normalizar_texto_busqueda(termino)
+    if not termino_normalizado:
+        conn.close()
+        return []
+    
+    try:
+        # ✅ BÚSQUEDA CON ÍNDICE FTS5 (sin acentos)
+        resultados = _buscar_campesino_fts(cursor, termino_normalizado, incluir_barrio)
+    except sqlite3.OperationalError:
+        # Sin FTS5: búsqueda parcial clásica
+        termino_busqueda = f"%{termino}%"
+        condicion_barrio = " OR barrio LIKE ?" if incluir_barrio else ""
+        cursor.execute(f'''
+            SELECT * FROM campesinos
+            WHERE (nombre LIKE ? OR numero_lote LIKE ?{condicion_barrio})
             AND activo = 1
             ORDER BY nombre, numero_lote
-        ''', (termino_busqueda, termino_busqueda))
+        ''', (termino_busqueda,) * (3 if incluir_barrio else 2))
+        resultados = [dict(row) for row in cursor.fetchall()]
     
-    resultados = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return resultados
 
@@ -345,6 +596,155 @@ def obtener_todos_campesinos() -> List[Dict]:
     conn.close()
     return resultados
 
+# ==================== RESUMEN DE VENTAS ====================
+
+def _mover_resumen(fila: str, signo: str) -> str:
+    """Sentencia que suma (signo '+') o resta ('-') el recibo OLD/NEW al resumen si está activo"""
+    return f'''
+        INSERT INTO resumen_ventas (fecha, ciclo, cultivo, cantidad, total)
+        SELECT {fila}.fecha, {fila}.ciclo, {fila}.cultivo, {signo}1, {signo}{fila}.costo
+        WHERE {fila}.eliminado = 0
+        ON CONFLICT (fecha, ciclo, cultivo) DO UPDATE SET
+            cantidad = cantidad + excluded.cantidad,
+            total = total + excluded.total;
+    '''
+
+def _crear_triggers_resumen_ventas(cursor):
+    """
+    Un recibo activo cuenta en el resumen; al eliminarlo (eliminado = 1), editar su
+    costo o borrarlo, los triggers restan la fila anterior y suman la nueva.
+    """
+    limpiar = 'DELETE FROM resumen_ventas WHERE cantidad = 0;'
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_recibos_resumen_ai
+        AFTER INSERT ON recibos BEGIN
+            {_mover_resumen('NEW', '+')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_recibos_resumen_au
+        AFTER UPDATE OF fecha, ciclo, cultivo, costo, eliminado ON recibos BEGIN
+            {_mover_resumen('OLD', '-')}
+            {_mover_resumen('NEW', '+')}
+            {limpiar}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_recibos_resumen_ad
+        AFTER DELETE ON recibos BEGIN
+            {_mover_resumen('OLD', '-')}
+            {limpiar}
+        END
+    ''')
+
+def reconstruir_resumen_ventas(cursor=None):
+    """Recalcula resumen_ventas desde cero (migración o reparación)"""
+    conn = None
+    if cursor is None:
+        conn = get_connection()
+        cursor = conn.cursor()
+    cursor.execute('DELETE FROM resumen_ventas')
+    cursor.execute('''
+        INSERT INTO resumen_ventas (fecha, ciclo, cultivo, cantidad, total)
+        SELECT fecha, ciclo, cultivo, COUNT(*), SUM(costo)
+        FROM recibos
+        WHERE eliminado = 0
+        GROUP BY fecha, ciclo, cultivo
+    ''')
+    if conn is not None:
+        conn.close()
+
+def obtener_resumen_dia(fecha: str) -> Dict:
+    """Número de recibos activos y total vendido en un día"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT COALESCE(SUM(cantidad), 0), COALESCE(SUM(total), 0)
+        FROM resumen_ventas WHERE fecha = ?
+    ''', (fecha,))
+    cantidad, total = cursor.fetchone()
+    conn.close()
+    return {'cantidad': cantidad, 'total': round(total, 2)}
+
+def obtener_total_ciclo(ciclo: str) -> float:
+    """Total vendido (recibos activos) en un ciclo"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT COALESCE(SUM(total), 0) FROM resumen_ventas WHERE ciclo = ?', (ciclo,))
+    total = cursor.fetchone()[0]
+    conn.close()
+    return round(total, 2)
+
+def obtener_ventas_por_cultivo(ciclo: str) -> Dict[str, Dict]:
+    """{cultivo: {'cantidad', 'total'}} de un ciclo, de mayor a menor total"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT cultivo, SUM(cantidad), SUM(total)
+        FROM resumen_ventas
+        WHERE ciclo = ?
+        GROUP BY cultivo
+        ORDER BY SUM(total) DESC
+    ''', (ciclo,))
+    resultado = {cultivo: {'cantidad': cantidad, 'total': round(total, 2)}
+                 for cultivo, cantidad, total in cursor.fetchall()}
+    conn.close()
+    return resultado
+
+def version_campesinos() -> int:
+    """Versión actual del padrón de campesinos (cambia con cada alta, edición o baja)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT valor FROM secuencias WHERE nombre = ?', (SECUENCIA_VERSION_CAMPESINOS,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+def obtener_campesinos_con_siembra_activa(campesino_ids: Optional[List[int]] = None) -> List[Dict]:
+    """
+    Obtiene campesinos activos junto con su siembra activa en UNA sola consulta,
+    ordenados por número de lote numérico (lotes no numéricos al final).
+
+    Args:
+        campesino_ids: Si se indica, solo esos campesinos (refresco parcial del grid)
+
+    Returns:
+        Lista de dicts con los campos de campesinos más siembra_id, cultivo y numero_riegos
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    query = '''
+        SELECT c.*,
+               s.id AS siembra_id,
+               s.cultivo AS cultivo,
+               COALESCE(s.numero_riegos, 0) AS numero_riegos,
+               CASE WHEN c.numero_lote <> '' AND c.numero_lote NOT GLOB '*[^0-9]*'
+                    THEN CAST(c.numero_lote AS INTEGER)
+                    ELSE 999999
+               END AS orden_lote
+        FROM campesinos c
+        LEFT JOIN siembras s ON s.id = (
+            SELECT s2.id FROM siembras s2
+            WHERE s2.campesino_id = c.id AND s2.activa = 1
+            ORDER BY s2.fecha_inicio DESC
+            LIMIT 1
+        )
+        WHERE c.activo = 1
+    '''
+    params = []
+    if campesino_ids is not None:
+        if not campesino_ids:
+            return []
+        query += f" AND c.id IN ({', '.join('?' * len(campesino_ids))})"
+        params.extend(campesino_ids)
+    query += ' ORDER BY orden_lote, c.nombre'
+    
+    cursor.execute(query, params)
+    resultados = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return resultados
+
 def contar_campesinos() -> int:
     """Cuenta el número de campesinos activos"""
     conn = get_connection()
@@ -519,15 +919,15 @@ def cerrar_siembra(siembra_id: int):
     conn.commit()
     conn.close()
 
-def incrementar_riegos(siembra_id: int):
-    """Incrementa el contador de riegos de una siembra"""
+def incrementar_riegos(siembra_id: int, cantidad: int = 1):
+    """Incrementa el contador de riegos de una siembra (en 1 o en la cantidad vendida)"""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
         UPDATE siembras 
-        SET numero_riegos = numero_riegos + 1
+        SET numero_riegos = numero_riegos + ?
         WHERE id = ?
-    ''', (siembra_id,))
+    ''', (cantidad, siembra_id))
     conn.commit()
     conn.close()
 
@@ -579,6 +979,27 @@ def crear_recibo(datos: Dict) -> int:
     conn.close()
     return recibo_id
 
+def crear_recibos(lista_datos: List[Dict]) -> List[int]:
+    """
+    Crea varios recibos con un solo executemany.
+    Debe llamarse dentro de transaccion() para que los IDs devueltos sean consecutivos.
+    """
+    if not lista_datos:
+        return []
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany('''
+        INSERT INTO recibos 
+        (folio, fecha, hora, campesino_id, siembra_id, cultivo, numero_riego, 
+         tipo_accion, costo, ciclo, eliminado)
+        VALUES (:folio, :fecha, :hora, :campesino_id, :siembra_id, :cultivo, :numero_riego,
+                :tipo_accion, :costo, :ciclo, 0)
+    ''', lista_datos)
+    # Con la transacción abierta nadie más inserta: los IDs son consecutivos
+    ultimo_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+    conn.close()
+    return list(range(ultimo_id - len(lista_datos) + 1, ultimo_id + 1))
+
 def obtener_recibos_dia(fecha: str) -> List[Dict]:
     """Obtiene todos los recibos de un día (no eliminados)"""
     conn = get_connection()
@@ -594,25 +1015,27 @@ def obtener_recibos_dia(fecha: str) -> List[Dict]:
     conn.close()
     return resultados
 
+def rango_mes(anio: int, mes: int) -> Tuple[str, str]:
+    """Primer día del mes y primer día del mes siguiente ('YYYY-MM-DD'), para filtrar fecha >= inicio AND fecha < fin"""
+    if mes == 12:
+        return f"{anio}-12-01", f"{anio + 1}-01-01"
+    return f"{anio}-{mes:02d}-01", f"{anio}-{mes + 1:02d}-01"
+
 def obtener_recibos_mes(anio: int, mes: int) -> List[Dict]:
     """Obtiene todos los recibos de un mes específico (no eliminados)"""
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Formato de fecha para búsqueda: YYYY-MM-%
-    fecha_inicio = f"{anio}-{mes:02d}-01"
-    fecha_fin = f"{anio}-{mes:02d}-31" # SQLite maneja bien esto en comparaciones de texto o usar strftime
-    
-    # Usando strftime para filtrar por mes y año
+    # Rango semiabierto sobre la columna tal cual para que SQLite use idx_recibo_activo_fecha
+    fecha_inicio, fecha_fin = rango_mes(anio, mes)
     cursor.execute('''
         SELECT r.*, c.nombre, c.numero_lote, c.localidad, c.barrio, c.superficie
         FROM recibos r
         JOIN campesinos c ON r.campesino_id = c.id
-        WHERE strftime('%Y', r.fecha) = ? 
-        AND strftime('%m', r.fecha) = ?
+        WHERE r.fecha >= ? AND r.fecha < ?
         AND r.eliminado = 0
         ORDER BY r.fecha, r.hora
-    ''', (str(anio), f"{mes:02d}"))
+    ''', (fecha_inicio, fecha_fin))
     
     resultados = [dict(row) for row in cursor.fetchall()]
     conn.close()
@@ -751,15 +1174,53 @@ def actualizar_recibo(recibo_id: int, nuevos_datos: Dict) -> bool:
         conn.close()
 
 # ==================== FUNCIONES DE CONFIGURACIÓN ====================
+# Caché en memoria por hilo (cada hilo tiene su propia conexión):
+# - Se carga completa una vez y se actualiza al escribir (write-through).
+# - PRAGMA data_version cambia cuando OTRA conexión (otro hilo u otro
+#   proceso) confirma cambios; en ese caso se recarga.
+# - Dentro de transaccion() se lee directo de la BD para no quedarse con
+#   valores que después se reviertan.
+_cache_config = threading.local()
 
-def obtener_configuracion(clave: str) -> Optional[str]:
-    """Obtiene un valor de configuración"""
+def _leer_configuracion_bd(conn) -> Dict:
+    cursor = conn.execute('SELECT clave, valor FROM configuracion')
+    return {row['clave']: row['valor'] for row in cursor.fetchall()}
+
+def _configuracion_en_cache() -> Dict:
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT valor FROM configuracion WHERE clave = ?', (clave,))
-    row = cursor.fetchone()
-    conn.close()
-    return row['valor'] if row else None
+    if _gestor_riego.en_transaccion():
+        return _leer_configuracion_bd(conn)
+
+    version = conn.execute('PRAGMA data_version').fetchone()[0]
+    if (getattr(_cache_config, 'valores', None) is None
+            or _cache_config.conexion is not conn
+            or _cache_config.version != version):
+        _cache_config.valores = _leer_configuracion_bd(conn)
+        _cache_config.conexion = conn
+        _cache_config.version = version
+    return _cache_config.valores
+
+def invalidar_cache_configuracion():
+    """Descarta la caché de configuración del hilo actual"""
+    _cache_config.valores = None
+
+def obtener_configuracion(clave: str) -> Optional[str]:
+    """Obtiene un valor de configuración (desde la caché)"""
+    return _configuracion_en_cache().get(clave)
+
+def obtener_configuracion_float(clave: str, por_defecto: float = 0.0) -> float:
+    """Obtiene un valor de configuración numérico (ej: tarifa_hectarea)"""
+    try:
+        return float(obtener_configuracion(clave))
+    except (TypeError, ValueError):
+        return por_defecto
+
+def obtener_configuracion_int(clave: str, por_defecto: int = 0) -> int:
+    """Obtiene un valor de configuración entero (ej: margen_superior)"""
+    try:
+        return int(obtener_configuracion(clave))
+    except (TypeError, ValueError):
+        return por_defecto
 
 def actualizar_configuracion(clave: str, valor: str):
     """Actualiza un valor de configuración"""
@@ -772,14 +1233,83 @@ def actualizar_configuracion(clave: str, valor: str):
     conn.commit()
     conn.close()
 
+    if _gestor_riego.en_transaccion():
+        # La transacción aún puede revertirse: recargar al terminar
+        invalidar_cache_configuracion()
+    elif getattr(_cache_config, 'valores', None) is not None and _cache_config.conexion is conn:
+        _cache_config.valores[clave] = valor
+
 def obtener_toda_configuracion() -> Dict:
     """Obtiene toda la configuración del sistema"""
+    return dict(_configuracion_en_cache())
+
+# ==================== SECUENCIA DE FOLIOS ====================
+# El folio vive en la tabla secuencias como "siguiente folio a emitir".
+# Todas las lecturas/escrituras son una sola sentencia atómica, así dos
+# ventanillas nunca obtienen el mismo folio.
+
+def consultar_folio(nombre: str = SECUENCIA_FOLIO) -> int:
+    """Devuelve el siguiente folio que se emitirá (sin reservarlo)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT valor FROM secuencias WHERE nombre = ?', (nombre,))
+    row = cursor.fetchone()
+    conn.close()
+    return row['valor'] if row else 1
+
+def reservar_folio(nombre: str = SECUENCIA_FOLIO) -> int:
+    """Reserva y devuelve el siguiente folio (UPDATE ... RETURNING atómico)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE secuencias SET valor = valor + 1
+        WHERE nombre = ?
+        RETURNING valor - 1
+    ''', (nombre,))
+    row = cursor.fetchone()
+    if row is None:
+        # Secuencia inexistente: se crea ya consumida en 1
+        cursor.execute('INSERT INTO secuencias (nombre, valor) VALUES (?, 2)', (nombre,))
+        conn.close()
+        return 1
+    conn.close()
+    return row[0]
+
+def liberar_folio(folio: int, fecha: str) -> bool:
+    """
+    Devuelve un folio a la secuencia al eliminar su recibo.
+
+    Reglas de huecos/reutilización (únicas para todo el sistema):
+    - Sólo se libera el ÚLTIMO folio emitido; los demás dejan un hueco.
+    - No se libera si otro recibo activo del mismo día comparte el folio
+      (ventas de varios riegos usan un solo folio).
+    - La secuencia nunca baja de 1.
+    """
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT clave, valor FROM configuracion')
-    config = {row['clave']: row['valor'] for row in cursor.fetchall()}
+    cursor.execute('''
+        UPDATE secuencias SET valor = valor - 1
+        WHERE nombre = ? AND valor = ? + 1 AND valor > 1
+          AND NOT EXISTS (
+              SELECT 1 FROM recibos
+              WHERE folio = ? AND fecha = ? AND eliminado = 0
+          )
+    ''', (SECUENCIA_FOLIO, folio, folio, fecha))
+    liberado = cursor.rowcount > 0
+    conn.close()
+    return liberado
+
+def fijar_folio(valor: int, nombre: str = SECUENCIA_FOLIO):
+    """Fija manualmente el siguiente folio (reinicio de ciclo o corrección)"""
+    if valor < 1:
+        raise ValueError("El folio debe ser un número entero positivo.")
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO secuencias (nombre, valor) VALUES (?, ?)
+        ON CONFLICT(nombre) DO UPDATE SET valor = excluded.valor
+    ''', (nombre, valor))
     conn.close()
-    return config
 
 # ==================== GESTIÓN DE CONTACTOS DE CORREO ====================
 
@@ -844,18 +1374,24 @@ def obtener_correo_presidente() -> str:
 # ==================== FUNCIONES DE AUDITORÍA ====================
 
 def registrar_auditoria(tipo_evento: str, descripcion: str, datos_previos: Optional[str] = None):
-    """Registra un evento en la tabla de auditoría"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO auditoria (fecha_hora, tipo_evento, usuario, descripcion, datos_previos)
-        VALUES (datetime('now', 'localtime'), ?, 'Sistema', ?, ?)
-    ''', (tipo_evento, descripcion, datos_previos))
-    conn.commit()
-    conn.close()
+    """
+    Registra un evento en la tabla de auditoría.
+    Dentro de transaccion() se escribe con la misma transacción; fuera de ella
+    se encola y se escribe por lotes (ver modules/auditoria.py).
+    """
+    _escritor_auditoria.registrar(tipo_evento, descripcion, datos_previos)
+
+def recuperar_auditoria_pendiente() -> int:
+    """Reinserta los eventos de auditoría que otro proceso dejó sin escribir al cerrarse"""
+    return _escritor_auditoria.recuperar_pendientes()
+
+def vaciar_auditoria() -> int:
+    """Escribe de inmediato los eventos de auditoría pendientes"""
+    return _escritor_auditoria.vaciar()
 
 def obtener_auditoria(limite: int = 100) -> List[Dict]:
     """Obtiene los últimos registros de auditoría"""
+    vaciar_auditoria()
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
@@ -871,6 +1407,9 @@ def obtener_auditoria(limite: int = 100) -> List[Dict]:
 
 def cargar_campesinos_desde_csv(ruta_csv: str):
     """Carga los campesinos desde el archivo CSV BEXHA.csv con detección automática de encoding"""
+    # Sólo se usan en la carga inicial; no se importan al arrancar
+    import pandas as pd
+    import chardet
     
     # 1. DETECTAR EL ENCODING CORRECTO
     with open(ruta_csv, 'rb') as file:
@@ -943,156 +1482,23 @@ def cargar_campesinos_desde_csv(ruta_csv: str):
 def obtener_estadisticas_generales() -> Dict:
     """
     Obtiene estadísticas generales, financieras y geográficas.
+    (Ver modules/estadisticas.py: se calculan en una sola pasada y se guardan
+    mientras la BD no cambie.)
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # 1. ESTADÍSTICAS BÁSICAS
-    cursor.execute("SELECT COUNT(*) FROM campesinos WHERE activo = 1")
-    total_campesinos = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT SUM(superficie) FROM campesinos WHERE activo = 1")
-    total_hectareas = cursor.fetchone()[0] or 0
-    
-    cursor.execute("""
-        SELECT SUM(c.superficie) 
-        FROM campesinos c
-        INNER JOIN siembras s ON c.id = s.campesino_id
-        WHERE s.activa = 1 AND c.activo = 1
-    """)
-    hectareas_sembradas = cursor.fetchone()[0] or 0
-    
-    porcentaje_sembrado = (hectareas_sembradas / total_hectareas * 100) if total_hectareas > 0 else 0
-    
-    # 2. ESTADÍSTICAS POR CULTIVO
-    cursor.execute("""
-        SELECT cultivo, COUNT(*) as cantidad
-        FROM siembras
-        WHERE activa = 1
-        GROUP BY cultivo
-        ORDER BY cantidad DESC
-    """)
-    siembras_por_cultivo = {row[0]: row[1] for row in cursor.fetchall()}
-    
-    cursor.execute("""
-        SELECT s.cultivo, SUM(c.superficie) as hectareas
-        FROM siembras s
-        INNER JOIN campesinos c ON s.campesino_id = c.id
-        WHERE s.activa = 1
-        GROUP BY s.cultivo
-        ORDER BY hectareas DESC
-    """)
-    hectareas_por_cultivo = {row[0]: row[1] for row in cursor.fetchall()}
-    
-    # 3. ESTADÍSTICAS FINANCIERAS
-    # Obtener tarifa por hectárea
-    cursor.execute("SELECT valor FROM configuracion WHERE clave = 'tarifa_hectarea'")
-    row_tarifa = cursor.fetchone()
-    tarifa_hectarea = float(row_tarifa['valor']) if row_tarifa else 450.0
-    
-    # Ingreso Potencial (Total Hectáreas * Tarifa)
-    ingreso_potencial = total_hectareas * tarifa_hectarea
-    
-    # Ingreso Real (Suma de recibos del ciclo actual)
-    cursor.execute("SELECT valor FROM configuracion WHERE clave = 'ciclo_actual'")
-    row_ciclo = cursor.fetchone()
-    ciclo_actual = row_ciclo['valor'] if row_ciclo else ""
-    
-    cursor.execute("""
-        SELECT SUM(costo) 
-        FROM recibos 
-        WHERE eliminado = 0 AND ciclo = ?
-    """, (ciclo_actual,))
-    ingreso_real = cursor.fetchone()[0] or 0
-    
-    eficiencia_recaudacion = (ingreso_real / ingreso_potencial * 100) if ingreso_potencial > 0 else 0
-    
-    # 4. ESTADÍSTICAS GEOGRÁFICAS (Por Barrio)
-    cursor.execute("""
-        SELECT barrio, SUM(superficie) as hectareas
-        FROM campesinos
-        WHERE activo = 1
-        GROUP BY barrio
-        ORDER BY hectareas DESC
-    """)
-    hectareas_por_barrio = {row[0]: row[1] for row in cursor.fetchall()}
-    
-    # 5. OPERATIVO
-    # Campesinos sin siembra
-    cursor.execute("""
-        SELECT COUNT(*) 
-        FROM campesinos c
-        LEFT JOIN siembras s ON c.id = s.campesino_id AND s.activa = 1
-        WHERE s.id IS NULL AND c.activo = 1
-    """)
-    campesinos_sin_siembra = cursor.fetchone()[0]
-    
-    conn.close()
-    
-    return {
-        'total_campesinos': total_campesinos,
-        'total_hectareas': round(total_hectareas, 2),
-        'hectareas_sembradas': round(hectareas_sembradas, 2),
-        'hectareas_sin_sembrar': round(total_hectareas - hectareas_sembradas, 2),
-        'porcentaje_sembrado': round(porcentaje_sembrado, 2),
-        'siembras_por_cultivo': siembras_por_cultivo,
-        'hectareas_por_cultivo': hectareas_por_cultivo,
-        'campesinos_sin_siembra': campesinos_sin_siembra,
-        # Nuevos campos
-        'ingreso_potencial': round(ingreso_potencial, 2),
-        'ingreso_real': round(ingreso_real, 2),
-        'eficiencia_recaudacion': round(eficiencia_recaudacion, 2),
-        'hectareas_por_barrio': hectareas_por_barrio,
-        'ciclo_actual': ciclo_actual
-    }
+    from modules.estadisticas import obtener_estadisticas
+    estadisticas = dict(obtener_estadisticas())
+    del estadisticas['por_cultivo']
+    return estadisticas
 
 def obtener_estadisticas_por_cultivo(cultivo: str) -> Dict:
     """Obtiene estadísticas de un cultivo específico"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Campesinos con este cultivo
-    cursor.execute("""
-        SELECT COUNT(DISTINCT s.campesino_id)
-        FROM siembras s
-        WHERE s.cultivo = ? AND s.activa = 1
-    """, (cultivo,))
-    total_campesinos = cursor.fetchone()[0]
-    
-    # Hectáreas totales
-    cursor.execute("""
-        SELECT SUM(c.superficie)
-        FROM siembras s
-        INNER JOIN campesinos c ON s.campesino_id = c.id
-        WHERE s.cultivo = ? AND s.activa = 1
-    """, (cultivo,))
-    total_hectareas = cursor.fetchone()[0] or 0
-    
-    # Riegos promedio
-    cursor.execute("""
-        SELECT AVG(s.numero_riegos)
-        FROM siembras s
-        WHERE s.cultivo = ? AND s.activa = 1
-    """, (cultivo,))
-    riegos_promedio = cursor.fetchone()[0] or 0
-    
-    # Total de riegos vendidos
-    cursor.execute("""
-        SELECT SUM(s.numero_riegos)
-        FROM siembras s
-        WHERE s.cultivo = ? AND s.activa = 1
-    """, (cultivo,))
-    total_riegos = cursor.fetchone()[0] or 0
-    
-    conn.close()
-    
-    return {
-        'cultivo': cultivo,
-        'total_campesinos': total_campesinos,
-        'total_hectareas': round(total_hectareas, 2),
-        'riegos_promedio': round(riegos_promedio, 1),
-        'total_riegos': total_riegos
-    }
+    from modules.estadisticas import obtener_estadisticas
+    por_cultivo = obtener_estadisticas()['por_cultivo'].get(cultivo)
+    if por_cultivo is None:
+        return {'cultivo': cultivo, 'total_campesinos': 0, 'total_hectareas': 0,
+                'riegos_promedio': 0, 'total_riegos': 0}
+    return {clave: por_cultivo[clave] for clave in
+            ('cultivo', 'total_campesinos', 'total_hectareas', 'riegos_promedio', 'total_riegos')}
     
 def partir_lote(campesino_id: int, num_divisiones: int, superficies: List[float]) -> List[int]:
     """
@@ -1251,6 +1657,9 @@ def actualizar_superficie_campesino(campesino_id: int, nueva_superficie: float)
     """
     Actualiza la superficie de un campesino.
     
+    La superficie (riego.db) y el monto de sus cuotas pendientes (cuotas.db)
+    cambian en una sola transacción (ver modules/unificada.py).
+    
     Args:
         campesino_id: ID del campesino
         nueva_superficie: Nueva superficie en hectáreas
@@ -1258,50 +1667,48 @@ def actualizar_superficie_campesino(campesino_id: int, nueva_superficie: float)
     Returns:
         True si se actualizó correctamente
     """
+    from modules.unificada import actualizar_superficie_con_cuotas
+    
+    cambio = actualizar_superficie_con_cuotas(campesino_id, nueva_superficie)
+    
+    # Registrar en auditoría
+    registrar_auditoria(
+        'SUPERFICIE_ACTUALIZADA',
+        f"Lote {cambio['numero_lote']} ({cambio['nombre']}): "
+        f"{cambio['superficie_anterior']} ha → {nueva_superficie} ha",
+        campesino_id
+    )
+    
+    return True
+
+def sincronizar_superficies_en_cuotas(campesino_ids: Optional[List[int]] = None) -> int:
+    """
+    Recalcula las cuotas pendientes con la superficie actual del padrón.
+    Para re-sincronizar muchos campesinos de una vez (recarga del CSV,
+    partición de lotes); sin ids toma todos los campesinos.
+    
+    Returns:
+        Número de cuotas pendientes recalculadas
+    """
     conn = get_connection()
     cursor = conn.cursor()
+    if campesino_ids is None:
+        cursor.execute("SELECT id, superficie FROM campesinos WHERE superficie IS NOT NULL")
+        filas = cursor.fetchall()
+    else:
+        filas = []
+        ids = list(campesino_ids)
+        # Límite de parámetros de SQLite por sentencia
+        for inicio in range(0, len(ids), 500):
+            bloque = ids[inicio:inicio + 500]
+            cursor.execute(f"""
+                SELECT id, superficie FROM campesinos
+                WHERE superficie IS NOT NULL AND id IN ({', '.join('?' * len(bloque))})
+            """, bloque)
+            filas.extend(cursor.fetchall())
+    conn.close()
     
-    try:
-        # Obtener datos anteriores
-        cursor.execute("SELECT nombre, numero_lote, superficie FROM campesinos WHERE id = ?", (campesino_id,))
-        row = cursor.fetchone()
-        
-        if not row:
-            raise ValueError("Campesino no encontrado")
-        
-        nombre = row[0]
-        numero_lote = row[1]
-        superficie_anterior = row[2]
-        
-        # Actualizar superficie
-        cursor.execute("""
-            UPDATE campesinos 
-            SET superficie = ?
-            WHERE id = ?
-        """, (nueva_superficie, campesino_id))
-        
-        conn.commit()
-        
-        # Registrar en auditoría
-        registrar_auditoria(
-            'SUPERFICIE_ACTUALIZADA',
-            f"Lote {numero_lote} ({nombre}): {superficie_anterior} ha → {nueva_superficie} ha",
-            campesino_id
-        )
-        
-        # Sincronizar con cuotas.db
-        try:
-            actualizar_datos_campesino_en_cuotas(campesino_id, {'superficie': nueva_superficie})
-        except Exception as e:
-            print(f"Error sincronizando cuotas: {e}")
-            
-        return True
-        
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    return recalcular_cuotas_pendientes({fila['id']: fila['superficie'] for fila in filas})
 
 def migrar_campos_documentos():
     """Migración: Agrega campos para rutas de documentos si no existen"""
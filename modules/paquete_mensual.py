@@ -0,0 +1,133 @@
+# modules/paquete_mensual.py - Cierre de Mes en Paralelo
+# Reporte PDF, Excel, respaldos y auditoría del mes generados a la vez, fuera del hilo de Tk
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from modules import models, cuotas
+
+# Pasos del paquete (para avisos de progreso y errores)
+PASO_RECIBOS = 'recibos'
+PASO_PDF = 'pdf'
+PASO_EXCEL = 'excel'
+PASO_RESPALDOS = 'respaldos'
+PASO_AUDITORIA = 'auditoria'
+
+NOMBRES_PASOS = {
+    PASO_RECIBOS: 'Recibos del mes',
+    PASO_PDF: 'Reporte PDF',
+    PASO_EXCEL: 'Reporte Excel',
+    PASO_RESPALDOS: 'Respaldos',
+    PASO_AUDITORIA: 'Auditoría',
+}
+
+MAX_HILOS = 3
+
+# al_progresar(paso, terminados, total); se llama desde hilos de trabajo
+AvisoProgreso = Callable[[str, int, int], None]
+
+
+class PaqueteMensual:
+    """Archivos generados para un mes y los pasos que fallaron"""
+
+    def __init__(self, anio: int, mes: int):
+        self.anio = anio
+        self.mes = mes
+        self.cantidad_recibos = 0
+        self.pdf: Optional[str] = None
+        self.excel: Optional[str] = None
+        self.respaldos: List[str] = []
+        self.auditoria: Optional[str] = None
+        self.errores: Dict[str, str] = {}
+
+    def adjuntos(self) -> List[str]:
+        """Archivos para el correo, en el orden en que se enviaban antes"""
+        archivos = [ruta for ruta in (self.pdf, self.excel) if ruta]
+        archivos.extend(self.respaldos)
+        if self.auditoria:
+            archivos.append(self.auditoria)
+        return archivos
+
+
+def _en_hilo(funcion, *args):
+    """Ejecuta un paso y cierra las conexiones que el hilo de trabajo haya abierto"""
+    try:
+        return funcion(*args)
+    finally:
+        models._gestor_riego.cerrar_hilo_actual()
+        cuotas._gestor_cuotas.cerrar_hilo_actual()
+
+
+def _respaldos_y_auditoria(paquete: PaqueteMensual, motivo: str):
+    """El CSV de auditoría va después del respaldo para incluir su evento BACKUP_CREADO"""
+    from modules.logic import crear_backup, generar_archivo_auditoria
+    try:
+        paquete.respaldos = crear_backup(motivo)
+    except Exception as e:
+        paquete.errores[PASO_RESPALDOS] = str(e)
+
+    paquete.auditoria = generar_archivo_auditoria() or None
+    if paquete.auditoria is None:
+        paquete.errores[PASO_AUDITORIA] = "No se pudo generar el archivo de auditoría"
+
+
+def generar_paquete_mensual(anio: int, mes: int, con_respaldos: bool = True,
+                            al_progresar: Optional[AvisoProgreso] = None,
+                            motivo: str = "Reporte Mensual Automático") -> PaqueteMensual:
+    """
+    Genera el paquete de fin de mes.
+
+    Los recibos se leen una sola vez y se comparten con el PDF y el Excel;
+    los dos reportes y la cadena respaldos -> auditoría corren en paralelo.
+
+    Raises:
+        ValueError: Si no hay recibos en el mes
+    """
+    from modules.reports import generar_reporte_mensual_pdf, generar_reporte_mensual_excel
+
+    paquete = PaqueteMensual(anio, mes)
+    recibos = models.obtener_recibos_mes(anio, mes)
+    if not recibos:
+        raise ValueError(f"No hay recibos registrados en {mes:02d}/{anio}")
+    paquete.cantidad_recibos = len(recibos)
+
+    total = 4 if con_respaldos else 3
+    terminados = 1
+
+    def avisar(paso: str):
+        if al_progresar is not None:
+            try:
+                al_progresar(paso, terminados, total)
+            except Exception as e:
+                print(f"Error en aviso de progreso: {e}")
+
+    avisar(PASO_RECIBOS)
+
+    with ThreadPoolExecutor(max_workers=MAX_HILOS, thread_name_prefix='paquete_mensual') as ejecutor:
+        futuros = {
+            ejecutor.submit(_en_hilo, generar_reporte_mensual_pdf, anio, mes, recibos): PASO_PDF,
+            ejecutor.submit(_en_hilo, generar_reporte_mensual_excel, anio, mes, recibos): PASO_EXCEL,
+        }
+        if con_respaldos:
+            futuros[ejecutor.submit(_en_hilo, _respaldos_y_auditoria, paquete, motivo)] = PASO_RESPALDOS
+
+        for futuro in as_completed(futuros):
+            paso = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                paquete.errores[paso] = str(e)
+            else:
+                if paso == PASO_PDF:
+                    paquete.pdf = resultado
+                elif paso == PASO_EXCEL:
+                    paquete.excel = resultado
+            terminados += 1
+            avisar(paso)
+
+    return paquete
+
+
+def enviar_paquete(paquete: PaqueteMensual, destinatario: str) -> bool:
+    """Envía por correo todos los archivos del paquete"""
+    from modules.email_sender import enviar_correo_reporte
+    return enviar_correo_reporte(destinatario, paquete.adjuntos())
@@ -5,9 +5,9 @@ from reportlab.lib import colors
 from reportlab.pdfgen import canvas
 from reportlab.platypus import Table, TableStyle
 from datetime import datetime
-from typing import Dict, List, Optional  # ✅ AGREGAR Optional aquí
+from typing import Dict, Iterable, List, Optional, Tuple  # ✅ AGREGAR Optional aquí
+from functools import lru_cache
 import os
-import time
 import sys
 import subprocess
 import platform
@@ -23,14 +23,11 @@ if platform.system() == "Windows":
 
 from typing import Dict, List
 from modules.models import obtener_recibo_por_id, obtener_configuracion, obtener_recibos_por_folio
+from modules import catalogo_reportes
 import qrcode
 from reportlab.lib.utils import ImageReader
 from io import BytesIO
 
-# ✅ AGREGAR ESTOS IMPORTS PARA LA FUNCIÓN DE EXCEL
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 # ==================== CONFIGURACIÓN DE RECIBO ====================
 
 # IMPORTANTE: Recibo en formato 1/3 carta - ORIENTACIÓN VERTICAL
@@ -166,10 +163,8 @@ def generar_recibo_pdf_temporal(recibo_id: int, es_reimpresion: bool = False) ->
     ubicacion = obtener_configuracion('ubicacion') or 'Tezontepec de Aldama, Hgo.'
 
     # Crear carpeta temporal en /tmp (Mac/Linux) o %TEMP% (Windows)
-    if platform.system() == "Windows":
-        temp_dir = os.path.join(os.environ.get('TEMP', os.getcwd()), 'recibos_temp')
-    else:
-        temp_dir = os.path.join('/tmp', 'recibos_temp')
+    from modules.impresion import directorio_temporal
+    temp_dir = directorio_temporal()
 
     os.makedirs(temp_dir, exist_ok=True)
 
@@ -178,117 +173,116 @@ def generar_recibo_pdf_temporal(recibo_id: int, es_reimpresion: bool = False) ->
     filepath = os.path.join(temp_dir, filename)
 
     c = canvas.Canvas(filepath, pagesize=(RECIBO_ANCHO, RECIBO_ALTO))
-    _dibujar_recibo_principal(c, datos_base, nombre_oficina, ubicacion, es_reimpresion)
+    _dibujar_recibo_principal(c, datos_base, nombre_oficina, ubicacion, es_reimpresion,
+                              riegos=numeros_riego)
     c.save()
 
     return filepath
 
 # ==================== IMPRESIÓN (TEMPORALES) ====================
 
-def imprimir_recibo_y_limpiar(pdf_path: str):
-    """
-    Intenta imprimir un archivo PDF en Windows o macOS y luego lo elimina.
+def imprimir_recibo_y_limpiar(pdf_path: str, al_cambiar=None):
     """
-    sistema = platform.system()
-    print(f"Intentando imprimir en {sistema} desde: {pdf_path}")
+    Envía un PDF temporal a la cola de impresión y regresa de inmediato.
+    El archivo se elimina cuando el trabajo termina (ver modules.impresion).
 
-    if not os.path.exists(pdf_path):
-        print(f"Error: El archivo PDF no existe: {pdf_path}")
-        return
+    Args:
+        al_cambiar: Callback opcional al cambiar el estado del trabajo (se llama desde otro hilo)
 
-    impreso = False
+    Returns:
+        El TrabajoImpresion encolado
+    """
+    from modules.impresion import obtener_cola_impresion
+    
+    impresora = obtener_configuracion('impresora_predeterminada')
+    print(f"Recibo en cola de impresión: {pdf_path}")
+    return obtener_cola_impresion().encolar(pdf_path, impresora=impresora, al_cambiar=al_cambiar)
 
-    if sistema == "Windows":
-        if win32print and win32api:
-            try:
-                # Usar win32api para imprimir
-                win32api.ShellExecute(0, "print", pdf_path, None, ".", 0)
-                print(f"Comando de impresión enviado para win32: {pdf_path}")
-                impreso = True
-            except Exception as e:
-                 print(f"Error con win32api.ShellExecute: {e}")
-        else:
-             print("pywin32 no disponible. Intentando alternativas...")
+# ==================== DIBUJO DE RECIBO ====================
 
-        if not impreso:
-            # Alternativa menos confiable: os.startfile
+# Colores del recibo de riego
+RECIBO_COLOR_VERDE = colors.HexColor('#bedcdc')  # Antes #B8D1BF (Fondo header)
+RECIBO_COLOR_BEIGE = colors.HexColor('#FFFFFF')
+RECIBO_COLOR_BEIGE_OSCURO = colors.HexColor('#bed2dc')  # Antes #C9B99A (Líneas)
+RECIBO_COLOR_TEXTO = colors.HexColor('#506e78')  # Antes #2C3E2E (Texto principal)
+RECIBO_COLOR_TEXTO_GRIS = colors.HexColor('#506e78')  # Antes #666666 (Texto secundario - unificado)
+
+# Posiciones verticales del recibo (de arriba hacia abajo)
+_Y_SEPARADOR = RECIBO_ALTO - 2.45*cm
+_Y_CAJA_DATOS = _Y_SEPARADOR - 0.2*cm
+_Y_FILA_1 = _Y_CAJA_DATOS - 0.45*cm
+_Y_FILA_2 = _Y_FILA_1 - 0.45*cm
+_Y_RECIBI = _Y_FILA_2 - 0.95*cm
+_Y_LINEA_CONCEPTO = _Y_RECIBI - 0.5*cm
+_Y_CONCEPTO = _Y_LINEA_CONCEPTO - 0.3*cm
+_Y_TOTAL = _Y_CONCEPTO - 0.5*cm
+_Y_LINEA_PIE = _Y_TOTAL - 0.9*cm
+_Y_FECHA = _Y_LINEA_PIE - 0.3*cm
+_Y_HORA = _Y_FECHA - 0.28*cm
+
+_MONTO_X = RECIBO_ANCHO - 5*cm
+_QR_TAMANO = 2.2 * cm
+_QR_X = 0.8 * cm
+_QR_Y = 0.7 * cm
+
+# Resolución con la que se incrusta el logo (el PNG original pesa varios MB)
+LOGO_DPI = 300
+
+_FORMA_RECIBO = 'plantilla_recibo_riego'
+_logos_reducidos = {}
+
+
+def _logo_reducido(ancho: float, alto: float):
+    """
+    Logo decodificado y reducido a LOGO_DPI para el tamaño indicado (en puntos).
+    Se prepara una sola vez por proceso; None si no existe o no se puede leer.
+    """
+    clave = (LOGO_PATH, round(ancho, 2), round(alto, 2))
+    if clave not in _logos_reducidos:
+        logo = None
+        if os.path.exists(LOGO_PATH):
             try:
-                os.startfile(pdf_path, "print") # Esta acción puede no ser silenciosa
-                print(f"Comando de impresión enviado para os.startfile: {pdf_path}")
-                impreso = True
+                from PIL import Image
+                imagen = Image.open(LOGO_PATH)
+                imagen.thumbnail((int(ancho / 72 * LOGO_DPI), int(alto / 72 * LOGO_DPI)),
+                                 Image.Resampling.LANCZOS)
+                buffer = BytesIO()
+                imagen.save(buffer, 'PNG', optimize=True)
+                buffer.seek(0)
+                logo = ImageReader(buffer)
             except Exception as e:
-                 print(f"Error con os.startfile: {e}")
+                print(f"Advertencia: no se pudo preparar el logo: {e}")
+        _logos_reducidos[clave] = logo
+    return _logos_reducidos[clave]
 
-    elif sistema == "Darwin": # macOS
-        try:
-            # Usar 'lp' para imprimir en macOS (requiere CUPS instalado, que generalmente lo está)
-            subprocess.run(["lp", pdf_path], check=True)
-            print(f"PDF impreso en macOS usando lp: {pdf_path}")
-            impreso = True
-        except subprocess.CalledProcessError as e:
-            print(f"Error al imprimir con 'lp' en macOS: {e}")
-        except FileNotFoundError:
-            print("Comando 'lp' no encontrado en macOS. Verifique la instalación de CUPS o la ruta.")
-
-    else: # Linux u Otro
-        try:
-            # Usar 'lp' para imprimir en Linux (requiere CUPS instalado)
-            subprocess.run(["lp", pdf_path], check=True)
-            print(f"PDF impreso en Linux usando lp: {pdf_path}")
-            impreso = True
-        except subprocess.CalledProcessError as e:
-            print(f"Error al imprimir con 'lp' en Linux: {e}")
-        except FileNotFoundError:
-            print("Comando 'lp' no encontrado. Verifique la instalación de CUPS o la ruta.")
-
-    # Esperar un momento para que el comando de impresión se procese
-    import time
-    time.sleep(1) # Ajusta si es necesario
-
-    # Eliminar el archivo temporal después del intento de impresión
-    try:
-        os.remove(pdf_path)
-        print(f"Archivo temporal eliminado: {pdf_path}")
-    except OSError as e:
-        print(f"Error al eliminar archivo temporal {pdf_path}: {e}")
-
-# ==================== DIBUJO DE RECIBO ====================
 
-def _dibujar_recibo_principal(c, recibo: Dict, nombre_oficina: str, ubicacion: str, es_reimpresion: bool):
+def _definir_plantilla_recibo(c):
     """
-    Dibuja el recibo principal - MARCA DE AGUA AL FINAL
+    Dibuja la parte fija del recibo (fondos, encabezado, logo, etiquetas,
+    líneas y caja del QR) como un form XObject del documento. Cada recibo
+    del mismo PDF la reutiliza con doForm y sólo agrega los datos variables.
     """
-    
-    # ===== COLORES =====
-    COLOR_VERDE = colors.HexColor('#bedcdc')  # Antes #B8D1BF (Fondo header)
-    COLOR_BEIGE = colors.HexColor('#FFFFFF')
-    COLOR_BEIGE_OSCURO = colors.HexColor('#bed2dc') # Antes #C9B99A (Líneas)
-    COLOR_TEXTO = colors.HexColor('#506e78')  # Antes #2C3E2E (Texto principal)
-    COLOR_TEXTO_GRIS = colors.HexColor('#506e78') # Antes #666666 (Texto secundario - unificado)
-    
+    c.beginForm(_FORMA_RECIBO)
+
     # ===== FONDO BEIGE =====
-    c.setFillColor(COLOR_BEIGE)
+    c.setFillColor(RECIBO_COLOR_BEIGE)
     c.roundRect(0.15*cm, 0.15*cm, RECIBO_ANCHO - 0.3*cm, RECIBO_ALTO - 0.3*cm, 
                 0.5*cm, stroke=0, fill=1)
     
     # ===== HEADER VERDE (más alto) =====
-    c.setFillColor(COLOR_VERDE)
+    c.setFillColor(RECIBO_COLOR_VERDE)
     c.roundRect(0.4*cm, RECIBO_ALTO - 2.3*cm, RECIBO_ANCHO - 0.8*cm, 1.9*cm, 
                 0.4*cm, stroke=0, fill=1)
     
     # ===== LOGO (más grande y más abajo) =====
-    if os.path.exists(LOGO_PATH):
-        try:
-            # Bajamos el logo un poco más (de -2.1 a -2.2)
-            c.drawImage(LOGO_PATH, 0.7*cm, RECIBO_ALTO - 2.2*cm, 
-                       width=1.7*cm, height=1.7*cm, mask='auto')
-        except:
-            pass
+    logo = _logo_reducido(1.7*cm, 1.7*cm)
+    if logo is not None:
+        c.drawImage(logo, 0.7*cm, RECIBO_ALTO - 2.2*cm, 
+                   width=1.7*cm, height=1.7*cm, mask='auto')
     
     # ===== TÍTULO (texto más grande) =====
     c.setFillColor(colors.black)
     c.setFont("Helvetica-Bold", 10)
-    # Centrado exacto (quitamos el +0.5cm)
     c.drawCentredString(RECIBO_ANCHO/2, RECIBO_ALTO - 1.0*cm, 
                        "ASOCIACION DE USUARIOS DE LA SECCION 14 EL BEXHA, A.C.")
     
@@ -297,23 +291,128 @@ def _dibujar_recibo_principal(c, recibo: Dict, nombre_oficina: str, ubicacion: s
     c.drawCentredString(RECIBO_ANCHO/2, RECIBO_ALTO - 1.6*cm, 
                        "VALE DE RIEGO")
     
-    c.setFont("Helvetica", 8)
-    # RFC ELIMINADO
-    
     # ===== SEPARADOR =====
-    y_pos = RECIBO_ALTO - 2.45*cm
-    c.setStrokeColor(COLOR_BEIGE_OSCURO)
+    c.setStrokeColor(RECIBO_COLOR_BEIGE_OSCURO)
     c.setLineWidth(0.5)
-    c.line(0.7*cm, y_pos, RECIBO_ANCHO - 0.7*cm, y_pos)
+    c.line(0.7*cm, _Y_SEPARADOR, RECIBO_ANCHO - 0.7*cm, _Y_SEPARADOR)
     
     # ===== CAJA DE DATOS (más alta) =====
-    y_pos -= 0.2*cm
     c.setFillColor(colors.white)
-    c.roundRect(0.7*cm, y_pos - 1.5*cm, RECIBO_ANCHO - 1.4*cm, 1.4*cm, 
+    c.roundRect(0.7*cm, _Y_CAJA_DATOS - 1.5*cm, RECIBO_ANCHO - 1.4*cm, 1.4*cm, 
+                0.25*cm, stroke=1, fill=1)
+    
+    # ===== RECIBÍ DE =====
+    c.setFillColor(RECIBO_COLOR_TEXTO_GRIS)
+    c.setFont("Helvetica", 8.5)
+    c.drawString(0.8*cm, _Y_RECIBI, "Recibí de:")
+    
+    # ===== CONCEPTO =====
+    c.line(0.8*cm, _Y_LINEA_CONCEPTO, RECIBO_ANCHO - 0.8*cm, _Y_LINEA_CONCEPTO)
+    c.setFont("Helvetica", 8)
+    c.drawString(0.8*cm, _Y_CONCEPTO, "Concepto: Pago de cuota de riego para el ciclo agrícola")
+    
+    # ===== TOTAL + CAJA DEL MONTO =====
+    c.setFillColor(RECIBO_COLOR_TEXTO)
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(0.8*cm, _Y_TOTAL, "TOTAL")
+    
+    c.setFillColor(colors.white)
+    c.setStrokeColor(RECIBO_COLOR_VERDE)
+    c.setLineWidth(1.5)
+    c.roundRect(_MONTO_X, _Y_TOTAL - 0.35*cm, 4.2*cm, 0.75*cm, 
                 0.25*cm, stroke=1, fill=1)
     
+    c.setFillColor(RECIBO_COLOR_TEXTO_GRIS)
+    c.setFont("Helvetica", 6.5)
+    c.drawString(_MONTO_X + 0.2*cm, _Y_TOTAL + 0.15*cm, "(pago en efectivo)")
+    
+    # ===== FOOTER =====
+    c.setStrokeColor(RECIBO_COLOR_BEIGE_OSCURO)
+    c.setLineWidth(0.5)
+    c.line(0.8*cm, _Y_LINEA_PIE, RECIBO_ANCHO - 0.8*cm, _Y_LINEA_PIE)
+    
+    # Firma
+    c.setFont("Helvetica", 7.5)
+    c.drawRightString(RECIBO_ANCHO - 0.8*cm, _Y_HORA + 0.28*cm, "Firma Recaudador")
+    c.line(RECIBO_ANCHO - 4*cm, _Y_HORA + 0.18*cm, RECIBO_ANCHO - 0.8*cm, _Y_HORA + 0.18*cm)
+    
+    # ===== CONTORNO DEL QR Y CAJA "NO ESCANEAR QR" =====
+    c.setStrokeColor(RECIBO_COLOR_VERDE)
+    c.setLineWidth(1)
+    c.rect(_QR_X - 0.1*cm, _QR_Y - 0.1*cm, _QR_TAMANO + 0.2*cm, _QR_TAMANO + 0.2*cm, stroke=1, fill=0)
+    
+    c.setFillColor(RECIBO_COLOR_VERDE)
+    c.roundRect(_QR_X, _QR_Y - 0.5*cm, _QR_TAMANO, 0.4*cm, 0.1*cm, stroke=0, fill=1)
+    
+    c.setFillColor(RECIBO_COLOR_TEXTO)
+    c.setFont("Helvetica-Bold", 6)
+    c.drawCentredString(_QR_X + _QR_TAMANO/2, _QR_Y - 0.35*cm, "NO ESCANEAR QR")
+
+    c.endForm()
+
+
+@lru_cache(maxsize=256)
+def _trazos_qr(datos: str, borde: int = 1) -> Tuple[int, Tuple[Tuple[int, int, int], ...]]:
+    """
+    Módulos oscuros del QR agrupados en tramos horizontales (fila, columna, largo).
+    Se calcula una vez por contenido; las reimpresiones reutilizan el resultado.
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        border=borde,
+    )
+    qr.add_data(datos)
+    qr.make(fit=True)
+    matriz = qr.get_matrix()
+
+    tramos = []
+    for fila, modulos in enumerate(matriz):
+        columna = 0
+        while columna < len(modulos):
+            if modulos[columna]:
+                inicio = columna
+                while columna < len(modulos) and modulos[columna]:
+                    columna += 1
+                tramos.append((fila, inicio, columna - inicio))
+            else:
+                columna += 1
+    return len(matriz), tuple(tramos)
+
+
+def dibujar_qr_vectorial(c, datos: str, x: float, y: float, tamano: float, borde: int = 1):
+    """Dibuja un QR como rectángulos vectoriales (sin imagen intermedia)"""
+    num_modulos, tramos = _trazos_qr(datos, borde)
+    modulo = tamano / num_modulos
+
+    c.saveState()
+    c.setFillColor(colors.white)
+    c.rect(x, y, tamano, tamano, stroke=0, fill=1)
+
+    trazo = c.beginPath()
+    for fila, columna, largo in tramos:
+        # La fila 0 de la matriz es la superior
+        trazo.rect(x + columna * modulo, y + tamano - (fila + 1) * modulo, largo * modulo, modulo)
+    c.setFillColor(colors.black)
+    c.drawPath(trazo, stroke=0, fill=1)
+    c.restoreState()
+
+
+def _dibujar_recibo_principal(c, recibo: Dict, nombre_oficina: str, ubicacion: str, es_reimpresion: bool,
+                              riegos: Optional[List[int]] = None):
+    """
+    Dibuja el recibo principal: la plantilla fija (form XObject, definida una
+    vez por documento) y encima los datos del recibo, la marca de agua y el QR.
+
+    Args:
+        riegos: Números de riego del folio; si no se indican se consultan en la BD
+    """
+    if not c.hasForm(_FORMA_RECIBO):
+        _definir_plantilla_recibo(c)
+    c.doForm(_FORMA_RECIBO)
+    
     # ===== GRID DE DATOS (texto más grande) =====
-    c.setFillColor(COLOR_TEXTO)
+    c.setFillColor(RECIBO_COLOR_TEXTO)
     c.setFont("Helvetica-Bold", 8.5)
     
     col1 = 1*cm
@@ -321,96 +420,45 @@ def _dibujar_recibo_principal(c, recibo: Dict, nombre_oficina: str, ubicacion: s
     col3 = 12*cm
     col4 = 17.5*cm
     
-    row_y = y_pos - 0.45*cm
-    
     # FILA 1
-    c.drawString(col1, row_y, f"NO. RECIBO: {recibo['folio']}")
-    c.drawString(col2, row_y, f"No. Lote: {recibo['numero_lote']}")
-    c.drawString(col3, row_y, f"No. Riego: {recibo['numero_riego']}")
-    c.drawString(col4, row_y, f"Barrio: {recibo['barrio']}")
-    
-    row_y -= 0.45*cm
+    c.drawString(col1, _Y_FILA_1, f"NO. RECIBO: {recibo['folio']}")
+    c.drawString(col2, _Y_FILA_1, f"No. Lote: {recibo['numero_lote']}")
+    c.drawString(col3, _Y_FILA_1, f"No. Riego: {recibo['numero_riego']}")
+    c.drawString(col4, _Y_FILA_1, f"Barrio: {recibo['barrio']}")
     
     # FILA 2
     col1_fila2 = 1*cm
     col2_fila2 = 8.5*cm
     col3_fila2 = 16*cm
     
-    c.drawString(col1_fila2, row_y, f"Cultivo: {recibo['cultivo']}")
-    c.drawString(col2_fila2, row_y, f"Superficie: {recibo['superficie']} ha")
-    c.drawString(col3_fila2, row_y, f"Ciclo: {recibo['ciclo']}")
-    
-    # ===== RECIBÍ DE (más espacio y texto más grande) =====
-    y_pos = row_y - 0.95*cm
-    c.setFillColor(COLOR_TEXTO_GRIS)
-    c.setFont("Helvetica", 8.5)
-    c.drawString(0.8*cm, y_pos, "Recibí de:")
-    
-    c.setFillColor(COLOR_TEXTO)
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(2.2*cm, y_pos, recibo['nombre'].upper())
-    
-    # ===== CONCEPTO (más espacio) =====
-    y_pos -= 0.5*cm
-    c.setStrokeColor(COLOR_BEIGE_OSCURO)
-    c.line(0.8*cm, y_pos, RECIBO_ANCHO - 0.8*cm, y_pos)
-    
-    y_pos -= 0.3*cm
-    c.setFillColor(COLOR_TEXTO_GRIS)
-    c.setFont("Helvetica", 8)
-    c.drawString(0.8*cm, y_pos, "Concepto: Pago de cuota de riego para el ciclo agrícola")
-    
-    # ===== TOTAL + MONTO (más espacio y texto más grande) =====
-    y_pos -= 0.5*cm
+    c.drawString(col1_fila2, _Y_FILA_2, f"Cultivo: {recibo['cultivo']}")
+    c.drawString(col2_fila2, _Y_FILA_2, f"Superficie: {recibo['superficie']} ha")
+    c.drawString(col3_fila2, _Y_FILA_2, f"Ciclo: {recibo['ciclo']}")
     
-    c.setFillColor(COLOR_TEXTO)
+    # ===== RECIBÍ DE =====
+    c.setFillColor(RECIBO_COLOR_TEXTO)
     c.setFont("Helvetica-Bold", 11)
-    c.drawString(0.8*cm, y_pos, "TOTAL")
-    
-    # Caja del monto (más grande)
-    monto_x = RECIBO_ANCHO - 5*cm
-    c.setFillColor(colors.white)
-    c.setStrokeColor(COLOR_VERDE)
-    c.setLineWidth(1.5)
-    c.roundRect(monto_x, y_pos - 0.35*cm, 4.2*cm, 0.75*cm, 
-                0.25*cm, stroke=1, fill=1)
-    
-    c.setFillColor(COLOR_TEXTO_GRIS)
-    c.setFont("Helvetica", 6.5)
-    c.drawString(monto_x + 0.2*cm, y_pos + 0.15*cm, "(pago en efectivo)")
+    c.drawString(2.2*cm, _Y_RECIBI, recibo['nombre'].upper())
     
-    c.setFillColor(COLOR_TEXTO)
+    # ===== MONTO =====
+    c.setFillColor(RECIBO_COLOR_TEXTO)
     c.setFont("Helvetica-Bold", 15)
-    c.drawRightString(monto_x + 4*cm, y_pos - 0.15*cm, f"${recibo['costo']:.2f}")
-    
-    # ===== FOOTER (más espacio) =====
-    y_pos -= 0.9*cm
-    c.setStrokeColor(COLOR_BEIGE_OSCURO)
-    c.setLineWidth(0.5)
-    c.line(0.8*cm, y_pos, RECIBO_ANCHO - 0.8*cm, y_pos)
+    c.drawRightString(_MONTO_X + 4*cm, _Y_TOTAL - 0.15*cm, f"${recibo['costo']:.2f}")
     
-    y_pos -= 0.3*cm
-    c.setFillColor(COLOR_TEXTO_GRIS)
+    # ===== FECHA Y HORA =====
+    c.setFillColor(RECIBO_COLOR_TEXTO_GRIS)
     c.setFont("Helvetica", 7.5)
     
     fecha_obj = datetime.strptime(recibo['fecha'], '%Y-%m-%d')
-    # DIRECCIÓN ELIMINADA, SOLO FECHA
-    c.drawString(0.8*cm, y_pos, f"Fecha: {fecha_obj.strftime('%d/%m/%Y')}")
+    c.drawString(0.8*cm, _Y_FECHA, f"Fecha: {fecha_obj.strftime('%d/%m/%Y')}")
     
-    y_pos -= 0.28*cm
     hora_obj = datetime.strptime(recibo['hora'], '%H:%M:%S')
     am_pm = "p.m." if hora_obj.hour >= 12 else "a.m."
     hora_12 = hora_obj.hour if hora_obj.hour <= 12 else hora_obj.hour - 12
     if hora_12 == 0:
         hora_12 = 12
     
-    c.drawString(0.8*cm, y_pos, f"Hora: {hora_12:02d}:{hora_obj.minute:02d}:{hora_obj.second:02d} {am_pm}")
-    
-    # Firma (más espacio)
-    c.drawRightString(RECIBO_ANCHO - 0.8*cm, y_pos + 0.28*cm, "Firma Recaudador")
-    c.line(RECIBO_ANCHO - 4*cm, y_pos + 0.18*cm, RECIBO_ANCHO - 0.8*cm, y_pos + 0.18*cm)
-    
-    # LEYENDA LEGAL ELIMINADA
+    c.drawString(0.8*cm, _Y_HORA, f"Hora: {hora_12:02d}:{hora_obj.minute:02d}:{hora_obj.second:02d} {am_pm}")
     
     # ===== MARCA DE AGUA (CENTRADA VERTICAL Y HORIZONTALMENTE) =====
     if es_reimpresion:
@@ -424,51 +472,15 @@ def _dibujar_recibo_principal(c, recibo: Dict, nombre_oficina: str, ubicacion: s
     # ===== CÓDIGO QR =====
     # Datos: lote|nombre|folio|cultivo|superficie|lista_riegos|paraje
     
-    # Calcular lista de riegos para este folio
-    recibos_folio = obtener_recibos_por_folio(recibo['folio'])
-    # Ordenar por número de riego
-    recibos_folio.sort(key=lambda x: x['numero_riego'])
-    lista_riegos = ",".join([str(r['numero_riego']) for r in recibos_folio])
+    # Lista de riegos del folio (el llamador ya la tiene; si no, se consulta)
+    if riegos is None:
+        riegos = [r['numero_riego'] for r in obtener_recibos_por_folio(recibo['folio'])]
+    lista_riegos = ",".join(str(n) for n in sorted(riegos))
     
     qr_data = f"{recibo['numero_lote']}|{recibo['nombre']}|{recibo['folio']}|{recibo['cultivo']}|{recibo['superficie']}|{lista_riegos}|{recibo['barrio']}"
     
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=1,
-    )
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    
-    img_qr = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convertir a formato compatible con ReportLab
-    img_buffer = BytesIO()
-    img_qr.save(img_buffer)
-    img_buffer.seek(0)
-    
-    # Dibujar QR
-    qr_size = 2.2 * cm # Reducimos un poco el tamaño
-    qr_x = 0.8 * cm
-    qr_y = 0.7 * cm # Bajamos más la posición
-    
-    # Contorno del QR
-    c.setStrokeColor(COLOR_VERDE)
-    c.setLineWidth(1)
-    c.rect(qr_x - 0.1*cm, qr_y - 0.1*cm, qr_size + 0.2*cm, qr_size + 0.2*cm, stroke=1, fill=0)
-    
-    c.drawImage(ImageReader(img_buffer), qr_x, qr_y, width=qr_size, height=qr_size)
-    
-    # ===== CAJA "NO ESCANEAR QR" =====
-    # Caja debajo
-    c.setFillColor(COLOR_VERDE) # Mismo color del header
-    c.roundRect(qr_x, qr_y - 0.5*cm, qr_size, 0.4*cm, 0.1*cm, stroke=0, fill=1)
-    
-    # Texto en la caja
-    c.setFillColor(COLOR_TEXTO)
-    c.setFont("Helvetica-Bold", 6)
-    c.drawCentredString(qr_x + qr_size/2, qr_y - 0.35*cm, "NO ESCANEAR QR")
+    # Dibujar QR (contorno y leyenda forman parte de la plantilla)
+    dibujar_qr_vectorial(c, qr_data, _QR_X, _QR_Y, _QR_TAMANO)
 
 # ==================== REPORTE DIARIO ====================
 
@@ -580,6 +592,7 @@ def generar_reporte_diario(fecha: str, recibos: List[Dict]) -> str:
         c.drawString(margen_izq, y_pos, f"Total de recibos emitidos: {len(recibos)}")
 
     c.save()
+    catalogo_reportes.registrar_reporte(filepath, catalogo_reportes.VENTA_DIA_PDF, fecha)
     return filepath
 
 def generar_reporte_mensual_pdf(anio: int, mes: int, recibos: List[Dict]) -> str:
@@ -688,6 +701,7 @@ def generar_reporte_mensual_pdf(anio: int, mes: int, recibos: List[Dict]) -> str
         c.drawString(margen_izq, y_pos, f"Total de recibos emitidos: {len(recibos)}")
 
     c.save()
+    catalogo_reportes.registrar_reporte(filepath, catalogo_reportes.MENSUAL, f"{anio}-{mes:02d}")
     return filepath
 
 # ==================== IMPRESIÓN DIRECTA (NO TEMPORALES) ====================
@@ -804,65 +818,33 @@ def abrir_pdf(ruta_pdf: str):
 
 # ==================== EXPORTACIÓN A EXCEL ====================
 
-def exportar_a_excel(recibos: List[Dict], filename: str) -> str:
-    """Exporta una lista de recibos a un archivo Excel"""
+def exportar_a_excel(recibos: Iterable[Dict], filename: str) -> str:
+    """
+    Exporta recibos a un archivo Excel. Acepta cualquier iterable (p.ej. un
+    cursor), las filas se escriben conforme llegan.
+    """
     try:
-        import openpyxl
-        from openpyxl.styles import Font, Alignment, PatternFill
-
-        # Crear libro de trabajo
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Recibos"
-
-        # Encabezados
-        headers = ['Folio', 'Fecha', 'Hora', 'Lote', 'Nombre', 'Localidad', 'Barrio',
-                   'Superficie', 'Cultivo', 'Riego No.', 'Acción', 'Costo']
-
-        # Estilo de encabezados
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
-
-        # Datos
-        for row, recibo in enumerate(recibos, 2):
-            ws.cell(row=row, column=1, value=recibo['folio'])
-            ws.cell(row=row, column=2, value=recibo['fecha'])
-            ws.cell(row=row, column=3, value=recibo['hora'])
-            ws.cell(row=row, column=4, value=recibo['numero_lote'])
-            ws.cell(row=row, column=5, value=recibo['nombre'])
-            ws.cell(row=row, column=6, value=recibo['localidad'])
-            ws.cell(row=row, column=7, value=recibo['barrio'])
-            ws.cell(row=row, column=8, value=recibo['superficie'])
-            ws.cell(row=row, column=9, value=recibo['cultivo'])
-            ws.cell(row=row, column=10, value=recibo['numero_riego'])
-            ws.cell(row=row, column=11, value=recibo['tipo_accion'])
-            ws.cell(row=row, column=12, value=recibo['costo'])
-
-        # Ajustar anchos de columna
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except Exception:
-                    pass
-            adjusted_width = min((max_length + 2), 50)
-            ws.column_dimensions[column].width = adjusted_width
-
-        # Guardar archivo
+        from modules.excel import EscritorExcel, ESTILO_ENCABEZADO
+
         reportes_dir = os.path.join('database', 'reportes')
-        os.makedirs(reportes_dir, exist_ok=True)
         filepath = os.path.join(reportes_dir, filename)
-        wb.save(filepath)
 
+        # Folio, Fecha, Hora, Lote, Nombre, Localidad, Barrio, Superficie, Cultivo, Riego, Acción, Costo
+        excel = EscritorExcel(filepath, "Recibos", [8, 12, 10, 8, 35, 22, 16, 11, 12, 10, 16, 10])
+
+        excel.agregar_fila(['Folio', 'Fecha', 'Hora', 'Lote', 'Nombre', 'Localidad', 'Barrio',
+                            'Superficie', 'Cultivo', 'Riego No.', 'Acción', 'Costo'],
+                           ESTILO_ENCABEZADO)
+
+        for recibo in recibos:
+            excel.agregar_fila([
+                recibo['folio'], recibo['fecha'], recibo['hora'], recibo['numero_lote'],
+                recibo['nombre'], recibo['localidad'], recibo['barrio'], recibo['superficie'],
+                recibo['cultivo'], recibo['numero_riego'], recibo['tipo_accion'], recibo['costo']
+            ])
+
+        excel.guardar()
+        catalogo_reportes.registrar_reporte(filepath, catalogo_reportes.OTROS)
         return filepath
 
     except ImportError:
@@ -885,13 +867,11 @@ def generar_corte_caja_excel(fecha: str, recibos: List[Dict]) -> str:
     Returns:
         Ruta del archivo Excel generado
     """
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from openpyxl.utils import get_column_letter
+    from openpyxl.styles import Font
+    from modules.excel import (EscritorExcel, BORDE_DELGADO, RELLENO_AZUL, RELLENO_AZUL_OSCURO,
+                               RELLENO_VERDE_CLARO, CENTRADO, CENTRADO_VERTICAL, DERECHA, FORMATO_MONEDA)
     
-    # Crear directorio si no existe
     reportes_dir = os.path.join('database', 'reportes')
-    os.makedirs(reportes_dir, exist_ok=True)
     
     # Nombre del archivo
     fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
@@ -899,240 +879,146 @@ def generar_corte_caja_excel(fecha: str, recibos: List[Dict]) -> str:
     nombre_archivo = f"corte_caja_{fecha_str}.xlsx"
     ruta_excel = os.path.join(reportes_dir, nombre_archivo)
     
-    # Crear workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Corte de Caja"
+    # ===== ANCHOS DE COLUMNA (se fijan antes de escribir) =====
+    # FOLIO, NO DE LOTE, CICLO, BARRIO, CULTIVO, SUPERFICIE, RIEGO, CAMPESINO, COBRO, FECHA
+    excel = EscritorExcel(ruta_excel, "Corte de Caja", [8, 10, 10, 12, 12, 14, 13, 18, 15, 12])
     
     # ===== ESTILOS =====
-    titulo_font = Font(name='Calibri', size=16, bold=True, color='FFFFFF')
-    titulo_fill = PatternFill(start_color='1F497D', end_color='1F497D', fill_type='solid')
-    
-    header_font = Font(name='Calibri', size=11, bold=True, color='FFFFFF')
-    header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    header_alignment = Alignment(horizontal='center', vertical='center')
-    
-    total_font = Font(name='Calibri', size=12, bold=True)
-    total_fill = PatternFill(start_color='E2EFDA', end_color='E2EFDA', fill_type='solid')
+    estilo_titulo = {'font': Font(name='Calibri', size=16, bold=True, color='FFFFFF'),
+                     'fill': RELLENO_AZUL_OSCURO, 'alignment': CENTRADO_VERTICAL}
+    estilo_header = {'font': Font(name='Calibri', size=11, bold=True, color='FFFFFF'),
+                     'fill': RELLENO_AZUL, 'alignment': CENTRADO_VERTICAL, 'border': BORDE_DELGADO}
+    estilo_dato = {'border': BORDE_DELGADO}
+    estilo_derecha = {'border': BORDE_DELGADO, 'alignment': DERECHA}
+    estilo_monto = {'border': BORDE_DELGADO, 'alignment': DERECHA, 'number_format': FORMATO_MONEDA}
+    estilos_fila = [estilo_dato] * 5 + [estilo_derecha, estilo_dato, estilo_dato, estilo_monto, estilo_dato]
     
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    fuente_total = Font(name='Calibri', size=12, bold=True)
     
     # ===== ENCABEZADO =====
-    ws.merge_cells('A1:J1')
-    cell_titulo = ws['A1']
-    cell_titulo.value = 'CORTE DE CAJA'
-    cell_titulo.font = titulo_font
-    cell_titulo.fill = titulo_fill
-    cell_titulo.alignment = Alignment(horizontal='center', vertical='center')
-    
-    ws.merge_cells('A2:J2')
-    cell_fecha = ws['A2']
-    cell_fecha.value = f"Fecha: {fecha_obj.strftime('%d/%m/%Y')}"
-    cell_fecha.font = Font(name='Calibri', size=12, bold=True)
-    cell_fecha.alignment = Alignment(horizontal='center')
+    excel.agregar_fila(['CORTE DE CAJA'], estilo_titulo)
+    excel.combinar(1, 10)
+    
+    excel.agregar_fila([f"Fecha: {fecha_obj.strftime('%d/%m/%Y')}"],
+                       {'font': Font(name='Calibri', size=12, bold=True), 'alignment': CENTRADO})
+    excel.combinar(1, 10)
     
     nombre_oficina = obtener_configuracion('nombre_oficina') or 'SISTEMA DE RIEGO'
-    ws.merge_cells('A3:J3')
-    cell_oficina = ws['A3']
-    cell_oficina.value = nombre_oficina
-    cell_oficina.font = Font(name='Calibri', size=11, italic=True)
-    cell_oficina.alignment = Alignment(horizontal='center')
+    excel.agregar_fila([nombre_oficina],
+                       {'font': Font(name='Calibri', size=11, italic=True), 'alignment': CENTRADO})
+    excel.combinar(1, 10)
+    excel.fila_vacia()
     
     # ===== CABECERAS (10 COLUMNAS) =====
-    headers = ['FOLIO', 'NO. LOTE', 'CICLO', 'BARRIO', 'CULTIVO', 'SUP', 
-               'RIEGO', 'RECIBI DE', 'SERVICIO', 'FECHA']
-    
-    row_num = 5
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=row_num, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = border
+    excel.agregar_fila(['FOLIO', 'NO. LOTE', 'CICLO', 'BARRIO', 'CULTIVO', 'SUP', 
+                        'RIEGO', 'RECIBI DE', 'SERVICIO', 'FECHA'], estilo_header)
     
     # ===== DATOS (10 COLUMNAS) =====
-    row_num = 6
     total_monto = 0
+    total_recibos = 0
+    nuevas_siembras = 0
+    riegos_adicionales = 0
     
     for recibo in recibos:
         if recibo.get('eliminado'):
             continue
         
-        # Columna 1: FOLIO
-        ws.cell(row=row_num, column=1, value=recibo['folio']).border = border
-        
-        # Columna 2: NO DE LOTE
-        ws.cell(row=row_num, column=2, value=recibo['numero_lote']).border = border
-        
-        # Columna 3: CICLO
-        ws.cell(row=row_num, column=3, value=recibo['ciclo']).border = border
-        
-        # Columna 4: BARRIO
-        ws.cell(row=row_num, column=4, value=recibo['barrio']).border = border
-        
-        # Columna 5: CULTIVO
-        ws.cell(row=row_num, column=5, value=recibo['cultivo']).border = border
-        
-        # Columna 6: SUPERFICIE DE LA MILPA
-        sup_cell = ws.cell(row=row_num, column=6, value=recibo['superficie'])
-        sup_cell.border = border
-        sup_cell.alignment = Alignment(horizontal='right')
-        
-        # Columna 7: RIEGO DE LA MILPA
-        ws.cell(row=row_num, column=7, value=recibo['numero_riego']).border = border
-        
-        # Columna 8: CAMPESINO
-        ws.cell(row=row_num, column=8, value=recibo['nombre']).border = border
-        
-        # Columna 9: CUANTO SE COBRA
-        monto_cell = ws.cell(row=row_num, column=9, value=recibo['costo'])
-        monto_cell.border = border
-        monto_cell.number_format = '$#,##0.00'
-        monto_cell.alignment = Alignment(horizontal='right')
-        
-        # Columna 10: FECHA
-        ws.cell(row=row_num, column=10, value=recibo['fecha']).border = border
+        excel.agregar_fila([
+            recibo['folio'],
+            recibo['numero_lote'],
+            recibo['ciclo'],
+            recibo['barrio'],
+            recibo['cultivo'],
+            recibo['superficie'],
+            recibo['numero_riego'],
+            recibo['nombre'],
+            recibo['costo'],
+            recibo['fecha']
+        ], estilos_fila)
         
         total_monto += recibo['costo']
-        row_num += 1
+        total_recibos += 1
+        if recibo['tipo_accion'] == 'Nueva siembra':
+            nuevas_siembras += 1
+        elif recibo['tipo_accion'] == 'Riego adicional':
+            riegos_adicionales += 1
     
     # ===== TOTALES =====
-    row_num += 1
-    ws.merge_cells(f'A{row_num}:H{row_num}')
-    cell_total_label = ws.cell(row=row_num, column=1)
-    cell_total_label.value = 'TOTAL DEL DÍA:'
-    cell_total_label.font = total_font
-    cell_total_label.fill = total_fill
-    cell_total_label.alignment = Alignment(horizontal='right')
-    cell_total_label.border = border
-    
-    cell_total_monto = ws.cell(row=row_num, column=9, value=total_monto)
-    cell_total_monto.fill = total_fill
-    cell_total_monto.number_format = '$#,##0.00'
-    cell_total_monto.alignment = Alignment(horizontal='right')
-    cell_total_monto.border = border
-    
-    ws.cell(row=row_num, column=10).border = border
+    excel.fila_vacia()
+    estilo_total = {'font': fuente_total, 'fill': RELLENO_VERDE_CLARO, 'alignment': DERECHA, 'border': BORDE_DELGADO}
+    excel.agregar_fila(
+        ['TOTAL DEL DÍA:'] + [None] * 7 + [total_monto, None],
+        [estilo_total] + [None] * 7 + [
+            {'fill': RELLENO_VERDE_CLARO, 'number_format': FORMATO_MONEDA,
+             'alignment': DERECHA, 'border': BORDE_DELGADO},
+            estilo_dato
+        ]
+    )
+    excel.combinar(1, 8)
     
     # ===== ESTADÍSTICAS =====
-    row_num += 2
-    ws.cell(row=row_num, column=1, value='ESTADÍSTICAS:').font = Font(bold=True)
-    row_num += 1
-    
-    ws.cell(row=row_num, column=1, value=f"Total de recibos:")
-    ws.cell(row=row_num, column=2, value=len([r for r in recibos if not r.get('eliminado')]))
-    row_num += 1
-    
-    # Recibos por tipo
-    nuevas_siembras = len([r for r in recibos if r['tipo_accion'] == 'Nueva siembra' and not r.get('eliminado')])
-    riegos_adicionales = len([r for r in recibos if r['tipo_accion'] == 'Riego adicional' and not r.get('eliminado')])
-    
-    ws.cell(row=row_num, column=1, value=f"Nuevas siembras:")
-    ws.cell(row=row_num, column=2, value=nuevas_siembras)
-    row_num += 1
-    
-    ws.cell(row=row_num, column=1, value=f"Riegos adicionales:")
-    ws.cell(row=row_num, column=2, value=riegos_adicionales)
-    row_num += 1
+    excel.fila_vacia()
+    excel.agregar_fila(['ESTADÍSTICAS:'], {'font': Font(bold=True)})
+    excel.agregar_fila(["Total de recibos:", total_recibos])
+    excel.agregar_fila(["Nuevas siembras:", nuevas_siembras])
+    excel.agregar_fila(["Riegos adicionales:", riegos_adicionales])
     
     # ===== PIE DE PÁGINA =====
-    row_num += 2
-    ws.merge_cells(f'A{row_num}:J{row_num}')
-    cell_generado = ws.cell(row=row_num, column=1)
-    cell_generado.value = f"Generado el {datetime.now().strftime('%d/%m/%Y a las %H:%M:%S')}"
-    cell_generado.font = Font(name='Calibri', size=9, italic=True, color='808080')
-    cell_generado.alignment = Alignment(horizontal='center')
-    
-    # ===== AJUSTAR ANCHOS DE COLUMNA =====
-    ws.column_dimensions['A'].width = 8      # FOLIO
-    ws.column_dimensions['B'].width = 10     # NO DE LOTE
-    ws.column_dimensions['C'].width = 10     # CICLO
-    ws.column_dimensions['D'].width = 12     # BARRIO
-    ws.column_dimensions['E'].width = 12     # CULTIVO
-    ws.column_dimensions['F'].width = 14     # SUPERFICIE DE LA MILPA
-    ws.column_dimensions['G'].width = 13     # RIEGO DE LA MILPA
-    ws.column_dimensions['H'].width = 18     # CAMPESINO
-    ws.column_dimensions['I'].width = 15     # CUANTO SE COBRA
-    ws.column_dimensions['J'].width = 12     # FECHA
+    excel.fila_vacia(2)
+    excel.agregar_fila([f"Generado el {datetime.now().strftime('%d/%m/%Y a las %H:%M:%S')}"],
+                       {'font': Font(name='Calibri', size=9, italic=True, color='808080'), 'alignment': CENTRADO})
+    excel.combinar(1, 10)
     
     # Guardar archivo
-    wb.save(ruta_excel)
+    excel.guardar()
+    catalogo_reportes.registrar_reporte(ruta_excel, catalogo_reportes.VENTA_DIA_EXCEL, fecha)
     print(f"✅ Corte de caja Excel generado: {ruta_excel}")
     return ruta_excel
 
-def generar_reporte_mensual_excel(anio: int, mes: int, recibos: List[Dict]) -> str:
+def generar_reporte_mensual_excel(anio: int, mes: int, recibos: Iterable[Dict]) -> str:
     """
     Genera un archivo Excel con el reporte mensual.
+    Los recibos se escriben conforme se recorren (acepta un cursor).
     """
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    from openpyxl.styles import Font
+    from modules.excel import EscritorExcel, ESTILO_ENCABEZADO, ESTILO_NEGRITA, ESTILO_MONEDA
     
     reportes_dir = os.path.join('database', 'reportes')
-    os.makedirs(reportes_dir, exist_ok=True)
-    
     filename = f"reporte_mensual_{anio}_{mes:02d}.xlsx"
     filepath = os.path.join(reportes_dir, filename)
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"Reporte {mes:02d}-{anio}"
-    
-    # Estilos
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    # FOLIO, FECHA, HORA, LOTE, NOMBRE, CULTIVO, RIEGO, ACCIÓN, COSTO
+    excel = EscritorExcel(filepath, f"Reporte {mes:02d}-{anio}", [8, 12, 10, 8, 35, 12, 8, 16, 12])
     
     # Título
     meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", 
              "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
-    ws['A1'] = f"REPORTE MENSUAL DE VENTAS - {meses[mes-1].upper()} {anio}"
-    ws['A1'].font = Font(size=14, bold=True)
+    excel.agregar_fila([f"REPORTE MENSUAL DE VENTAS - {meses[mes-1].upper()} {anio}"],
+                       {'font': Font(size=14, bold=True)})
+    excel.fila_vacia()
     
     # Encabezados
-    headers = ['FOLIO', 'FECHA', 'HORA', 'LOTE', 'NOMBRE', 'CULTIVO', 'RIEGO', 'ACCIÓN', 'COSTO']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
+    excel.agregar_fila(['FOLIO', 'FECHA', 'HORA', 'LOTE', 'NOMBRE', 'CULTIVO', 'RIEGO', 'ACCIÓN', 'COSTO'],
+                       ESTILO_ENCABEZADO)
     
     # Datos
+    estilos_fila = [None] * 8 + [ESTILO_MONEDA]
     total = 0
-    for row, recibo in enumerate(recibos, 4):
-        ws.cell(row=row, column=1, value=recibo['folio'])
-        ws.cell(row=row, column=2, value=recibo['fecha'])
-        ws.cell(row=row, column=3, value=recibo['hora'])
-        ws.cell(row=row, column=4, value=recibo['numero_lote'])
-        ws.cell(row=row, column=5, value=recibo['nombre'])
-        ws.cell(row=row, column=6, value=recibo['cultivo'])
-        ws.cell(row=row, column=7, value=recibo['numero_riego'])
-        ws.cell(row=row, column=8, value=recibo['tipo_accion'])
-        ws.cell(row=row, column=9, value=recibo['costo']).number_format = '$#,##0.00'
+    for recibo in recibos:
+        excel.agregar_fila([
+            recibo['folio'], recibo['fecha'], recibo['hora'], recibo['numero_lote'],
+            recibo['nombre'], recibo['cultivo'], recibo['numero_riego'],
+            recibo['tipo_accion'], recibo['costo']
+        ], estilos_fila)
         total += recibo['costo']
         
     # Total
-    row_total = len(recibos) + 5
-    ws.cell(row=row_total, column=8, value="TOTAL:").font = Font(bold=True)
-    ws.cell(row=row_total, column=9, value=total).font = Font(bold=True)
-    ws.cell(row=row_total, column=9).number_format = '$#,##0.00'
-    
-    # Ajustar anchos
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except: pass
-        ws.column_dimensions[column].width = min(max_length + 2, 50)
+    excel.fila_vacia()
+    excel.agregar_fila([None] * 7 + ["TOTAL:", total],
+                       [None] * 7 + [ESTILO_NEGRITA, dict(ESTILO_NEGRITA, **ESTILO_MONEDA)])
         
-    wb.save(filepath)
+    excel.guardar()
+    catalogo_reportes.registrar_reporte(filepath, catalogo_reportes.MENSUAL, f"{anio}-{mes:02d}")
     return filepath
     
 def generar_pdf_estadisticas(estadisticas: Dict, estadisticas_cultivo: List[Dict]) -> str:
@@ -1151,11 +1037,7 @@ def generar_pdf_estadisticas(estadisticas: Dict, estadisticas_cultivo: List[Dict
     from reportlab.lib import colors
     from reportlab.pdfgen import canvas as pdfcanvas
     from reportlab.platypus import Table, TableStyle
-    import matplotlib
-    matplotlib.use('Agg')
-    import matplotlib.pyplot as plt
-    import numpy as np
-    import tempfile
+    from modules.graficas import obtener_graficas
     
     # Crear directorio si no existe
     reportes_dir = os.path.join("database", "reportes")
@@ -1177,170 +1059,22 @@ def generar_pdf_estadisticas(estadisticas: Dict, estadisticas_cultivo: List[Dict
     COLOR_FONDO_CLARO = colors.HexColor("#f8f9fa")
     COLOR_FONDO_TABLA = colors.HexColor("#e8f4f8")
     
-    # ===== FUNCIONES AUXILIARES PARA GRÁFICOS MEJORADOS =====
-    def crear_grafico_barras_cultivos_pro(estadisticas_cultivo, ruta_imagen):
-        """Crea un gráfico de barras profesional con gradientes"""
-        if not estadisticas_cultivo:
-            return None
-        
-        cultivos = [cult['cultivo'] for cult in estadisticas_cultivo]
-        superficies = [cult['superficie_total'] for cult in estadisticas_cultivo]
-        
-        fig, ax = plt.subplots(figsize=(11, 6), facecolor='white')
-        
-        # Colores degradados profesionales
-        colores_base = ['#2e7d32', '#1976d2', '#f57c00', '#d32f2f', '#7b1fa2', '#0097a7', '#fbc02d', '#5d4037']
-        colores = colores_base[:len(cultivos)]
-        
-        # Crear barras con efecto visual
-        barras = ax.bar(range(len(cultivos)), superficies, color=colores, 
-                        edgecolor='white', linewidth=2.5, alpha=0.9)
-        
-        # Añadir valores sobre las barras con mejor formato
-        for i, (barra, valor) in enumerate(zip(barras, superficies)):
-            altura = barra.get_height()
-            ax.text(barra.get_x() + barra.get_width()/2., altura + max(superficies)*0.03,
-                    f'{valor:.2f} ha',
-                    ha='center', va='bottom', fontsize=11, fontweight='bold',
-                    bbox=dict(boxstyle='round,pad=0.4', facecolor='white', 
-                            edgecolor=colores[i % len(colores)], linewidth=2, alpha=0.95))
-        
-        ax.set_xticks(range(len(cultivos)))
-        ax.set_xticklabels(cultivos, rotation=35, ha='right', fontsize=11, fontweight='600')
-        ax.set_xlabel('Tipo de Cultivo', fontsize=13, fontweight='bold', labelpad=10)
-        ax.set_ylabel('Superficie (hectáreas)', fontsize=13, fontweight='bold', labelpad=10)
-        ax.set_title('Distribución de Superficie por Tipo de Cultivo', 
-                     fontsize=15, fontweight='bold', pad=20, color='#1a5490')
-        
-        # Mejorar grid
-        ax.grid(axis='y', alpha=0.3, linestyle='--', linewidth=1)
-        ax.set_axisbelow(True)
-        
-        # Añadir línea promedio
-        promedio = np.mean(superficies)
-        ax.axhline(y=promedio, color='red', linestyle='--', linewidth=2, alpha=0.7, 
-                  label=f'Promedio: {promedio:.2f} ha')
-        ax.legend(loc='upper right', fontsize=10, framealpha=0.95)
-        
-        # Mejorar estilo de ejes
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_linewidth(1.5)
-        ax.spines['bottom'].set_linewidth(1.5)
-        
-        plt.tight_layout()
-        plt.savefig(ruta_imagen, dpi=300, bbox_inches='tight', facecolor='white')
-        plt.close()
-        return ruta_imagen
-    
-    def crear_grafico_pastel_pro(estadisticas_cultivo, ruta_imagen):
-        """Crea un gráfico de dona profesional con detalles mejorados"""
-        if not estadisticas_cultivo:
-            return None
-        
-        cultivos = [cult['cultivo'] for cult in estadisticas_cultivo]
-        superficies = [cult['superficie_total'] for cult in estadisticas_cultivo]
-        
-        fig, ax = plt.subplots(figsize=(10, 10), facecolor='white')
-        
-        # Colores profesionales
-        colores = ['#2e7d32', '#1976d2', '#f57c00', '#d32f2f', '#7b1fa2', '#0097a7', '#fbc02d', '#5d4037']
-        colores = colores[:len(cultivos)]
-        
-        # Crear efecto de explosión sutil para el mayor valor
-        explode = [0.08 if i == superficies.index(max(superficies)) else 0 for i in range(len(superficies))]
-        
-        def autopct_format(pct):
-            return f'{pct:.1f}%' if pct > 2 else ''
-        
-        # Crear gráfico de dona
-        wedges, texts, autotexts = ax.pie(superficies, labels=None, autopct=autopct_format,
-                                            colors=colores, startangle=90, explode=explode,
-                                            textprops={'fontsize': 12, 'fontweight': 'bold'},
-                                            wedgeprops={'edgecolor': 'white', 'linewidth': 3, 
-                                                       'antialiased': True},
-                                            pctdistance=0.82)
-        
-        # Crear el agujero de la dona
-        centre_circle = plt.Circle((0, 0), 0.65, fc='white', linewidth=2.5, edgecolor='#1a5490')
-        ax.add_artist(centre_circle)
-        
-        # Texto central
-        total_superficie = sum(superficies)
-        ax.text(0, 0.08, f'{total_superficie:.2f}', ha='center', va='center',
-                fontsize=30, fontweight='bold', color='#1a5490')
-        ax.text(0, -0.18, 'hectáreas\ntotales', ha='center', va='center',
-                fontsize=12, color='#666666', style='italic')
-        
-        # Mejorar textos de porcentaje
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(11)
-        
-        # Leyenda mejorada con superficie
-        leyendas = [f'{cultivo}: {sup:.2f} ha' for cultivo, sup in zip(cultivos, superficies)]
-        ax.legend(wedges, leyendas, title="Cultivos", loc="center left",
-                 bbox_to_anchor=(1, 0, 0.5, 1), fontsize=11, title_fontsize=13,
-                 frameon=True, shadow=True, fancybox=True)
-        
-        ax.set_title('Distribución Porcentual de Cultivos', 
-                     fontsize=16, fontweight='bold', pad=25, color='#1a5490')
-        
-        plt.tight_layout()
-        plt.savefig(ruta_imagen, dpi=300, bbox_inches='tight', facecolor='white')
-        plt.close()
-        return ruta_imagen
-    
-    def crear_grafico_comparativo(estadisticas_cultivo, ruta_imagen):
-        """Crea un gráfico comparativo de campesinos vs superficie"""
-        if not estadisticas_cultivo:
-            return None
-        
+    # ===== GRÁFICOS (caché en disco; sólo se dibujan si cambiaron los datos) =====
+    rutas_graficos = {}
+    if estadisticas_cultivo:
         cultivos = [cult['cultivo'] for cult in estadisticas_cultivo]
-        campesinos = [cult['num_siembras'] for cult in estadisticas_cultivo]
         superficies = [cult['superficie_total'] for cult in estadisticas_cultivo]
-        
-        fig, ax1 = plt.subplots(figsize=(11, 6), facecolor='white')
-        
-        x = np.arange(len(cultivos))
-        width = 0.38
-        
-        # Primer eje: Campesinos
-        color1 = '#1976d2'
-        ax1.bar(x - width/2, campesinos, width, label='Campesinos', 
-                color=color1, alpha=0.85, edgecolor='white', linewidth=2.5)
-        ax1.set_xlabel('Cultivo', fontsize=13, fontweight='bold', labelpad=10)
-        ax1.set_ylabel('Número de Campesinos', color=color1, fontsize=12, fontweight='bold', labelpad=10)
-        ax1.tick_params(axis='y', labelcolor=color1, labelsize=10)
-        ax1.set_xticks(x)
-        ax1.set_xticklabels(cultivos, rotation=35, ha='right', fontsize=10, fontweight='600')
-        
-        # Segundo eje: Superficie
-        ax2 = ax1.twinx()
-        color2 = '#2e7d32'
-        ax2.bar(x + width/2, superficies, width, label='Superficie (ha)',
-                color=color2, alpha=0.85, edgecolor='white', linewidth=2.5)
-        ax2.set_ylabel('Superficie (hectáreas)', color=color2, fontsize=12, fontweight='bold', labelpad=10)
-        ax2.tick_params(axis='y', labelcolor=color2, labelsize=10)
-        
-        # Título y leyenda
-        plt.title('Comparativa: Campesinos vs Superficie por Cultivo',
-                 fontsize=15, fontweight='bold', pad=20, color='#1a5490')
-        
-        # Leyenda combinada
-        lines1, labels1 = ax1.get_legend_handles_labels()
-        lines2, labels2 = ax2.get_legend_handles_labels()
-        ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper right', 
-                  fontsize=10, framealpha=0.95, shadow=True)
-        
-        ax1.grid(axis='y', alpha=0.3, linestyle='--', linewidth=1)
-        ax1.set_axisbelow(True)
-        
-        fig.tight_layout()
-        plt.savefig(ruta_imagen, dpi=300, bbox_inches='tight', facecolor='white')
-        plt.close()
-        return ruta_imagen
+        siembras = [cult['num_siembras'] for cult in estadisticas_cultivo]
+        peticiones = [
+            ('barras_cultivos', {'cultivos': cultivos, 'superficies': superficies}),
+            ('dona_cultivos', {'cultivos': cultivos, 'superficies': superficies}),
+            ('comparativo_cultivos', {'cultivos': cultivos, 'superficies': superficies, 'siembras': siembras}),
+        ]
+        try:
+            rutas = obtener_graficas(peticiones)
+            rutas_graficos = {tipo: ruta for (tipo, _), ruta in zip(peticiones, rutas)}
+        except Exception as e:
+            print(f"Error al generar gráficos de estadísticas: {e}")
     
     # ===== FUNCIÓN PARA DIBUJAR ENCABEZADO PROFESIONAL =====
     def dibujar_encabezado_pagina(c, numero_pagina=1):
@@ -1513,21 +1247,12 @@ def generar_pdf_estadisticas(estadisticas: Dict, estadisticas_cultivo: List[Dict
         
         ypos -= 1.8*cm
         
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            ruta_grafico_barras = tmp.name
-        
-        crear_grafico_barras_cultivos_pro(estadisticas_cultivo, ruta_grafico_barras)
-        
-        try:
-            c.drawImage(ruta_grafico_barras, 1.5*cm, ypos - 14*cm, 
-                       width=ancho - 3*cm, height=13.5*cm, preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            print(f"Error al insertar gráfico de barras: {e}")
-        finally:
+        if 'barras_cultivos' in rutas_graficos:
             try:
-                os.remove(ruta_grafico_barras)
-            except:
-                pass
+                c.drawImage(rutas_graficos['barras_cultivos'], 1.5*cm, ypos - 14*cm,
+                           width=ancho - 3*cm, height=13.5*cm, preserveAspectRatio=True, mask='auto')
+            except Exception as e:
+                print(f"Error al insertar gráfico de barras: {e}")
     
     dibujar_pie_pagina(c, 2)
     
@@ -1544,21 +1269,12 @@ def generar_pdf_estadisticas(estadisticas: Dict, estadisticas_cultivo: List[Dict
         
         ypos -= 1.8*cm
         
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            ruta_grafico_pastel = tmp.name
-        
-        crear_grafico_pastel_pro(estadisticas_cultivo, ruta_grafico_pastel)
-        
-        try:
-            c.drawImage(ruta_grafico_pastel, 0.8*cm, ypos - 15*cm,
-                       width=ancho - 1.6*cm, height=14.5*cm, preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            print(f"Error al insertar gráfico de pastel: {e}")
-        finally:
+        if 'dona_cultivos' in rutas_graficos:
             try:
-                os.remove(ruta_grafico_pastel)
-            except:
-                pass
+                c.drawImage(rutas_graficos['dona_cultivos'], 0.8*cm, ypos - 15*cm,
+                           width=ancho - 1.6*cm, height=14.5*cm, preserveAspectRatio=True, mask='auto')
+            except Exception as e:
+                print(f"Error al insertar gráfico de pastel: {e}")
     
     dibujar_pie_pagina(c, 3)
     
@@ -1575,21 +1291,12 @@ def generar_pdf_estadisticas(estadisticas: Dict, estadisticas_cultivo: List[Dict
         
         ypos -= 1.8*cm
         
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            ruta_grafico_comparativo = tmp.name
-        
-        crear_grafico_comparativo(estadisticas_cultivo, ruta_grafico_comparativo)
-        
-        try:
-            c.drawImage(ruta_grafico_comparativo, 1.5*cm, ypos - 14*cm,
-                       width=ancho - 3*cm, height=13.5*cm, preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            print(f"Error al insertar gráfico comparativo: {e}")
-        finally:
+        if 'comparativo_cultivos' in rutas_graficos:
             try:
-                os.remove(ruta_grafico_comparativo)
-            except:
-                pass
+                c.drawImage(rutas_graficos['comparativo_cultivos'], 1.5*cm, ypos - 14*cm,
+                           width=ancho - 3*cm, height=13.5*cm, preserveAspectRatio=True, mask='auto')
+            except Exception as e:
+                print(f"Error al insertar gráfico comparativo: {e}")
     
     dibujar_pie_pagina(c, 4)
     
@@ -1854,6 +1561,8 @@ def generar_pdf_estadisticas(estadisticas: Dict, estadisticas_cultivo: List[Dict
     
     # Guardar PDF
     c.save()
+    catalogo_reportes.registrar_reporte(ruta_pdf, catalogo_reportes.ESTADISTICAS,
+                                        estadisticas.get('ciclo_actual') or '')
     print(f"✓ PDF profesional de estadísticas generado exitosamente: {ruta_pdf}")
     print(f"  📄 Páginas: 6")
     print(f"  📊 Gráficos: 3 (Barras, Dona, Comparativo)")
@@ -1983,36 +1692,49 @@ def generar_pdf_auditoria(registros_auditoria: List[Dict], fecha_inicio=None, fe
         c.setFillColor(colors.black)
     
     c.save()
+    catalogo_reportes.registrar_reporte(ruta_pdf, catalogo_reportes.AUDITORIA, fecha_inicio or "")
     
     print(f"✅ PDF de auditoría generado: {ruta_pdf}")
     return ruta_pdf
 
 def generar_recibo_cuota_pdf_temporal(recibo_cuota_id: int) -> str:
     """Genera el PDF temporal de un recibo de cuota de cooperación"""
-    from modules.cuotas import obtener_recibo_cuota
+    return generar_recibos_cuota_pdf_temporal([recibo_cuota_id])
+
+
+def generar_recibos_cuota_pdf_temporal(recibo_cuota_ids: List[int]) -> str:
+    """
+    Genera un solo PDF temporal con un recibo de cuota por página,
+    para mandar a la impresora una vez todo un cobro
+    """
+    from modules.cuotas import obtener_recibos_cuota
     
-    recibo = obtener_recibo_cuota(recibo_cuota_id)
+    recibos = obtener_recibos_cuota(recibo_cuota_ids)
     
-    if not recibo:
+    if not recibos or len(recibos) != len(recibo_cuota_ids):
         raise ValueError("Recibo de cuota no encontrado")
     
     nombre_oficina = obtener_configuracion('nombre_oficina') or "ASOCIACIÓN DE RIEGO"
     ubicacion = obtener_configuracion('ubicacion') or "Tezontepec de Aldama, Hgo."
     
     # Crear carpeta temporal
-    if platform.system() == 'Windows':
-        tempdir = os.path.join(os.environ.get('TEMP', os.getcwd()), 'recibos_temp')
-    else:
-        tempdir = os.path.join('/tmp', 'recibos_temp')
+    from modules.impresion import directorio_temporal
+    tempdir = directorio_temporal()
     
     os.makedirs(tempdir, exist_ok=True)
     
-    filename = f"cuota_{recibo['folio']}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
+    marca = datetime.now().strftime('%Y%m%d%H%M%S')
+    if len(recibos) == 1:
+        filename = f"cuota_{recibos[0]['folio']}_{marca}.pdf"
+    else:
+        filename = f"cuotas_{recibos[0]['id']}_{len(recibos)}_{marca}.pdf"
     filepath = os.path.join(tempdir, filename)
     
     c = canvas.Canvas(filepath, pagesize=(RECIBO_ANCHO, RECIBO_ALTO))
     
-    dibujar_recibo_cuota(c, recibo, nombre_oficina, ubicacion)
+    for recibo in recibos:
+        dibujar_recibo_cuota(c, recibo, nombre_oficina, ubicacion)
+        c.showPage()
     
     c.save()
     
@@ -2159,22 +1881,6 @@ def dibujar_recibo_cuota(c, recibo: Dict, nombre_oficina: str, ubicacion: str):
     # Generar datos del QR
     qr_data = f"CUOTA|{recibo['folio']}|{recibo['numero_lote']}|{recibo['nombre_campesino']}|{recibo['monto']}|{recibo['nombre_cuota']}"
     
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    
-    img_qr = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convertir a formato compatible con ReportLab
-    img_buffer = BytesIO()
-    img_qr.save(img_buffer)
-    img_buffer.seek(0)
-    
     # Dibujar QR
     qr_size = 2.2 * cm # Reducimos tamaño
     qr_x = 0.8 * cm
@@ -2185,7 +1891,7 @@ def dibujar_recibo_cuota(c, recibo: Dict, nombre_oficina: str, ubicacion: str):
     c.setLineWidth(1)
     c.rect(qr_x - 0.1*cm, qr_y - 0.1*cm, qr_size + 0.2*cm, qr_size + 0.2*cm, stroke=1, fill=0)
     
-    c.drawImage(ImageReader(img_buffer), qr_x, qr_y, width=qr_size, height=qr_size)
+    dibujar_qr_vectorial(c, qr_data, qr_x, qr_y, qr_size, borde=4)
     
     # ===== CAJA "NO ESCANEAR QR" =====
     c.setFillColor(COLOR_VERDE)
@@ -2331,6 +2037,7 @@ def generar_reporte_cuota_pdf(tipo_cuota_id: int) -> str:
     c.drawRightString(15*cm, ypos, f"${resumen['monto_pendiente']:.2f}")
     
     c.save()
+    catalogo_reportes.registrar_reporte(ruta_pdf, catalogo_reportes.CUOTAS_PDF)
     
     print(f"✓ Reporte de cuota generado: {ruta_pdf}")
     
@@ -2436,6 +2143,7 @@ def generar_reporte_todas_cuotas_pdf() -> str:
         ypos -= 0.4*cm
     
     c.save()
+    catalogo_reportes.registrar_reporte(ruta_pdf, catalogo_reportes.CUOTAS_PDF)
     
     print(f"✓ Reporte general de cuotas generado: {ruta_pdf}")
     
@@ -2563,6 +2271,7 @@ def generar_reporte_cuotas_dia_pdf(fecha: Optional[str] = None) -> str:
     c.drawString(2*cm, ypos - 0.3*cm, "Sistema de Control de Riegos - Módulo de Cuotas de Cooperación")
     
     c.save()
+    catalogo_reportes.registrar_reporte(ruta_pdf, catalogo_reportes.CUOTAS_PDF, fecha)
     
     print(f"✓ Reporte de cuotas del día generado: {ruta_pdf}")
     
@@ -2571,8 +2280,9 @@ def generar_reporte_cuotas_dia_pdf(fecha: Optional[str] = None) -> str:
 def generar_excel_cuotas_dia(fecha: Optional[str] = None) -> str:
     """Genera un Excel con las cuotas cobradas en un día específico"""
     from modules.cuotas import obtener_recibos_cuotas_dia
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    from openpyxl.styles import Font
+    from modules.excel import (EscritorExcel, BORDE_DELGADO, RELLENO_AZUL, RELLENO_AMARILLO,
+                               CENTRADO, DERECHA, FORMATO_MONEDA_CUOTAS)
     
     if not fecha:
         fecha = datetime.now().strftime('%Y-%m-%d')
@@ -2584,100 +2294,64 @@ def generar_excel_cuotas_dia(fecha: Optional[str] = None) -> str:
     
     # Crear Excel
     reportes_dir = os.path.join('database', 'reportes')
-    os.makedirs(reportes_dir, exist_ok=True)
     
     fecha_str = datetime.now().strftime('%Y%m%d_%H%M%S')
     nombre_archivo = f"cuotas_dia_{fecha_str}.xlsx"
     ruta_excel = os.path.join(reportes_dir, nombre_archivo)
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Cuotas del Día"
+    # AJUSTAR ANCHOS (antes de escribir)
+    excel = EscritorExcel(ruta_excel, "Cuotas del Día", [10, 10, 10, 30, 15, 25, 12, 12])
     
     # ESTILOS
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    estilo_header = {'fill': RELLENO_AZUL, 'font': Font(bold=True, color="FFFFFF", size=12),
+                     'alignment': CENTRADO, 'border': BORDE_DELGADO}
+    estilo_dato = {'border': BORDE_DELGADO}
+    estilo_monto = {'border': BORDE_DELGADO, 'number_format': FORMATO_MONEDA_CUOTAS}
+    estilos_fila = [estilo_dato] * 6 + [estilo_monto, estilo_dato]
     
     # TÍTULO
-    ws.merge_cells('A1:H1')
-    ws['A1'] = "RECAUDACIÓN DE CUOTAS DEL DÍA"
-    ws['A1'].font = Font(bold=True, size=16)
-    ws['A1'].alignment = Alignment(horizontal='center')
+    excel.agregar_fila(["RECAUDACIÓN DE CUOTAS DEL DÍA"], {'font': Font(bold=True, size=16), 'alignment': CENTRADO})
+    excel.combinar(1, 8)
     
     fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
-    ws.merge_cells('A2:H2')
-    ws['A2'] = f"Fecha: {fecha_obj.strftime('%d/%m/%Y')}"
-    ws['A2'].font = Font(size=12)
-    ws['A2'].alignment = Alignment(horizontal='center')
+    excel.agregar_fila([f"Fecha: {fecha_obj.strftime('%d/%m/%Y')}"], {'font': Font(size=12), 'alignment': CENTRADO})
+    excel.combinar(1, 8)
+    excel.fila_vacia()
     
     # RESUMEN
     total_recaudado = sum(r['monto'] for r in recibos)
-    ws['A4'] = "Total de Recibos:"
-    ws['B4'] = len(recibos)
-    ws['B4'].font = Font(bold=True)
-    
-    ws['A5'] = "Total Recaudado:"
-    ws['B5'] = total_recaudado
-    ws['B5'].font = Font(bold=True)
-    ws['B5'].number_format = '"$"#,##0.00'
+    excel.agregar_fila(["Total de Recibos:", len(recibos)], [None, {'font': Font(bold=True)}])
+    excel.agregar_fila(["Total Recaudado:", total_recaudado],
+                       [None, {'font': Font(bold=True), 'number_format': FORMATO_MONEDA_CUOTAS}])
+    excel.fila_vacia()
     
     # ENCABEZADOS
-    headers = ['Folio', 'Hora', 'Lote', 'Nombre', 'Barrio', 'Cuota', 'Monto', 'Fecha']
-    for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=7, column=col)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = border
+    excel.agregar_fila(['Folio', 'Hora', 'Lote', 'Nombre', 'Barrio', 'Cuota', 'Monto', 'Fecha'], estilo_header)
     
     # DATOS
-    for idx, recibo in enumerate(recibos, start=8):
-        ws.cell(row=idx, column=1, value=recibo['folio'])
-        ws.cell(row=idx, column=2, value=recibo['hora'][:5])  # HH:MM
-        ws.cell(row=idx, column=3, value=recibo['numero_lote'])
-        ws.cell(row=idx, column=4, value=recibo['nombre_campesino'])
-        ws.cell(row=idx, column=5, value=recibo['barrio'])
-        ws.cell(row=idx, column=6, value=recibo['nombre_cuota'])
-        ws.cell(row=idx, column=7, value=recibo['monto'])
-        ws.cell(row=idx, column=8, value=recibo['fecha'])
-        
-        # Formato moneda
-        ws.cell(row=idx, column=7).number_format = '"$"#,##0.00'
-        
-        # Bordes
-        for col in range(1, 9):
-            ws.cell(row=idx, column=col).border = border
+    for recibo in recibos:
+        excel.agregar_fila([
+            recibo['folio'],
+            recibo['hora'][:5],  # HH:MM
+            recibo['numero_lote'],
+            recibo['nombre_campesino'],
+            recibo['barrio'],
+            recibo['nombre_cuota'],
+            recibo['monto'],
+            recibo['fecha']
+        ], estilos_fila)
     
     # TOTAL AL FINAL
-    ultima_fila = len(recibos) + 8
-    ws.merge_cells(f'A{ultima_fila}:F{ultima_fila}')
-    ws[f'A{ultima_fila}'] = "TOTAL DEL DÍA:"
-    ws[f'A{ultima_fila}'].font = Font(bold=True, size=12)
-    ws[f'A{ultima_fila}'].alignment = Alignment(horizontal='right')
-    
-    ws[f'G{ultima_fila}'] = total_recaudado
-    ws[f'G{ultima_fila}'].font = Font(bold=True, size=12)
-    ws[f'G{ultima_fila}'].number_format = '"$"#,##0.00'
-    ws[f'G{ultima_fila}'].fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-    
-    # AJUSTAR ANCHOS
-    ws.column_dimensions['A'].width = 10
-    ws.column_dimensions['B'].width = 10
-    ws.column_dimensions['C'].width = 10
-    ws.column_dimensions['D'].width = 30
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 25
-    ws.column_dimensions['G'].width = 12
-    ws.column_dimensions['H'].width = 12
-    
-    wb.save(ruta_excel)
+    fuente_total = Font(bold=True, size=12)
+    excel.agregar_fila(
+        ["TOTAL DEL DÍA:"] + [None] * 5 + [total_recaudado],
+        [{'font': fuente_total, 'alignment': DERECHA}] + [None] * 5 +
+        [{'font': fuente_total, 'number_format': FORMATO_MONEDA_CUOTAS, 'fill': RELLENO_AMARILLO}]
+    )
+    excel.combinar(1, 6)
+    
+    excel.guardar()
+    catalogo_reportes.registrar_reporte(ruta_excel, catalogo_reportes.CUOTAS_EXCEL, fecha)
     
     print(f"✓ Excel de cuotas del día generado: {ruta_excel}")
     
@@ -0,0 +1,164 @@
+# modules/respaldos.py - Respaldos en Caliente de las Bases de Datos
+# Usa la API de backup de SQLite (incluye lo pendiente en el -wal) y comprime el resultado
+import os
+import re
+import gzip
+import json
+import shutil
+import hashlib
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DIRECTORIO_RESPALDOS = os.path.join('database', 'backups')
+
+# Páginas copiadas por paso; entre pasos SQLite libera el lector y las ventas siguen
+PAGINAS_POR_PASO = 512
+PAUSA_ENTRE_PASOS = 0.005
+
+# riego_backup_20250101_120000.db(.gz), cuotas_backup_..., manifiesto_....json
+_PATRON_RESPALDO = re.compile(r'^(riego_backup|cuotas_backup|manifiesto)_(\d{8}_\d{6})\.(db|db\.gz|json)$')
+
+
+def _sha256(ruta: str) -> str:
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def respaldar_base(ruta_origen: str, ruta_destino: str) -> Dict:
+    """
+    Copia una base de datos en uso a ruta_destino (.db.gz).
+
+    La copia se hace por pasos desde una conexión de sólo lectura, se verifica
+    con quick_check y después se comprime con gzip.
+
+    Returns:
+        Dict con archivo, sha256, tamaño comprimido y tamaño original
+    """
+    temporal = ruta_destino + '.tmp'
+    origen = sqlite3.connect(f"file:{os.path.abspath(ruta_origen)}?mode=ro", uri=True, timeout=10.0)
+    destino = sqlite3.connect(temporal)
+    try:
+        origen.backup(destino, pages=PAGINAS_POR_PASO, sleep=PAUSA_ENTRE_PASOS)
+        resultado = destino.execute('PRAGMA quick_check').fetchone()[0]
+        if resultado != 'ok':
+            raise sqlite3.DatabaseError(f"Respaldo dañado de {os.path.basename(ruta_origen)}: {resultado}")
+    finally:
+        destino.close()
+        origen.close()
+
+    try:
+        tamano_original = os.path.getsize(temporal)
+        with open(temporal, 'rb') as entrada, gzip.open(ruta_destino, 'wb', compresslevel=6) as salida:
+            shutil.copyfileobj(entrada, salida, 1024 * 1024)
+    finally:
+        os.remove(temporal)
+
+    return {
+        'archivo': os.path.basename(ruta_destino),
+        'sha256': _sha256(ruta_destino),
+        'bytes': os.path.getsize(ruta_destino),
+        'bytes_original': tamano_original
+    }
+
+
+def crear_respaldo(bases: Dict[str, str], motivo: str,
+                   directorio: str = DIRECTORIO_RESPALDOS) -> List[str]:
+    """
+    Respalda varias bases con la misma marca de tiempo y escribe su manifiesto.
+
+    Args:
+        bases: {'riego': ruta, 'cuotas': ruta}; las que no existen se omiten
+        motivo: Texto que queda en el manifiesto
+
+    Returns:
+        Rutas de los archivos comprimidos generados
+    """
+    os.makedirs(directorio, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    generados = []
+    archivos = []
+    try:
+        for nombre, ruta in bases.items():
+            if not ruta or not os.path.exists(ruta):
+                continue
+            destino = os.path.join(directorio, f"{nombre}_backup_{timestamp}.db.gz")
+            archivos.append(respaldar_base(ruta, destino))
+            generados.append(destino)
+    except Exception:
+        for ruta in generados:
+            os.remove(ruta)
+        raise
+
+    manifiesto = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'motivo': motivo,
+        'archivos': archivos
+    }
+    ruta_manifiesto = os.path.join(directorio, f"manifiesto_{timestamp}.json")
+    with open(ruta_manifiesto, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+
+    return generados
+
+
+def verificar_respaldo(ruta_manifiesto: str) -> List[str]:
+    """Compara los archivos contra su manifiesto; devuelve los que faltan o no coinciden"""
+    directorio = os.path.dirname(ruta_manifiesto)
+    with open(ruta_manifiesto, encoding='utf-8') as f:
+        manifiesto = json.load(f)
+
+    errores = []
+    for archivo in manifiesto['archivos']:
+        ruta = os.path.join(directorio, archivo['archivo'])
+        if not os.path.exists(ruta) or _sha256(ruta) != archivo['sha256']:
+            errores.append(archivo['archivo'])
+    return errores
+
+
+def descomprimir_respaldo(ruta_respaldo: str, ruta_destino: str):
+    """Extrae un respaldo .db.gz a una base de datos SQLite normal"""
+    with gzip.open(ruta_respaldo, 'rb') as entrada, open(ruta_destino, 'wb') as salida:
+        shutil.copyfileobj(entrada, salida, 1024 * 1024)
+
+
+def limpiar_respaldos(mantener: int = 10, directorio: str = DIRECTORIO_RESPALDOS) -> int:
+    """
+    Conserva los últimos N respaldos. Un respaldo es el grupo riego + cuotas +
+    manifiesto con la misma marca de tiempo (incluye los .db sin comprimir anteriores).
+
+    Returns:
+        Número de archivos eliminados
+    """
+    if not os.path.exists(directorio):
+        return 0
+
+    grupos: Dict[str, List[str]] = {}
+    for nombre in os.listdir(directorio):
+        coincidencia = _PATRON_RESPALDO.match(nombre)
+        if coincidencia:
+            grupos.setdefault(coincidencia.group(2), []).append(os.path.join(directorio, nombre))
+
+    eliminados = 0
+    for timestamp in sorted(grupos, reverse=True)[mantener:]:
+        for ruta in grupos[timestamp]:
+            try:
+                os.remove(ruta)
+                eliminados += 1
+                print(f"Backup antiguo eliminado: {os.path.basename(ruta)}")
+            except OSError:
+                pass
+    return eliminados
+
+
+def ultimo_manifiesto(directorio: str = DIRECTORIO_RESPALDOS) -> Optional[str]:
+    """Ruta del manifiesto más reciente, si existe"""
+    if not os.path.exists(directorio):
+        return None
+    manifiestos = sorted(n for n in os.listdir(directorio)
+                         if n.startswith('manifiesto_') and n.endswith('.json'))
+    return os.path.join(directorio, manifiestos[-1]) if manifiestos else None
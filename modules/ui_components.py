@@ -7,41 +7,41 @@ import os
 import time
 import platform
 import sys           
+import threading
 import subprocess
 # Importaciones de módulos propios
 from modules.models import (
     buscar_campesino, obtener_campesino_por_id, crear_campesino,
-    actualizar_campesino, eliminar_campesino, obtener_todos_campesinos,
-    obtener_siembra_activa, obtener_historial_siembras,
+    actualizar_campesino, eliminar_campesino,
+    obtener_siembra_activa,
     obtener_recibos_dia, obtener_configuracion, actualizar_configuracion,
-    obtener_toda_configuracion, obtener_auditoria, obtener_recibos_campesino,
+    obtener_toda_configuracion, obtener_auditoria,
     crear_siembra as crear_siembra_db, actualizar_siembra as actualizar_siembra_db,
     eliminar_siembra, obtener_siembra_por_id,
     crear_recibo as crear_recibo_db, actualizar_recibo as actualizar_recibo_db,
     eliminar_recibo as eliminar_recibo_db, obtener_recibo_por_id,
     obtener_todos_los_recibos, obtener_todas_las_siembras, incrementar_riegos,
-    obtener_estadisticas_generales, obtener_estadisticas_por_cultivo,
-    registrar_auditoria, actualizar_superficie_campesino
+    obtener_estadisticas_por_cultivo,
+    registrar_auditoria, actualizar_superficie_campesino, fijar_folio,
+    obtener_campesinos_con_siembra_activa
 )
 
 from modules.logic import (
     calcular_costo, validar_campesino, nueva_siembra, vender_riego,
     calcular_total_dia, eliminar_recibo_dia, cerrar_dia,
     reiniciar_folios_y_ciclo, crear_backup, cambiar_cultivo_siembra,
-    actualizar_folio_actual, incrementar_folio
+    actualizar_folio_actual, incrementar_folio, obtener_folio_actual
 )
 
-from modules.reports import (
-    generar_recibo_pdf_temporal, imprimir_recibo_y_limpiar,
-    generar_reporte_diario, abrir_pdf, exportar_a_excel, obtener_impresoras_disponibles,
-    generar_corte_caja_excel  
-)
+# modules.reports (reportlab, openpyxl, qrcode) se importa al generar el primer documento
 from modules.cuotas import (
     crear_tipo_cuota, obtener_tipos_cuota_activos, obtener_todas_cuotas_con_estado,
-    asignar_cuota_a_campesino, asignar_cuota_masiva, obtener_cuotas_campesino,
-    obtener_cuotas_pendientes_campesino, obtener_resumen_cuota, pagar_cuota,
+    asignar_cuota_masiva,
+    obtener_cuotas_pendientes_campesino, obtener_resumen_cuota,
     obtener_recibo_cuota, obtener_recibos_cuotas_dia, obtener_estadisticas_generales_cuotas
 )
+from modules.estadisticas import obtener_estadisticas
+from modules import catalogo_reportes
 from modules.whatsapp_handler import abrir_chat_whatsapp
 
 # Lista de cultivos comunes
@@ -135,6 +135,91 @@ def crear_ventana_scrollable(parent_ventana, contenido_frame):
     return canvas, scrollable_frame
 
 
+def aviso_fallo_impresion(widget):
+    """
+    Callback para la cola de impresión: si el trabajo falla muestra el error.
+    La cola llama desde su propio hilo, así que el aviso se pasa a Tk con after().
+    """
+    from modules.impresion import FALLIDO
+    
+    raiz = widget._root()
+    
+    def al_cambiar(trabajo):
+        if trabajo.estado == FALLIDO:
+            raiz.after(0, lambda: messagebox.showerror(
+                "Error de Impresión",
+                f"No se pudo imprimir {os.path.basename(trabajo.ruta_pdf)}\n"
+                f"después de {trabajo.intentos} intento(s):\n{trabajo.error}"))
+    
+    return al_cambiar
+
+
+def cobrar_cuotas_seleccionadas(ventana, tree) -> bool:
+    """
+    Cobra en un solo paso las cuotas pendientes seleccionadas en un Treeview
+    (tags = (id, pagado)): un recibo por cuota, todos en un mismo PDF que se
+    manda una sola vez a la impresora.
+    
+    Returns:
+        True si se cobró algo (la ventana debe recargar su lista)
+    """
+    from modules.cuotas import pagar_cuotas
+    from modules.reports import generar_recibos_cuota_pdf_temporal, abrir_pdf, imprimir_recibo_y_limpiar
+    
+    selection = tree.selection()
+    if not selection:
+        return False
+    
+    pendientes = []
+    for item_id in selection:
+        tags = tree.item(item_id)['tags']
+        if not int(tags[1]):
+            pendientes.append(int(tags[0]))
+    
+    if not pendientes:
+        mensaje = "Esta cuota ya fue pagada" if len(selection) == 1 else "Las cuotas seleccionadas ya fueron pagadas"
+        messagebox.showinfo("Información", mensaje)
+        return False
+    
+    if len(pendientes) == 1:
+        pregunta = "¿Marcar esta cuota como PAGADA y generar recibo?"
+    else:
+        pregunta = f"¿Marcar {len(pendientes)} cuotas como PAGADAS y generar sus recibos?"
+    if not messagebox.askyesno("Confirmar Pago", pregunta):
+        return False
+    
+    try:
+        recibos = pagar_cuotas(pendientes)
+    except Exception as e:
+        messagebox.showerror("Error", f"Error al pagar cuota:\n{str(e)}")
+        return False
+    
+    try:
+        pdf_path = generar_recibos_cuota_pdf_temporal([r['recibo_id'] for r in recibos])
+        abrir_pdf(pdf_path)
+        
+        folios = ', '.join(str(r['folio']) for r in recibos)
+        total = sum(r['monto'] for r in recibos)
+        if messagebox.askyesno("Imprimir Recibo",
+                               f"Recibos generados exitosamente\n"
+                               f"Folio(s): {folios}\n"
+                               f"Monto: ${total:.2f}\n"
+                               f"¿Desea imprimir?"):
+            imprimir_recibo_y_limpiar(pdf_path, al_cambiar=aviso_fallo_impresion(ventana))
+        else:
+            try:
+                os.remove(pdf_path)
+            except:
+                pass
+    except Exception as e:
+        messagebox.showerror("Error", f"Las cuotas se pagaron pero no se pudo generar el recibo:\n{str(e)}")
+        return True
+    
+    texto = "Cuota pagada correctamente" if len(recibos) == 1 else f"{len(recibos)} cuotas pagadas correctamente"
+    messagebox.showinfo("Éxito", texto)
+    return True
+
+
 class VentanaPrincipal:
     """Ventana principal del sistema"""
     
@@ -313,35 +398,50 @@ class VentanaPrincipal:
     def cargar_todos_campesinos(self, ordenar_por_lote=True):
         """
         Carga todos los campesinos ordenados SIEMPRE por lote (numérico).
+        Una sola consulta trae campesino + siembra activa ya ordenados.
         """
         self.tree.delete(*self.tree.get_children())
         
-        campesinos = obtener_todos_campesinos()
-        
-        # Ordenar SIEMPRE por número de lote (numérico, no alfabético)
-        campesinos = sorted(campesinos, 
-                        key=lambda c: int(c['numero_lote']) 
-                                        if str(c['numero_lote']).isdigit() 
-                                        else 999999)
-        
-        # Agregar a la tabla
-        for camp in campesinos:
-            siembra = obtener_siembra_activa(camp['id'])
-            cultivo = siembra['cultivo'] if siembra else '-'
-            riegos = siembra['numero_riegos'] if siembra else 0
-            
-            self.tree.insert('', tk.END, iid=camp['id'], values=(
-                camp['numero_lote'],
-                camp['nombre'],
-                camp['localidad'],
-                camp['barrio'],
-                f"{camp['superficie']:.2f}",
-                cultivo,
-                riegos
-            ), tags=(str(camp['id']),))
+        for camp in obtener_campesinos_con_siembra_activa():
+            self.tree.insert('', tk.END, iid=camp['id'], values=self._valores_fila(camp),
+                             tags=(str(camp['id']),))
         
         # Actualizar contador
         self.actualizar_total_dia()
+    
+    def _valores_fila(self, camp: Dict) -> tuple:
+        """Valores de una fila del grid a partir de obtener_campesinos_con_siembra_activa"""
+        return (
+            camp['numero_lote'],
+            camp['nombre'],
+            camp['localidad'],
+            camp['barrio'],
+            f"{camp['superficie']:.2f}",
+            camp['cultivo'] or '-',
+            camp['numero_riegos']
+        )
+    
+    def actualizar_filas(self, campesino_ids: List[int]):
+        """
+        Refresca solo las filas indicadas (tras una venta o edición)
+        sin borrar y volver a insertar todo el árbol.
+        """
+        campesino_ids = [cid for cid in campesino_ids if self.tree.exists(cid)]
+        if not campesino_ids:
+            return
+        
+        vigentes = {camp['id']: camp for camp in obtener_campesinos_con_siembra_activa(campesino_ids)}
+        for campesino_id in campesino_ids:
+            camp = vigentes.get(campesino_id)
+            if camp:
+                self.tree.item(campesino_id, values=self._valores_fila(camp))
+            else:
+                # Ya no está activo
+                self.tree.delete(campesino_id)
+        
+        seleccionado = self.campesino_seleccionado
+        if seleccionado and seleccionado['id'] in vigentes:
+            self.campesino_seleccionado = obtener_campesino_por_id(seleccionado['id'])
  
     def abrir_estadisticas(self):
         """Abre la ventana de estadísticas"""
@@ -361,6 +461,9 @@ class VentanaPrincipal:
         # Mostrar en tabla
         self.tree.delete(*self.tree.get_children())
         
+        # Siembra activa de todos los resultados en una sola consulta, ordenados por lote
+        resultados = obtener_campesinos_con_siembra_activa([c['id'] for c in resultados])
+        
         if not resultados:
             # Si no hay resultados
             self.tree.insert('', 'end', values=(
@@ -368,26 +471,9 @@ class VentanaPrincipal:
             ))
             return
         
-        # Mostrar resultados ordenados por lote numérico
-        resultados_ordenados = sorted(resultados, 
-                                    key=lambda c: int(c['numero_lote']) 
-                                                if str(c['numero_lote']).isdigit() 
-                                                else 999999)
-        
-        for camp in resultados_ordenados:
-            siembra = obtener_siembra_activa(camp['id'])
-            cultivo = siembra['cultivo'] if siembra else '-'
-            riegos = siembra['numero_riegos'] if siembra else 0
-            
-            self.tree.insert('', 'end', iid=camp['id'], values=(
-                camp['numero_lote'],
-                camp['nombre'],
-                camp['localidad'],
-                camp['barrio'],
-                f"{camp['superficie']:.2f}",
-                cultivo,
-                riegos
-            ), tags=(str(camp['id']),))
+        for camp in resultados:
+            self.tree.insert('', 'end', iid=camp['id'], values=self._valores_fila(camp),
+                             tags=(str(camp['id']),))
  
     def limpiar_busqueda(self):
         """Limpia la búsqueda"""
@@ -718,6 +804,7 @@ class VentanaVenta:
                 tipo_texto = f"Venta de {cantidad} riego(s)"
             
             # Generar recibo temporal
+            from modules.reports import generar_recibo_pdf_temporal, abrir_pdf, imprimir_recibo_y_limpiar
             pdf_path = generar_recibo_pdf_temporal(resultado['recibo_id'])
             
             # Abrir vista previa
@@ -726,7 +813,7 @@ class VentanaVenta:
             # Preguntar si desea imprimir
             if messagebox.askyesno("Imprimir Recibo",
                                    f"Recibo generado exitosamente\nFolio: {resultado['folio']}\nCosto Total: ${resultado['costo']:.2f}\n\n¿Desea imprimir?"):
-                imprimir_recibo_y_limpiar(pdf_path)
+                imprimir_recibo_y_limpiar(pdf_path, al_cambiar=aviso_fallo_impresion(self.ventana))
             else:
                 # Eliminar si no va a imprimir
                 try:
@@ -737,9 +824,9 @@ class VentanaVenta:
             messagebox.showinfo("Éxito",
                                 f"{tipo_texto} registrado exitosamente\nFolio: {resultado['folio']}\nCosto Total: ${resultado['costo']:.2f}")
             
-            # Actualizar ventana principal
+            # Actualizar ventana principal (solo la fila vendida)
             self.ventana_principal.actualizar_total_dia()
-            self.ventana_principal.cargar_todos_campesinos()
+            self.ventana_principal.actualizar_filas([self.campesino['id']])
 
             # Cerrar ventana
             self.ventana.destroy()
@@ -941,7 +1028,7 @@ class VentanaEditarSiembraRiego:
             self.ventana.destroy()
             
             if self.ventana_principal:
-                self.ventana_principal.cargar_todos_campesinos()
+                self.ventana_principal.actualizar_filas([self.campesino_id])
                 
         except Exception as e:
             import traceback
@@ -1097,7 +1184,7 @@ class VentanaReiniciarCiclo:
         info_frame.pack(fill=tk.X, pady=10)
         
         ciclo_actual = obtener_configuracion('ciclo_actual') or 'SIN CICLO'
-        folio_actual = obtener_configuracion('folio_actual') or '1'
+        folio_actual = obtener_folio_actual()
         
         ttk.Label(info_frame, text=f"Ciclo actual: {ciclo_actual}",
                  font=('Helvetica', 10, 'bold'), foreground='blue').pack(anchor=tk.W, pady=2)
@@ -1148,7 +1235,7 @@ class VentanaReiniciarCiclo:
                               "¿Reiniciar el folio a 1?\n\n"
                               "El ciclo actual NO será modificado."):
             try:
-                actualizar_configuracion('folio_actual', '1')
+                fijar_folio(1)
                 
                 registrar_auditoria(
                     'FOLIO_REINICIADO',
@@ -1378,8 +1465,8 @@ class VentanaDetalleDia:
                 # 2. Recargar lista de recibos del día
                 self.cargar_recibos()
                 
-                # 3. IMPORTANTE: Recargar tabla de campesinos (refleja cambios en siembra/riegos)
-                self.ventana_principal.cargar_todos_campesinos()
+                # 3. IMPORTANTE: Refrescar la fila del campesino (refleja cambios en siembra/riegos)
+                self.ventana_principal.actualizar_filas([recibo['campesino_id']])
                 
                 # 4. Si estás en la ventana principal, actualizar folio visible
                 if hasattr(self.ventana_principal, 'actualizar_folio_ui'):
@@ -1401,11 +1488,12 @@ class VentanaDetalleDia:
         recibo_id = int(item['tags'][0])
         
         try:
+            from modules.reports import generar_recibo_pdf_temporal, abrir_pdf, imprimir_recibo_y_limpiar
             pdf_path = generar_recibo_pdf_temporal(recibo_id, es_reimpresion=True)
             abrir_pdf(pdf_path)
             
             if messagebox.askyesno("Imprimir", "¿Desea imprimir la reimpresión?"):
-                imprimir_recibo_y_limpiar(pdf_path)
+                imprimir_recibo_y_limpiar(pdf_path, al_cambiar=aviso_fallo_impresion(self.ventana))
             else:
                 try:
                     os.remove(pdf_path)
@@ -1784,17 +1872,23 @@ class VentanaHistorial:
                    text="🖨️ Reimprimir Recibo Seleccionado",
                    command=self.reimprimir_recibo).pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(frame_botones,
+                   text="💰 Pagar Cuotas Seleccionadas",
+                   command=self.pagar_cuota_dobleclick).pack(side=tk.LEFT, padx=5)
+        
         ttk.Button(frame_botones,
                    text="🔄 Actualizar",
                    command=self.cargar_historial).pack(side=tk.LEFT, padx=5)
     
     def cargar_historial(self):
-        """Carga el historial de siembras, recibos Y CUOTAS"""
+        """Carga el historial de siembras, recibos Y CUOTAS (una sola consulta a ambas bases)"""
+        from modules.unificada import obtener_estado_cuenta
+        cuenta = obtener_estado_cuenta(self.campesino['id'])
+        
         # Cargar siembras
         self.tree_siembras.delete(*self.tree_siembras.get_children())
-        siembras = obtener_historial_siembras(self.campesino['id'])
         
-        for s in siembras:
+        for s in cuenta['siembras']:
             estado = "✅ Activa" if s['activa'] else "Finalizada"
             fecha_fin = s['fecha_fin'] if s['fecha_fin'] else '-'
             
@@ -1809,9 +1903,8 @@ class VentanaHistorial:
         
         # Cargar recibos
         self.tree_recibos.delete(*self.tree_recibos.get_children())
-        recibos = obtener_recibos_campesino(self.campesino['id'])
         
-        for r in recibos:
+        for r in cuenta['recibos']:
             self.tree_recibos.insert('', tk.END, values=(
                 r['folio'],
                 r['fecha'],
@@ -1823,64 +1916,23 @@ class VentanaHistorial:
         # ✅ CARGAR CUOTAS (AHORA AQUÍ, NO EN crear_widgets)
         self.tree_cuotas.delete(*self.tree_cuotas.get_children())
         
-        try:
-            from modules.cuotas import obtener_cuotas_campesino
-            cuotas = obtener_cuotas_campesino(self.campesino['id'])
-
-            for cuota in cuotas:
-                estado = "✅ PAGADO" if cuota['pagado'] else "⏳ PENDIENTE"
-                fecha_pago = cuota['fecha_pago'] if cuota['fecha_pago'] else "-"
-                
-                self.tree_cuotas.insert('', tk.END,
-                                values=(
-                                    cuota['nombre_tipo_cuota'],
-                                    f"${cuota['monto']:.2f}",
-                                    estado,
-                                    fecha_pago
-                                ),
-                                tags=(str(cuota['id']), str(cuota['pagado'])))
-        except Exception as e:
-            print(f"Error al cargar cuotas: {e}")
+        for cuota in cuenta['cuotas']:
+            estado = "✅ PAGADO" if cuota['pagado'] else "⏳ PENDIENTE"
+            fecha_pago = cuota['fecha_pago'] if cuota['fecha_pago'] else "-"
+            
+            self.tree_cuotas.insert('', tk.END,
+                            values=(
+                                cuota['nombre_tipo_cuota'],
+                                f"${cuota['monto']:.2f}",
+                                estado,
+                                fecha_pago
+                            ),
+                            tags=(str(cuota['id']), str(cuota['pagado'])))
     
-    def pagar_cuota_dobleclick(self, event):
-        """Maneja el doble click en una cuota para pagarla"""
-        selection = self.tree_cuotas.selection()
-        if not selection:
-            return
-        
-        item = self.tree_cuotas.item(selection[0])
-        cuota_id = int(item['tags'][0])
-        pagado = int(item['tags'][1])
-        
-        if pagado:
-            messagebox.showinfo("Información", "Esta cuota ya fue pagada")
-            return
-        
-        if messagebox.askyesno("Confirmar Pago", "¿Marcar esta cuota como PAGADA y generar recibo?"):
-            try:
-                from modules.cuotas import pagar_cuota
-                from modules.reports import generar_recibo_cuota_pdf_temporal, abrir_pdf, imprimir_recibo_y_limpiar
-                
-                resultado = pagar_cuota(cuota_id)
-                
-                # Generar PDF
-                pdf_path = generar_recibo_cuota_pdf_temporal(resultado['recibo_id'])
-                abrir_pdf(pdf_path)
-                
-                if messagebox.askyesno("Imprimir", "¿Desea imprimir el recibo?"):
-                    imprimir_recibo_y_limpiar(pdf_path)
-                else:
-                    try:
-                        os.remove(pdf_path)
-                    except:
-                        pass
-                
-                messagebox.showinfo("Éxito", "Cuota pagada correctamente")
-                # Recargar
-                self.cargar_historial()
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al pagar cuota:\n{str(e)}")
+    def pagar_cuota_dobleclick(self, event=None):
+        """Paga las cuotas seleccionadas (doble click o botón)"""
+        if cobrar_cuotas_seleccionadas(self.ventana, self.tree_cuotas):
+            self.cargar_historial()
     
     def guardar_notas(self):
         """Guarda las notas del campesino"""
@@ -1910,11 +1962,12 @@ class VentanaHistorial:
         recibo_id = int(item['tags'][0])
         
         try:
+            from modules.reports import generar_recibo_pdf_temporal, abrir_pdf, imprimir_recibo_y_limpiar
             pdf_path = generar_recibo_pdf_temporal(recibo_id, es_reimpresion=True)
             abrir_pdf(pdf_path)
             
             if messagebox.askyesno("Imprimir", "¿Desea imprimir?"):
-                imprimir_recibo_y_limpiar(pdf_path)
+                imprimir_recibo_y_limpiar(pdf_path, al_cambiar=aviso_fallo_impresion(self.ventana))
             else:
                 try:
                     os.remove(pdf_path)
@@ -2055,7 +2108,7 @@ class DialogoConfiguracion:
         self.entry_ubicacion.insert(0, config.get('ubicacion', ''))
         self.entry_tarifa.insert(0, config.get('tarifa_hectarea', '450'))
         self.label_ciclo.config(text=config.get('ciclo_actual', '-'))
-        self.label_folio.config(text=config.get('folio_actual', '-'))
+        self.label_folio.config(text=str(obtener_folio_actual()))
         
     def cargar_contactos(self):
         """Carga la lista de contactos"""
@@ -2243,8 +2296,8 @@ class VentanaAdministrarDatos:
     
     def actualizar_label_folio(self):
         """Actualiza el label que muestra el folio actual"""
-        folio = obtener_configuracion('folio_actual')
-        self.label_folio_actual.config(text=folio)
+        folio = obtener_folio_actual()
+        self.label_folio_actual.config(text=str(folio))
     
     def cargar_nombre_actual(self):
         """Carga el label que muestra el nombre actual"""
@@ -2308,8 +2361,8 @@ class VentanaEstadisticas:
         self.ventana.geometry("1100x700")
         self.ventana.transient(parent)
         
-        # Obtener datos actualizados
-        self.stats = obtener_estadisticas_generales()
+        # Obtener datos actualizados (instantánea; se recalcula sólo si la BD cambió)
+        self.stats = obtener_estadisticas()
         
         # Estilo para las tarjetas
         style = ttk.Style()
@@ -2479,92 +2532,61 @@ class VentanaEstadisticas:
 
     def crear_grafica_pastel(self, parent, datos):
         """Crea una gráfica de pastel"""
-        try:
-            import matplotlib
-            matplotlib.use('TkAgg')
-            from matplotlib.figure import Figure
-            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-            
-            fig = Figure(figsize=(5, 4), dpi=100)
-            ax = fig.add_subplot(111)
-            
-            labels = list(datos.keys())
-            sizes = list(datos.values())
-            
-            # Colores personalizados
-            colors = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D', '#6A994E', '#BC4B51']
-            
-            ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-            ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-            
-            canvas = FigureCanvasTkAgg(fig, parent)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            
-        except ImportError:
-            ttk.Label(parent, text="Instalar matplotlib").pack()
+        self._mostrar_grafica(parent, 'pastel', {
+            'etiquetas': list(datos.keys()), 'valores': list(datos.values())
+        })
 
     def crear_grafica_barras(self, parent, datos, titulo, xlabel, ylabel):
         """Crea una gráfica de barras vertical"""
-        try:
-            import matplotlib
-            matplotlib.use('TkAgg')
-            from matplotlib.figure import Figure
-            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-            
-            fig = Figure(figsize=(6, 4), dpi=100)
-            ax = fig.add_subplot(111)
-            
-            keys = list(datos.keys())
-            values = list(datos.values())
-            
-            ax.bar(keys, values, color='#2E86AB')
-            ax.set_title(titulo, fontsize=10)
-            ax.set_xlabel(xlabel, fontsize=9)
-            ax.set_ylabel(ylabel, fontsize=9)
-            ax.tick_params(axis='x', rotation=45, labelsize=8)
-            
-            fig.tight_layout()
-            
-            canvas = FigureCanvasTkAgg(fig, parent)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            
-        except ImportError:
-            ttk.Label(parent, text="Instalar matplotlib").pack()
+        self._mostrar_grafica(parent, 'barras', {
+            'etiquetas': list(datos.keys()), 'valores': list(datos.values()),
+            'titulo': titulo, 'xlabel': xlabel, 'ylabel': ylabel
+        })
 
     def crear_grafica_barras_horizontal(self, parent, datos, titulo, xlabel):
         """Crea una gráfica de barras horizontal"""
-        try:
-            import matplotlib
-            matplotlib.use('TkAgg')
-            from matplotlib.figure import Figure
-            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-            
-            fig = Figure(figsize=(6, 6), dpi=100)
-            ax = fig.add_subplot(111)
-            
-            # Ordenar datos
-            sorted_items = sorted(datos.items(), key=lambda x: x[1])
-            keys = [k for k, v in sorted_items]
-            values = [v for k, v in sorted_items]
-            
-            ax.barh(keys, values, color='#6A994E')
-            ax.set_title(titulo, fontsize=10)
-            ax.set_xlabel(xlabel, fontsize=9)
-            ax.tick_params(axis='y', labelsize=8)
-            
-            fig.tight_layout()
-            
-            canvas = FigureCanvasTkAgg(fig, parent)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            
-        except ImportError:
-            ttk.Label(parent, text="Instalar matplotlib").pack()
+        self._mostrar_grafica(parent, 'barras_horizontal', {
+            'etiquetas': list(datos.keys()), 'valores': list(datos.values()),
+            'titulo': titulo, 'xlabel': xlabel
+        })
+
+    def _mostrar_grafica(self, parent, tipo, datos):
+        """
+        Muestra la imagen de la gráfica. Si ya está en caché aparece de inmediato;
+        si no, se dibuja en el proceso de gráficas y el hilo de Tk sólo revisa
+        cada 100 ms si ya terminó.
+        """
+        from modules.graficas import obtener_grafica
+
+        etiqueta = ttk.Label(parent, text="Generando gráfica...", anchor=tk.CENTER)
+        etiqueta.pack(fill=tk.BOTH, expand=True)
+        futuro = obtener_grafica(tipo, datos)
+
+        def revisar():
+            if not etiqueta.winfo_exists():
+                return
+            if not futuro.done():
+                etiqueta.after(100, revisar)
+                return
+            try:
+                imagen = tk.PhotoImage(file=futuro.result())
+            except ImportError:
+                etiqueta.config(text="Instalar matplotlib")
+                return
+            except Exception as e:
+                etiqueta.config(text=f"No se pudo generar la gráfica: {e}")
+                return
+            etiqueta.config(image=imagen, text='')
+            etiqueta.image = imagen  # Mantener referencia
+
+        revisar()
 
     def actualizar_datos(self):
-        """Actualiza los datos y refresca la ventana"""
+        """Actualiza los datos y refresca la ventana (sólo si cambiaron)"""
+        if obtener_estadisticas() is self.stats:
+            messagebox.showinfo("Estadísticas", "Los datos no han cambiado desde la última actualización.",
+                                parent=self.ventana)
+            return
         self.ventana.destroy()
         VentanaEstadisticas(self.ventana.master)
 
@@ -2576,12 +2598,13 @@ class VentanaEstadisticas:
             # Preparar datos extra para el reporte si es necesario
             estadisticas_cultivo = []
             for cultivo, has in self.stats['hectareas_por_cultivo'].items():
+                por_cultivo = self.stats['por_cultivo'].get(cultivo, {})
                 estadisticas_cultivo.append({
                     'cultivo': cultivo,
                     'num_siembras': self.stats['siembras_por_cultivo'].get(cultivo, 0),
                     'superficie_total': has,
-                    'num_recibos': 0,
-                    'ingresos_totales': 0
+                    'num_recibos': por_cultivo.get('num_recibos', 0),
+                    'ingresos_totales': por_cultivo.get('ingresos_totales', 0)
                 })
             
             ruta_pdf = generar_pdf_estadisticas(self.stats, estadisticas_cultivo)
@@ -2660,7 +2683,7 @@ class VentanaRenombrarCampesino:
                 messagebox.showinfo("Éxito", "Nombre actualizado correctamente")
                 
                 # Actualizar UI
-                self.ventana_principal.cargar_todos_campesinos()
+                self.ventana_principal.actualizar_filas([self.campesino_id])
                 self.ventana.destroy()
                 
             except Exception as e:
@@ -3036,7 +3059,7 @@ class VentanaEditarSuperficie:
                                   f"{self.superficie_actual} ha → {nueva_superficie} ha")
                 
                 # Actualizar UI
-                self.ventana_principal.cargar_todos_campesinos()
+                self.ventana_principal.actualizar_filas([self.campesino_id])
                 self.ventana.destroy()
                 
         except ValueError:
@@ -3047,8 +3070,11 @@ class VentanaEditarSuperficie:
 class VentanaGestorReportes:
     """Gestor de reportes - Lista, abre y genera reportes diarios"""
     
+    REPORTES_POR_PAGINA = 50
+    
     def __init__(self, parent, fecha_actual):
         self.fecha_actual = fecha_actual
+        self.pagina = 0
         
         self.ventana = tk.Toplevel(parent)
         self.ventana.title("📊 Gestor de Reportes")
@@ -3058,6 +3084,7 @@ class VentanaGestorReportes:
         self.canvas, self.frame_principal = crear_ventana_scrollable(self.ventana, None)
         
         self.crear_widgets()
+        catalogo_reportes.importar_reportes_existentes()
         self.cargar_reportes()
     
     def crear_widgets(self):
@@ -3104,7 +3131,7 @@ class VentanaGestorReportes:
         
         # FILA 4: OTROS BOTONES
         ttk.Button(frame_btnssup, text="🔄 Actualizar Lista", 
-                command=self.cargar_reportes, width=15).grid(
+                command=self.actualizar_lista, width=15).grid(
             row=0, column=3, padx=5, pady=5)
         
         ttk.Button(frame_btnssup, text="📁 Abrir Carpeta", 
@@ -3112,25 +3139,43 @@ class VentanaGestorReportes:
             row=1, column=3, padx=5, pady=5)
         
         
+        # Filtros (se aplican en la consulta al catálogo)
+        frame_filtros = ttk.Frame(frame)
+        frame_filtros.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(frame_filtros, text="Tipo:").pack(side=tk.LEFT, padx=5)
+        self.tipos_filtro = {'TODOS': None}
+        self.tipos_filtro.update({titulo: tipo for tipo, titulo in catalogo_reportes.CATEGORIAS})
+        self.combo_tipo = ttk.Combobox(frame_filtros, values=list(self.tipos_filtro),
+                                       state="readonly", width=25)
+        self.combo_tipo.current(0)
+        self.combo_tipo.pack(side=tk.LEFT, padx=5)
+        self.combo_tipo.bind('<<ComboboxSelected>>', lambda e: self.filtrar())
+        
+        ttk.Label(frame_filtros, text="Buscar (archivo o periodo):").pack(side=tk.LEFT, padx=5)
+        self.entry_buscar = ttk.Entry(frame_filtros, width=20)
+        self.entry_buscar.pack(side=tk.LEFT, padx=5)
+        self.entry_buscar.bind('<Return>', lambda e: self.filtrar())
+        
+        ttk.Button(frame_filtros, text="🔍 Filtrar", command=self.filtrar).pack(side=tk.LEFT, padx=5)
+        
         # Frame de lista de reportes
         frame_lista = ttk.LabelFrame(frame, text="Reportes Disponibles", padding="10")
         frame_lista.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Tabla de reportes
-        columnas = ('fecha', 'archivo', 'tamaño', 'recibos', 'total')
+        columnas = ('archivo', 'fecha', 'tamaño', 'periodo')
         self.tree = ttk.Treeview(frame_lista, columns=columnas, show='headings', height=15)
         
-        self.tree.heading('fecha', text='Fecha')
         self.tree.heading('archivo', text='Nombre del Archivo')
+        self.tree.heading('fecha', text='Fecha')
         self.tree.heading('tamaño', text='Tamaño')
-        self.tree.heading('recibos', text='Recibos')
-        self.tree.heading('total', text='Total')
+        self.tree.heading('periodo', text='Periodo')
         
-        self.tree.column('fecha', width=120)
-        self.tree.column('archivo', width=300)
-        self.tree.column('tamaño', width=100)
-        self.tree.column('recibos', width=80)
-        self.tree.column('total', width=120)
+        self.tree.column('archivo', width=320)
+        self.tree.column('fecha', width=130)
+        self.tree.column('tamaño', width=90)
+        self.tree.column('periodo', width=100)
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(frame_lista, orient=tk.VERTICAL, command=self.tree.yview)
@@ -3142,6 +3187,19 @@ class VentanaGestorReportes:
         # Doble click para abrir
         self.tree.bind('<Double-1>', lambda e: self.abrir_reporte())
         
+        # Paginación
+        frame_paginas = ttk.Frame(frame)
+        frame_paginas.pack(fill=tk.X)
+        
+        self.btn_anterior = ttk.Button(frame_paginas, text="◀ Anterior",
+                                       command=lambda: self.cambiar_pagina(-1), width=12)
+        self.btn_anterior.pack(side=tk.LEFT, padx=5)
+        self.label_pagina = ttk.Label(frame_paginas, text="")
+        self.label_pagina.pack(side=tk.LEFT, expand=True)
+        self.btn_siguiente = ttk.Button(frame_paginas, text="Siguiente ▶",
+                                        command=lambda: self.cambiar_pagina(1), width=12)
+        self.btn_siguiente.pack(side=tk.RIGHT, padx=5)
+        
         # Frame de botones inferiores
         frame_btns_inf = ttk.Frame(frame)
         frame_btns_inf.pack(fill=tk.X, pady=10)
@@ -3167,102 +3225,55 @@ class VentanaGestorReportes:
                   width=15).pack(side=tk.RIGHT, padx=5)
     
     def cargar_reportes(self):
-        """Carga los reportes existentes ORGANIZADOS POR CATEGORÍA"""
+        """Carga una página del catálogo de reportes ORGANIZADA POR CATEGORÍA"""
         self.tree.delete(*self.tree.get_children())
         
-        reportes_dir = os.path.join('database', 'reportes')
+        tipo = self.tipos_filtro.get(self.combo_tipo.get())
+        texto = self.entry_buscar.get().strip()
+        total = catalogo_reportes.contar_reportes(tipo=tipo, texto=texto)
+        paginas = max(1, -(-total // self.REPORTES_POR_PAGINA))
+        self.pagina = min(self.pagina, paginas - 1)
         
-        if not os.path.exists(reportes_dir):
-            return
-        
-        archivos = [f for f in os.listdir(reportes_dir) if f.endswith(('.pdf', '.xlsx'))]
+        reportes = catalogo_reportes.buscar_reportes(
+            tipo=tipo, texto=texto,
+            limite=self.REPORTES_POR_PAGINA,
+            desplazamiento=self.pagina * self.REPORTES_POR_PAGINA
+        )
         
-        # ✅ SEPARAR POR CATEGORÍAS
-        excel_ventas = []
-        pdf_ventas = []
-        pdf_estadisticas = []
-        pdf_cuotas = []
-        excel_cuotas = []
+        # ✅ INSERTAR CON ENCABEZADOS DE CATEGORÍA (el catálogo ya viene ordenado por tipo)
+        titulos = dict(catalogo_reportes.CATEGORIAS)
+        tipo_actual = None
+        for reporte in reportes:
+            if reporte['tipo'] != tipo_actual:
+                tipo_actual = reporte['tipo']
+                titulo = titulos.get(tipo_actual, titulos[catalogo_reportes.OTROS])
+                self.tree.insert('', tk.END, values=(titulo, '', '', ''), tags=('header',))
+            self.tree.insert('', tk.END,
+                            values=(reporte['archivo'], reporte['fecha_creacion'][:16],
+                                    f"{reporte['bytes'] / 1024:.1f} KB", reporte['periodo']),
+                            tags=(reporte['ruta'],))
         
-        for archivo in archivos:
-            ruta = os.path.join(reportes_dir, archivo)
-            fecha_modificacion = datetime.fromtimestamp(os.path.getmtime(ruta))
-            fecha_str = fecha_modificacion.strftime('%Y-%m-%d %H:%M')
-            tamano = os.path.getsize(ruta) / 1024  # KB
-            
-            # Clasificar por tipo
-            if 'cuota' in archivo.lower() and archivo.endswith('.xlsx'):
-                excel_cuotas.append((archivo, fecha_str, tamano, ruta))
-            elif 'cuota' in archivo.lower() and archivo.endswith('.pdf'):
-                pdf_cuotas.append((archivo, fecha_str, tamano, ruta))
-            elif 'estadisticas' in archivo.lower():
-                pdf_estadisticas.append((archivo, fecha_str, tamano, ruta))
-            elif archivo.endswith('.xlsx'):
-                excel_ventas.append((archivo, fecha_str, tamano, ruta))
-            elif archivo.endswith('.pdf'):
-                pdf_ventas.append((archivo, fecha_str, tamano, ruta))
-                
-        # ✅ INSERTAR CON ENCABEZADOS DE CATEGORÍA
-        
-        # 0. REPORTES MENSUALES (PDF y Excel)
-        reportes_mensuales = []
-        for archivo in archivos:
-            if 'reporte_mensual' in archivo:
-                ruta = os.path.join(reportes_dir, archivo)
-                fecha_modificacion = datetime.fromtimestamp(os.path.getmtime(ruta))
-                fecha_str = fecha_modificacion.strftime('%Y-%m-%d %H:%M')
-                tamano = os.path.getsize(ruta) / 1024
-                icon = '📄' if archivo.endswith('.pdf') else '📊'
-                reportes_mensuales.append((archivo, fecha_str, tamano, ruta, icon))
-        
-        if reportes_mensuales:
-            self.tree.insert('', tk.END, values=('📅 REPORTES MENSUALES', '', '', ''), tags=('header',))
-            for archivo, fecha, tamano, ruta, icon in sorted(reportes_mensuales, key=lambda x: x[1], reverse=True):
-                self.tree.insert('', tk.END, 
-                                values=(archivo, fecha, f"{tamano:.1f} KB", icon),
-                                tags=(ruta,))
-        
-        # 1. EXCEL VENTA DEL DÍA
-        if excel_ventas:
-            self.tree.insert('', tk.END, values=('📊 EXCEL VENTA DEL DÍA', '', '', ''), tags=('header',))
-            for archivo, fecha, tamano, ruta in sorted(excel_ventas, key=lambda x: x[1], reverse=True):
-                self.tree.insert('', tk.END, 
-                                values=(archivo, fecha, f"{tamano:.1f} KB", '📄'),
-                                tags=(ruta,))
-        
-        # 2. PDF VENTA DEL DÍA
-        if pdf_ventas:
-            self.tree.insert('', tk.END, values=('📄 PDF VENTA DEL DÍA', '', '', ''), tags=('header',))
-            for archivo, fecha, tamano, ruta in sorted(pdf_ventas, key=lambda x: x[1], reverse=True):
-                self.tree.insert('', tk.END, 
-                                values=(archivo, fecha, f"{tamano:.1f} KB", '📄'),
-                                tags=(ruta,))
-        
-        # 3. ESTADÍSTICAS PDF
-        if pdf_estadisticas:
-            self.tree.insert('', tk.END, values=('📊 ESTADÍSTICAS PDF', '', '', ''), tags=('header',))
-            for archivo, fecha, tamano, ruta in sorted(pdf_estadisticas, key=lambda x: x[1], reverse=True):
-                self.tree.insert('', tk.END, 
-                                values=(archivo, fecha, f"{tamano:.1f} KB", '📄'),
-                                tags=(ruta,))
-        
-        # 4. CUOTAS PDF
-        if pdf_cuotas:
-            self.tree.insert('', tk.END, values=('💰 CUOTAS PDF', '', '', ''), tags=('header',))
-            for archivo, fecha, tamano, ruta in sorted(pdf_cuotas, key=lambda x: x[1], reverse=True):
-                self.tree.insert('', tk.END, 
-                                values=(archivo, fecha, f"{tamano:.1f} KB", '📄'),
-                                tags=(ruta,))
-        
-        # 5. CUOTAS EXCEL
-        if excel_cuotas:
-            self.tree.insert('', tk.END, values=('💰 CUOTAS EXCEL', '', '', ''), tags=('header',))
-            for archivo, fecha, tamano, ruta in sorted(excel_cuotas, key=lambda x: x[1], reverse=True):
-                self.tree.insert('', tk.END, 
-                                values=(archivo, fecha, f"{tamano:.1f} KB", '📄'),
-                                tags=(ruta,))
-
+        self.label_pagina.config(text=f"Página {self.pagina + 1} de {paginas} ({total} reportes)")
+        self.btn_anterior.config(state=tk.NORMAL if self.pagina > 0 else tk.DISABLED)
+        self.btn_siguiente.config(state=tk.NORMAL if self.pagina + 1 < paginas else tk.DISABLED)
+    
+    def filtrar(self):
+        """Aplica los filtros desde la primera página"""
+        self.pagina = 0
+        self.cargar_reportes()
+    
+    def cambiar_pagina(self, delta):
+        self.pagina = max(0, self.pagina + delta)
+        self.cargar_reportes()
     
+    def actualizar_lista(self):
+        """Sincroniza el catálogo con la carpeta (archivos copiados o borrados a mano)"""
+        try:
+            catalogo_reportes.sincronizar_directorio()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al actualizar la lista:\n{str(e)}")
+        self.cargar_reportes()
+
     def generar_nuevo_reporte(self):
         """Genera un reporte del día actual"""
         try:
@@ -3383,13 +3394,16 @@ class VentanaGestorReportes:
         
         item = self.tree.item(selection[0])
         ruta_pdf = item['tags'][0]
-        archivo = item['values'][1]
+        archivo = item['values'][0]
+        
+        if ruta_pdf == 'header':
+            return
         
         if messagebox.askyesno("Confirmar Eliminación", 
                               f"¿Eliminar el reporte?\n\n{archivo}\n\n"
                               f"Esta acción no se puede deshacer."):
             try:
-                os.remove(ruta_pdf)
+                catalogo_reportes.eliminar_reporte(ruta_pdf)
                 messagebox.showinfo("Éxito", "Reporte eliminado correctamente")
                 self.cargar_reportes()
             except Exception as e:
@@ -3526,7 +3540,7 @@ class VentanaGestorReportes:
         """Diálogo para generar reporte mensual"""
         dialogo = tk.Toplevel(self.ventana)
         dialogo.title("📅 Reporte Mensual")
-        dialogo.geometry("300x250")
+        dialogo.geometry("300x300")
         dialogo.transient(self.ventana)
         dialogo.grab_set()
         
@@ -3552,79 +3566,123 @@ class VentanaGestorReportes:
         combo_anio.current(0)
         combo_anio.grid(row=1, column=1, padx=5, pady=5)
         
+        # Progreso (el paquete se genera en hilos de trabajo)
+        barra = ttk.Progressbar(dialogo, mode='determinate', length=240)
+        etiqueta_estado = ttk.Label(dialogo, text="", font=('Helvetica', 9), foreground='gray')
+        
         def generar():
             mes_idx = combo_mes.current() + 1
             anio = int(combo_anio.get())
+            nombre_mes = combo_mes.get()
             
-            try:
-                from modules.models import obtener_recibos_mes
-                from modules.reports import generar_reporte_mensual_pdf, generar_reporte_mensual_excel
-                
-                recibos = obtener_recibos_mes(anio, mes_idx)
+            from modules.models import obtener_correo_presidente
+            from modules.paquete_mensual import NOMBRES_PASOS, generar_paquete_mensual, enviar_paquete
+            
+            # Respaldos y auditoría sólo se generan si hay a quién enviarlos
+            correo_destino = obtener_correo_presidente()
+            
+            boton_generar.config(state=tk.DISABLED)
+            # Mientras trabaja el hilo el diálogo no se cierra; terminar() lo cierra
+            dialogo.protocol("WM_DELETE_WINDOW", lambda: None)
+            barra.pack(pady=(0, 5))
+            etiqueta_estado.pack()
+            etiqueta_estado.config(text="Leyendo recibos del mes...")
+            barra['value'] = 0
+            
+            def en_ui(funcion):
+                """Pasa una llamada del hilo de trabajo al hilo de Tk"""
+                try:
+                    self.ventana.after(0, funcion)
+                except (tk.TclError, RuntimeError):
+                    pass  # El gestor ya se cerró: no hay a quién avisar
+            
+            def al_progresar(paso, terminados, total):
+                def actualizar():
+                    if dialogo.winfo_exists():
+                        barra['maximum'] = total
+                        barra['value'] = terminados
+                        etiqueta_estado.config(text=f"✓ {NOMBRES_PASOS[paso]} ({terminados}/{total})")
+                en_ui(actualizar)
+            
+            def trabajar():
+                error_correo = None
+                try:
+                    paquete = generar_paquete_mensual(anio, mes_idx, con_respaldos=bool(correo_destino),
+                                                      al_progresar=al_progresar)
+                except ValueError:
+                    en_ui(lambda: messagebox.showwarning(
+                        "Sin Datos", f"No hay recibos registrados en {nombre_mes} {anio}"))
+                    en_ui(restablecer)
+                    return
+                except Exception as e:
+                    mensaje = str(e)
+                    en_ui(lambda: messagebox.showerror(
+                        "Error", f"Error al generar reportes:\n{mensaje}"))
+                    en_ui(restablecer)
+                    return
                 
-                if not recibos:
-                    messagebox.showwarning("Sin Datos", f"No hay recibos registrados en {combo_mes.get()} {anio}")
+                # ===== AUTOMATIZACIÓN DE CORREO =====
+                correo_enviado = False
+                if correo_destino and (paquete.pdf or paquete.excel):
+                    def avisar_envio():
+                        if dialogo.winfo_exists():
+                            etiqueta_estado.config(text="Enviando correo...")
+                    en_ui(avisar_envio)
+                    try:
+                        enviar_paquete(paquete, correo_destino)
+                        correo_enviado = True
+                    except Exception as e:
+                        print(f"Error al enviar correo automático: {e}")
+                        error_correo = str(e)
+                en_ui(lambda: terminar(paquete, correo_enviado, error_correo))
+            
+            def restablecer():
+                if dialogo.winfo_exists():
+                    dialogo.protocol("WM_DELETE_WINDOW", dialogo.destroy)
+                    boton_generar.config(state=tk.NORMAL)
+                    barra.pack_forget()
+                    etiqueta_estado.pack_forget()
+            
+            def terminar(paquete, correo_enviado, error_correo):
+                if dialogo.winfo_exists():
+                    dialogo.destroy()
+                if not self.ventana.winfo_exists():
                     return
                 
-                # Generar PDF
-                pdf_path = generar_reporte_mensual_pdf(anio, mes_idx, recibos)
+                self.cargar_reportes()
                 
-                # Generar Excel
-                excel_path = generar_reporte_mensual_excel(anio, mes_idx, recibos)
+                if paquete.pdf is None or paquete.excel is None:
+                    fallas = "\n".join(f"• {NOMBRES_PASOS[p]}: {e}" for p, e in paquete.errores.items())
+                    if correo_enviado:
+                        fallas += f"\n\nLo que sí se generó se envió por correo a:\n{correo_destino}"
+                    elif error_correo:
+                        fallas += f"\n\nTampoco se pudo enviar el correo:\n{error_correo}"
+                    elif correo_destino:
+                        fallas += "\n\nNo se envió correo: no se generó ningún reporte."
+                    messagebox.showerror("Error", f"Error al generar reportes:\n{fallas}")
+                    return
                 
                 messagebox.showinfo("Éxito", 
                                   f"Reportes generados correctamente:\n\n"
-                                  f"📄 PDF: {os.path.basename(pdf_path)}\n"
-                                  f"📊 Excel: {os.path.basename(excel_path)}")
+                                  f"📄 PDF: {os.path.basename(paquete.pdf)}\n"
+                                  f"📊 Excel: {os.path.basename(paquete.excel)}")
                 
-                self.cargar_reportes()
-                dialogo.destroy()
+                if correo_destino:
+                    if error_correo:
+                        messagebox.showwarning("Advertencia", f"Reportes generados pero falló el envío de correo:\n{error_correo}")
+                    else:
+                        messagebox.showinfo("Correo Enviado", 
+                                          f"Se envió el reporte y los respaldos al Presidente:\n{correo_destino}")
                 
                 # Preguntar si abrir
                 if messagebox.askyesno("Abrir", "¿Desea abrir el reporte PDF ahora?"):
                     from modules.reports import abrir_pdf
-                    abrir_pdf(pdf_path)
-                    
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al generar reportes:\n{str(e)}")
-                
-            # ===== AUTOMATIZACIÓN DE CORREO =====
-            try:
-                from modules.models import obtener_correo_presidente
-                correo_destino = obtener_correo_presidente()
-                
-                if correo_destino:
-                    # Mostrar indicador de carga
-                    self.ventana.config(cursor="watch")
-                    self.ventana.update()
-                    
-                    # 1. Generar Backups
-                    from modules.logic import crear_backup
-                    backups = crear_backup("Reporte Mensual Automático")
-                    
-                    # 2. Generar Auditoría
-                    from modules.logic import generar_archivo_auditoria
-                    auditoria_path = generar_archivo_auditoria()
-                    
-                    # 3. Preparar adjuntos
-                    adjuntos = [pdf_path, excel_path]
-                    adjuntos.extend(backups)
-                    if auditoria_path:
-                        adjuntos.append(auditoria_path)
-                        
-                    # 4. Enviar correo
-                    from modules.email_sender import enviar_correo_reporte
-                    enviar_correo_reporte(correo_destino, adjuntos)
-                    
-                    messagebox.showinfo("Correo Enviado", 
-                                      f"Se envió el reporte y los respaldos al Presidente:\n{correo_destino}")
-            except Exception as e:
-                print(f"Error al enviar correo automático: {e}")
-                messagebox.showwarning("Advertencia", f"Reportes generados pero falló el envío de correo:\n{str(e)}")
-            finally:
-                self.ventana.config(cursor="")
+                    abrir_pdf(paquete.pdf)
+            
+            threading.Thread(target=trabajar, name='reporte_mensual', daemon=True).start()
         
-        ttk.Button(dialogo, text="✅ Generar", command=generar).pack(pady=20)
+        boton_generar = ttk.Button(dialogo, text="✅ Generar", command=generar)
+        boton_generar.pack(pady=20)
 
 
 # ==================== CLASE NUEVA: FORMULARIO NUEVO CAMPESINO ====================
@@ -4037,7 +4095,7 @@ class VentanaNuevaCuota:
             return
         
         try:
-            from modules.cuotas import crear_tipo_cuota, asignar_cuota_masiva
+            from modules.cuotas import crear_tipo_cuota, asignar_cuota_masiva, DATOS_INVALIDOS
             from modules.models import obtener_todos_campesinos
             
             # Crear tipo de cuota
@@ -4046,11 +4104,16 @@ class VentanaNuevaCuota:
             # Asignar a todos si se seleccionó
             if self.var_asignar.get() == "todos":
                 campesinos = obtener_todos_campesinos()
-                total = asignar_cuota_masiva(tipo_cuota_id, campesinos)
+                reporte = asignar_cuota_masiva(tipo_cuota_id, campesinos)
                 
-                messagebox.showinfo("Éxito", 
-                                    f"Cuota '{nombre}' creada correctamente.\n"
-                                    f"Asignada a {total} campesinos.")
+                mensaje = (f"Cuota '{nombre}' creada correctamente.\n"
+                           f"Asignada a {reporte['total_asignados']} campesinos.")
+                if reporte['total_invalidos']:
+                    omitidos = [f"Lote {r['numero_lote']} - {r['nombre']}"
+                                for r in reporte['resultados'] if r['resultado'] == DATOS_INVALIDOS]
+                    mensaje += (f"\n\nOmitidos por datos incompletos: {reporte['total_invalidos']}\n"
+                                + "\n".join(omitidos[:10]))
+                messagebox.showinfo("Éxito", mensaje)
             else:
                 messagebox.showinfo("Éxito", f"Cuota '{nombre}' creada correctamente.")
             
@@ -4138,6 +4201,8 @@ class VentanaDetalleCuota:
         frame_botones = ttk.Frame(frame)
         frame_botones.pack(fill=tk.X, pady=10)
         
+        ttk.Button(frame_botones, text="💰 Pagar Seleccionadas", 
+                   command=self.on_doble_click_pagar).pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_botones, text="🔄 Actualizar", 
                    command=self.cargar_detalle).pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_botones, text="Cerrar", 
@@ -4202,53 +4267,11 @@ class VentanaDetalleCuota:
                             ),
                             tags=(str(cuota['id']), str(cuota['pagado'])))
     
-    def on_doble_click_pagar(self, event):
-        """Marca una cuota como pagada al hacer doble click"""
-        selection = self.tree.selection()
-        if not selection:
-            return
-        
-        item = self.tree.item(selection[0])
-        cuota_campesino_id = int(item['tags'][0])
-        pagado = int(item['tags'][1])
-        
-        if pagado:
-            messagebox.showinfo("Información", "Esta cuota ya fue pagada")
-            return
-        
-        # Confirmar pago
-        if messagebox.askyesno("Confirmar Pago", 
-                               "¿Marcar esta cuota como PAGADA y generar recibo?"):
-            try:
-                from modules.cuotas import pagar_cuota
-                
-                resultado = pagar_cuota(cuota_campesino_id)
-                
-                # Generar y mostrar recibo
-                from modules.reports import generar_recibo_cuota_pdf_temporal, abrir_pdf
-                
-                pdf_path = generar_recibo_cuota_pdf_temporal(resultado['recibo_id'])
-                abrir_pdf(pdf_path)
-                
-                if messagebox.askyesno("Imprimir Recibo",
-                                       f"Recibo generado exitosamente\n"
-                                       f"Folio: {resultado['folio']}\n"
-                                       f"Monto: ${resultado['monto']:.2f}\n"
-                                       f"¿Desea imprimir?"):
-                    from modules.reports import imprimir_recibo_y_limpiar
-                    imprimir_recibo_y_limpiar(pdf_path)
-                else:
-                    try:
-                        os.remove(pdf_path)
-                    except:
-                        pass
-                
-                messagebox.showinfo("Éxito", "Cuota pagada correctamente")
-                self.cargar_detalle()
-                self.ventana_gestionar.cargar_tipos_cuota()
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al pagar cuota:\n{str(e)}")
+    def on_doble_click_pagar(self, event=None):
+        """Marca como pagadas las cuotas seleccionadas (doble click o botón)"""
+        if cobrar_cuotas_seleccionadas(self.ventana, self.tree):
+            self.cargar_detalle()
+            self.ventana_gestionar.cargar_tipos_cuota()
     
     def asignar_a_campesino(self):
         """Abre ventana para asignar esta cuota a un campesino"""
@@ -4407,26 +4430,18 @@ class VentanaAsignarCuota:
         
         item = self.tree.item(selection[0])
         campesino_id = int(item['tags'][0])
+        nombre = item['values'][1]
+        superficie = item['values'][3]
         
         try:
-            from modules.cuotas import asignar_cuota_a_campesino
-            from modules.models import obtener_campesino_por_id
-            
-            campesino = obtener_campesino_por_id(campesino_id)
+            from modules.unificada import asignar_cuota_desde_padron
             
-            # ✅ PASAR SUPERFICIE para calcular monto proporcional
-            asignar_cuota_a_campesino(
-                campesino_id,
-                campesino['numero_lote'],
-                campesino['nombre'],
-                campesino['barrio'],
-                self.tipo_cuota_id,
-                campesino['superficie']  # ✅ AGREGAR ESTE PARÁMETRO
-            )
+            # Lote, nombre, barrio y superficie se toman del padrón en la misma sentencia
+            asignar_cuota_desde_padron(campesino_id, self.tipo_cuota_id)
             
             messagebox.showinfo("Éxito", 
-                                f"Cuota asignada a {campesino['nombre']} correctamente\n"
-                                f"Superficie: {campesino['superficie']} ha")
+                                f"Cuota asignada a {nombre} correctamente\n"
+                                f"Superficie: {superficie}")
             
             self.ventana_detalle.cargar_detalle()
             self.ventana.destroy()
@@ -4719,21 +4734,15 @@ class VentanaAgenda:
         abrir_chat_whatsapp(telefono)
 
     def cargar_campesinos(self):
-        """Carga todos los campesinos"""
-        from modules.models import obtener_todos_campesinos
+        """Carga todos los campesinos (ordenados por lote desde el índice en memoria)"""
+        from modules.indice_agenda import obtener_indice_agenda
         
+        self.mostrar_campesinos(obtener_indice_agenda().todos())
+    
+    def mostrar_campesinos(self, campesinos):
+        """Reemplaza el contenido de la lista"""
         self.tree.delete(*self.tree.get_children())
         
-        campesinos = obtener_todos_campesinos()
-        
-        # Ordenar por lote numéricamente
-        def extraer_numero(lote_str):
-            import re
-            match = re.search(r'\d+', str(lote_str))
-            return int(match.group()) if match else float('inf')
-        
-        campesinos.sort(key=lambda c: extraer_numero(c['numero_lote']))
-        
         for camp in campesinos:
             self.tree.insert('', tk.END, values=(
                 camp['nombre'],
@@ -4742,42 +4751,11 @@ class VentanaAgenda:
             ), tags=(str(camp['id']),))
     
     def buscar(self, event=None):
-        """Busca campesinos"""
-        from modules.models import obtener_todos_campesinos
+        """Filtra campesinos por nombre, lote o barrio mientras se escribe (sin distinguir acentos)"""
+        from modules.indice_agenda import obtener_indice_agenda
         
-        termino = self.entry_buscar.get().strip().lower()
-        
-        self.tree.delete(*self.tree.get_children())
-        
-        if not termino:
-            self.cargar_campesinos()
-            return
-        
-        # Buscar en todos los campesinos
-        campesinos = obtener_todos_campesinos()
-        
-        resultados = []
-        for camp in campesinos:
-            # Buscar en nombre, lote o barrio
-            if (termino in camp['nombre'].lower() or 
-                termino in str(camp['numero_lote']).lower() or 
-                termino in camp['barrio'].lower()):
-                resultados.append(camp)
-        
-        # Ordenar resultados por lote
-        def extraer_numero(lote_str):
-            import re
-            match = re.search(r'\d+', str(lote_str))
-            return int(match.group()) if match else float('inf')
-        
-        resultados.sort(key=lambda c: extraer_numero(c['numero_lote']))
-        
-        for camp in resultados:
-            self.tree.insert('', tk.END, values=(
-                camp['nombre'],
-                camp['numero_lote'],
-                camp['barrio']
-            ), tags=(str(camp['id']),))
+        termino = self.entry_buscar.get().strip()
+        self.mostrar_campesinos(obtener_indice_agenda().buscar(termino))
     
     def limpiar_busqueda(self):
         """Limpia la búsqueda"""
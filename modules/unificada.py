@@ -0,0 +1,181 @@
+# modules/unificada.py - Consultas que Cruzan riego.db y cuotas.db
+# Conexión a riego.db con cuotas.db adjunta (ATTACH ... AS cuotas): las vistas
+# combinadas salen en una sola consulta y los cambios en ambos archivos se
+# confirman en una sola transacción
+import os
+import json
+import sqlite3
+from typing import Dict
+
+from modules import models, cuotas
+from modules.conexion import crear_gestor
+
+ESQUEMA_CUOTAS = 'cuotas'
+
+
+def _adjuntar_cuotas(conn):
+    ruta = os.path.abspath(cuotas.CUOTAS_DB_PATH)
+    conn.execute(f"ATTACH DATABASE ? AS {ESQUEMA_CUOTAS}", (ruta,))
+    conn.execute(f"PRAGMA {ESQUEMA_CUOTAS}.journal_mode = WAL")
+    conn.execute(f"PRAGMA {ESQUEMA_CUOTAS}.synchronous = NORMAL")
+    conn.ruta_cuotas = ruta
+
+
+# Conexión persistente por hilo, aparte de las de models y cuotas
+_gestor_unificado = crear_gestor(lambda: models.DB_PATH, al_abrir=_adjuntar_cuotas)
+
+
+def get_conexion_unificada():
+    """
+    Conexión del hilo actual a riego.db (esquema main) con cuotas.db adjunta
+    como esquema 'cuotas'. Si CUOTAS_DB_PATH cambió, vuelve a adjuntarla.
+    """
+    conn = _gestor_unificado.obtener()
+    ruta = os.path.abspath(cuotas.CUOTAS_DB_PATH)
+    if conn.ruta_cuotas != ruta and not conn.in_transaction:
+        conn.execute(f"DETACH DATABASE {ESQUEMA_CUOTAS}")
+        _adjuntar_cuotas(conn)
+    return conn
+
+
+def transaccion_unificada():
+    """
+    Context manager: una transacción que abarca riego.db y cuotas.db.
+
+    Un error revierte los cambios en ambos archivos. Como las dos bases usan
+    WAL, SQLite garantiza la atomicidad de cada archivo pero no entre archivos
+    si el equipo se apaga justo durante el COMMIT.
+
+    No debe abrirse dentro de models.transaccion() ni transaccion_cuotas():
+    son otras conexiones y esperarían el bloqueo que el mismo hilo tiene.
+    """
+    get_conexion_unificada()
+    return _gestor_unificado.transaccion()
+
+
+# ==================== ESTADO DE CUENTA ====================
+
+def obtener_estado_cuenta(campesino_id: int) -> Dict:
+    """
+    Estado de cuenta completo de un campesino en UNA consulta:
+    datos del lote, siembras, recibos de riego activos y cuotas.
+
+    Returns:
+        Dict con 'campesino' (None si no existe), 'siembras', 'recibos' y
+        'cuotas', cada lista en el mismo orden que obtener_historial_siembras,
+        obtener_recibos_campesino y obtener_cuotas_campesino
+    """
+    conn = get_conexion_unificada()
+    cursor = conn.execute('''
+        SELECT 0 AS grupo, '' AS clave,
+               json_object('id', c.id, 'numero_lote', c.numero_lote, 'nombre', c.nombre,
+                           'localidad', c.localidad, 'barrio', c.barrio,
+                           'superficie', c.superficie) AS datos
+        FROM main.campesinos c
+        WHERE c.id = :id
+        UNION ALL
+        SELECT 1, s.fecha_inicio,
+               json_object('id', s.id, 'cultivo', s.cultivo, 'numero_riegos', s.numero_riegos,
+                           'ciclo', s.ciclo, 'fecha_inicio', s.fecha_inicio,
+                           'fecha_fin', s.fecha_fin, 'activa', s.activa)
+        FROM main.siembras s
+        WHERE s.campesino_id = :id
+        UNION ALL
+        SELECT 2, r.fecha || ' ' || r.hora,
+               json_object('id', r.id, 'folio', r.folio, 'fecha', r.fecha, 'hora', r.hora,
+                           'siembra_id', r.siembra_id, 'cultivo', r.cultivo,
+                           'numero_riego', r.numero_riego, 'tipo_accion', r.tipo_accion,
+                           'costo', r.costo, 'ciclo', r.ciclo)
+        FROM main.recibos r
+        WHERE r.campesino_id = :id AND r.eliminado = 0
+        UNION ALL
+        SELECT 3, cc.fecha_asignacion,
+               json_object('id', cc.id, 'tipo_cuota_id', cc.tipo_cuota_id,
+                           'nombre_tipo_cuota', tc.nombre, 'monto', cc.monto,
+                           'pagado', cc.pagado, 'fecha_asignacion', cc.fecha_asignacion,
+                           'fecha_pago', cc.fecha_pago, 'recibo_folio', cc.recibo_folio)
+        FROM cuotas.cuotas_campesinos cc
+        JOIN cuotas.tipos_cuota tc ON tc.id = cc.tipo_cuota_id
+        WHERE cc.campesino_id = :id
+        ORDER BY grupo, clave DESC
+    ''', {'id': campesino_id})
+
+    cuenta = {'campesino': None, 'siembras': [], 'recibos': [], 'cuotas': []}
+    listas = {1: cuenta['siembras'], 2: cuenta['recibos'], 3: cuenta['cuotas']}
+    for grupo, _, datos in cursor:
+        if grupo == 0:
+            cuenta['campesino'] = json.loads(datos)
+        else:
+            listas[grupo].append(json.loads(datos))
+    conn.close()
+    return cuenta
+
+
+# ==================== OPERACIONES EN AMBOS ARCHIVOS ====================
+
+def asignar_cuota_desde_padron(campesino_id: int, tipo_cuota_id: int) -> int:
+    """
+    Asigna una cuota tomando lote, nombre, barrio y superficie directamente
+    del padrón (INSERT ... SELECT entre los dos archivos).
+
+    Returns:
+        ID de la cuota asignada
+
+    Raises:
+        ValueError: Si el campesino o el tipo de cuota no existen, o si ya la tiene
+    """
+    try:
+        with transaccion_unificada() as conn:
+            cursor = conn.execute('''
+                INSERT INTO cuotas.cuotas_campesinos
+                (campesino_id, tipo_cuota_id, numero_lote, nombre_campesino, barrio, monto)
+                SELECT c.id, tc.id, c.numero_lote, c.nombre, COALESCE(c.barrio, ''),
+                       COALESCE(c.superficie, 0) * tc.monto
+                FROM main.campesinos c, cuotas.tipos_cuota tc
+                WHERE c.id = ? AND tc.id = ?
+            ''', (campesino_id, tipo_cuota_id))
+            if cursor.rowcount == 0:
+                raise ValueError("Campesino o tipo de cuota no encontrado")
+            return cursor.lastrowid
+    except sqlite3.IntegrityError as e:
+        if 'UNIQUE' in str(e):
+            raise ValueError("El campesino ya tiene asignada esta cuota")
+        raise
+
+
+def actualizar_superficie_con_cuotas(campesino_id: int, nueva_superficie: float) -> Dict:
+    """
+    Cambia la superficie del lote y recalcula sus cuotas PENDIENTES en la
+    misma transacción: o cambian las dos bases o ninguna.
+
+    Returns:
+        Dict con nombre, numero_lote, superficie_anterior y cuotas_recalculadas
+
+    Raises:
+        ValueError: Si el campesino no existe
+    """
+    with transaccion_unificada() as conn:
+        row = conn.execute(
+            "SELECT nombre, numero_lote, superficie FROM main.campesinos WHERE id = ?",
+            (campesino_id,)
+        ).fetchone()
+        if not row:
+            raise ValueError("Campesino no encontrado")
+
+        conn.execute("UPDATE main.campesinos SET superficie = ? WHERE id = ?",
+                     (nueva_superficie, campesino_id))
+        cursor = conn.execute('''
+            UPDATE cuotas.cuotas_campesinos
+            SET monto = ? * tc.monto
+            FROM cuotas.tipos_cuota tc
+            WHERE tc.id = cuotas_campesinos.tipo_cuota_id
+              AND cuotas_campesinos.campesino_id = ?
+              AND cuotas_campesinos.pagado = 0
+        ''', (nueva_superficie, campesino_id))
+
+        return {
+            'nombre': row['nombre'],
+            'numero_lote': row['numero_lote'],
+            'superficie_anterior': row['superficie'],
+            'cuotas_recalculadas': cursor.rowcount
+        }
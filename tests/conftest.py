@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def bd_temporal(tmp_path, monkeypatch):
+    """riego.db y cuotas.db vacías en un directorio temporal"""
+    from modules import models, cuotas, unificada
+    monkeypatch.setattr(models, 'DB_PATH', str(tmp_path / 'riego.db'))
+    monkeypatch.setattr(cuotas, 'CUOTAS_DB_PATH', str(tmp_path / 'cuotas.db'))
+    models.init_db()
+    cuotas.init_cuotas_db()
+    yield tmp_path
+    models.vaciar_auditoria()
+    unificada._gestor_unificado.cerrar_hilo_actual()
+    models._gestor_riego.cerrar_hilo_actual()
+    cuotas._gestor_cuotas.cerrar_hilo_actual()
+
+
+@pytest.fixture
+def campesino(bd_temporal):
+    from modules.models import crear_campesino, obtener_campesino_por_id
+    campesino_id = crear_campesino({
+        'numero_lote': '101',
+        'nombre': 'JUAN PEÑA',
+        'localidad': 'Tezontepec de Aldama',
+        'barrio': 'CENTRO',
+        'superficie': 2.0
+    })
+    return obtener_campesino_por_id(campesino_id)
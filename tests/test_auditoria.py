@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from modules import models
+from modules.auditoria import EscritorAuditoria
+from modules.models import registrar_auditoria, vaciar_auditoria, obtener_auditoria, transaccion
+
+
+def _contar(tipo):
+    conn = models.get_connection()
+    return conn.execute('SELECT COUNT(*) FROM auditoria WHERE tipo_evento = ?', (tipo,)).fetchone()[0]
+
+
+def _ruta_diario():
+    return os.path.join(os.path.dirname(models.DB_PATH), 'auditoria_pendiente.jsonl')
+
+
+def _pid_terminado():
+    proceso = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proceso.wait()
+    return proceso.pid
+
+
+def _escribir_diario(ruta, filas):
+    import json
+    with open(ruta, 'a', encoding='utf-8') as f:
+        for fila in filas:
+            f.write(json.dumps(fila) + '\n')
+
+
+def test_eventos_se_escriben_por_lote(bd_temporal):
+    for i in range(5):
+        registrar_auditoria('PRUEBA', f'evento {i}')
+    diario = models._escritor_auditoria.ruta_diario()
+    assert str(os.getpid()) in os.path.basename(diario)
+    assert os.path.exists(diario)
+
+    assert vaciar_auditoria() == 5
+    assert _contar('PRUEBA') == 5
+    assert not os.path.exists(diario)
+
+
+def test_obtener_auditoria_incluye_pendientes(bd_temporal):
+    registrar_auditoria('PRUEBA', 'pendiente')
+    assert obtener_auditoria(1)[0]['descripcion'] == 'pendiente'
+
+
+def test_evento_en_transaccion_se_revierte_con_ella(bd_temporal):
+    with pytest.raises(RuntimeError):
+        with transaccion():
+            registrar_auditoria('PRUEBA', 'venta cancelada')
+            raise RuntimeError('falla')
+    vaciar_auditoria()
+    assert _contar('PRUEBA') == 0
+
+
+def test_recupera_diario_tras_caida(bd_temporal):
+    # Un proceso que se cayó antes de escribir su lote
+    escritor = EscritorAuditoria(models._gestor_riego, _ruta_diario)
+    diario = escritor.ruta_diario(_pid_terminado())
+    perdido = ('2025-10-01 10:00:00', 'PRUEBA', 'Sistema', 'perdido', None)
+    _escribir_diario(diario, [perdido + ('a1',), perdido + ('a2',)])
+
+    # Dos eventos iguales en el mismo segundo son eventos distintos
+    assert escritor.recuperar_pendientes() == 2
+    assert _contar('PRUEBA') == 2
+    assert not os.path.exists(diario)
+
+    # Repetir la recuperación no duplica
+    _escribir_diario(diario, [perdido + ('a1',)])
+    assert escritor.recuperar_pendientes() == 0
+    assert _contar('PRUEBA') == 2
+
+
+def test_no_toca_diario_de_otra_instancia_abierta(bd_temporal):
+    otra = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        escritor = EscritorAuditoria(models._gestor_riego, _ruta_diario)
+        diario = escritor.ruta_diario(otra.pid)
+        _escribir_diario(diario, [('2025-10-01 10:00:00', 'PRUEBA', 'Sistema', 'en curso', None, 'b1')])
+
+        # Mis propios vaciados no borran el diario ajeno
+        registrar_auditoria('PRUEBA', 'mio')
+        vaciar_auditoria()
+        assert escritor.recuperar_pendientes() == 0
+        assert os.path.exists(diario)
+        assert _contar('PRUEBA') == 1
+    finally:
+        otra.kill()
+        otra.wait()
+
+    assert escritor.recuperar_pendientes() == 1
+    assert _contar('PRUEBA') == 2
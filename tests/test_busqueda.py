@@ -0,0 +1,35 @@
+from modules.models import buscar_campesino, crear_campesino, renombrar_campesino
+
+
+def _alta(lote, nombre, barrio='CENTRO'):
+    return crear_campesino({'numero_lote': lote, 'nombre': nombre, 'localidad': 'X',
+                            'barrio': barrio, 'superficie': 1.0})
+
+
+def test_busqueda_sin_acentos(campesino):
+    for termino in ('PENA', 'peña', 'pEñA'):
+        assert [c['id'] for c in buscar_campesino(termino)] == [campesino['id']]
+
+
+def test_prefijo_antes_que_subcadena(bd_temporal):
+    subcadena = _alta('1', 'MARIA JOSEFINA')
+    prefijo = _alta('2', 'JOSE LOPEZ')
+    palabra = _alta('3', 'ANA JOSÉ RUIZ')
+    assert [c['id'] for c in buscar_campesino('jose')] == [prefijo, palabra, subcadena]
+
+
+def test_indice_sigue_los_cambios(bd_temporal):
+    cid = _alta('7', 'PEDRO RAMIREZ', barrio='SAN JUAN')
+    renombrar_campesino(cid, 'PEDRO NUÑEZ')
+    assert buscar_campesino('ramirez') == []
+    assert [c['id'] for c in buscar_campesino('nunez')] == [cid]
+
+    assert buscar_campesino('san juan') == []
+    assert [c['id'] for c in buscar_campesino('san juan', incluir_barrio=True)] == [cid]
+
+
+def test_terminos_cortos_y_lote_exacto(bd_temporal):
+    cid = _alta('15', 'LI WU')
+    _alta('150', 'OTRO')
+    assert [c['id'] for c in buscar_campesino('wu')] == [cid]
+    assert [c['id'] for c in buscar_campesino('15')] == [cid]
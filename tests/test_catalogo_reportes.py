@@ -0,0 +1,95 @@
+import os
+
+from modules import catalogo_reportes as catalogo
+
+
+def _archivo(directorio, nombre, contenido=b'x'):
+    ruta = os.path.join(str(directorio), nombre)
+    with open(ruta, 'wb') as f:
+        f.write(contenido)
+    return ruta
+
+
+def test_clasificar_archivo():
+    assert catalogo.clasificar_archivo('reporte_mensual_2025_06.pdf') == (catalogo.MENSUAL, '2025-06')
+    assert catalogo.clasificar_archivo('reporte_mensual_2025_06.xlsx') == (catalogo.MENSUAL, '2025-06')
+    assert catalogo.clasificar_archivo('corte_caja_20250301.xlsx') == (catalogo.VENTA_DIA_EXCEL, '2025-03-01')
+    assert catalogo.clasificar_archivo('reporte_diario_20250301.pdf') == (catalogo.VENTA_DIA_PDF, '2025-03-01')
+    assert catalogo.clasificar_archivo('cuotas_dia_20250301_101010.xlsx')[0] == catalogo.CUOTAS_EXCEL
+    assert catalogo.clasificar_archivo('auditoria_20250301_101010.pdf')[0] == catalogo.AUDITORIA
+
+
+def test_registrar_buscar_y_eliminar(bd_temporal):
+    ruta = _archivo(bd_temporal, 'reporte_diario_20250301.pdf', b'%PDF-1.4 prueba')
+    datos = catalogo.registrar_reporte(ruta, catalogo.VENTA_DIA_PDF, '2025-03-01')
+    assert datos['bytes'] == 15 and len(datos['sha256']) == 64
+
+    # Regenerar el mismo archivo actualiza el registro en lugar de duplicarlo
+    _archivo(bd_temporal, 'reporte_diario_20250301.pdf', b'%PDF-1.4 otra')
+    catalogo.registrar_reporte(ruta, catalogo.VENTA_DIA_PDF, '2025-03-01')
+    assert catalogo.contar_reportes() == 1
+    assert catalogo.buscar_reportes()[0]['bytes'] == 13
+
+    catalogo.eliminar_reporte(ruta)
+    assert not os.path.exists(ruta)
+    assert catalogo.contar_reportes() == 0
+
+
+def test_filtros_paginas_y_orden(bd_temporal):
+    for dia in range(1, 6):
+        catalogo.registrar_reporte(_archivo(bd_temporal, f'reporte_diario_202503{dia:02d}.pdf'),
+                                   catalogo.VENTA_DIA_PDF, f'2025-03-{dia:02d}')
+    catalogo.registrar_reporte(_archivo(bd_temporal, 'reporte_mensual_2025_03.pdf'),
+                               catalogo.MENSUAL, '2025-03')
+
+    # Los mensuales van primero, como en el gestor
+    assert catalogo.buscar_reportes(limite=1)[0]['tipo'] == catalogo.MENSUAL
+    assert catalogo.contar_reportes(tipo=catalogo.VENTA_DIA_PDF) == 5
+    assert catalogo.contar_reportes(texto='2025-03-0') == 5
+
+    pagina_1 = catalogo.buscar_reportes(tipo=catalogo.VENTA_DIA_PDF, limite=2)
+    pagina_3 = catalogo.buscar_reportes(tipo=catalogo.VENTA_DIA_PDF, limite=2, desplazamiento=4)
+    assert len(pagina_1) == 2 and len(pagina_3) == 1
+    assert pagina_1[0]['ruta'] != pagina_3[0]['ruta']
+
+
+def test_sincronizar_directorio(bd_temporal):
+    directorio = bd_temporal / 'reportes'
+    directorio.mkdir()
+    _archivo(directorio, 'corte_caja_20250301.xlsx')
+    _archivo(directorio, 'estadisticas_20250301_101010.pdf')
+    _archivo(directorio, 'notas.txt')
+
+    assert catalogo.importar_reportes_existentes(str(directorio)) == 2
+    assert catalogo.importar_reportes_existentes(str(directorio)) == 0
+    assert catalogo.buscar_reportes(tipo=catalogo.VENTA_DIA_EXCEL)[0]['periodo'] == '2025-03-01'
+
+    os.remove(directorio / 'corte_caja_20250301.xlsx')
+    assert catalogo.sincronizar_directorio(str(directorio)) == (0, 1)
+    assert catalogo.contar_reportes() == 1
+
+
+def test_importa_aunque_ya_haya_un_reporte_registrado(bd_temporal):
+    directorio = bd_temporal / 'reportes'
+    directorio.mkdir()
+    for nombre in ('corte_caja_20240101.xlsx', 'corte_caja_20240102.xlsx', 'estadisticas_20240103_101010.pdf'):
+        _archivo(directorio, nombre)
+    nuevo = _archivo(directorio, 'estadisticas_20250301_101010.pdf')
+    catalogo.registrar_reporte(nuevo, catalogo.ESTADISTICAS)
+
+    assert catalogo.importar_reportes_existentes(str(directorio)) == 3
+    assert catalogo.contar_reportes() == 4
+
+
+def test_generador_registra_su_reporte(bd_temporal, monkeypatch):
+    from modules import reports
+    monkeypatch.chdir(bd_temporal)
+    recibos = [{'folio': 1, 'numero_lote': '101', 'nombre': 'JUAN PEÑA', 'barrio': 'CENTRO',
+                'ciclo': 'OCTUBRE 2025', 'cultivo': 'MAIZ', 'superficie': 2.0,
+                'numero_riego': 1, 'costo': 900.0, 'fecha': '2025-03-01', 'hora': '10:00:00',
+                'localidad': 'X', 'tipo_accion': 'Nueva siembra'}]
+    ruta = reports.generar_corte_caja_excel('2025-03-01', recibos)
+
+    registrado = catalogo.buscar_reportes()[0]
+    assert registrado['ruta'] == os.path.normpath(ruta)
+    assert (registrado['tipo'], registrado['periodo']) == (catalogo.VENTA_DIA_EXCEL, '2025-03-01')
@@ -0,0 +1,59 @@
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from modules.conexion import crear_gestor
+
+
+@pytest.fixture
+def gestor(tmp_path):
+    ruta = str(tmp_path / 'prueba.db')
+    g = crear_gestor(lambda: ruta)
+    conn = g.obtener()
+    conn.execute('CREATE TABLE t (x INTEGER)')
+    yield g
+    g.cerrar_todas()
+
+
+def test_reutiliza_conexion_del_hilo(gestor):
+    conn = gestor.obtener()
+    conn.close()  # no debe cerrarla
+    assert gestor.obtener() is conn
+    assert conn.execute('SELECT 1').fetchone()[0] == 1
+
+
+def test_conexion_distinta_por_hilo(gestor):
+    principal = gestor.obtener()
+    otras = []
+    hilo = threading.Thread(target=lambda: otras.append(gestor.obtener()))
+    hilo.start()
+    hilo.join()
+    assert otras[0] is not principal
+
+
+def test_transaccion_revierte_si_falla(gestor):
+    with pytest.raises(RuntimeError):
+        with gestor.transaccion() as conn:
+            conn.execute('INSERT INTO t VALUES (1)')
+            raise RuntimeError('falla')
+    assert gestor.obtener().execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+
+def test_commit_anidado_no_confirma_la_transaccion_exterior(gestor):
+    with pytest.raises(RuntimeError):
+        with gestor.transaccion() as conn:
+            conn.execute('INSERT INTO t VALUES (1)')
+            # Una función CRUD dentro de la transacción llama a commit()/close()
+            interna = gestor.obtener()
+            interna.commit()
+            interna.close()
+            raise RuntimeError('falla')
+    assert gestor.obtener().execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+    with gestor.transaccion() as conn:
+        conn.execute('INSERT INTO t VALUES (2)')
+        with gestor.transaccion():
+            conn.execute('INSERT INTO t VALUES (3)')
+    assert gestor.obtener().execute('SELECT COUNT(*) FROM t').fetchone()[0] == 2
@@ -0,0 +1,42 @@
+import sqlite3
+
+import pytest
+from modules import models
+from modules.models import (
+    obtener_configuracion, actualizar_configuracion, obtener_configuracion_float,
+    obtener_toda_configuracion, transaccion
+)
+
+
+def test_escritura_actualiza_cache(bd_temporal):
+    assert obtener_configuracion_float('tarifa_hectarea') == 450.0
+    actualizar_configuracion('tarifa_hectarea', '500.5')
+    assert obtener_configuracion_float('tarifa_hectarea') == 500.5
+    assert obtener_toda_configuracion()['tarifa_hectarea'] == '500.5'
+
+
+def test_detecta_cambios_de_otro_proceso(bd_temporal):
+    assert obtener_configuracion('ciclo_actual') == 'OCTUBRE 2025'
+
+    externa = sqlite3.connect(models.DB_PATH)
+    externa.execute("UPDATE configuracion SET valor = 'ABRIL 2026' WHERE clave = 'ciclo_actual'")
+    externa.commit()
+    externa.close()
+
+    assert obtener_configuracion('ciclo_actual') == 'ABRIL 2026'
+
+
+def test_transaccion_revertida_no_deja_valor_en_cache(bd_temporal):
+    assert obtener_configuracion('ubicacion') == 'Tezontepec de Aldama, Hgo.'
+    with pytest.raises(RuntimeError):
+        with transaccion():
+            actualizar_configuracion('ubicacion', 'OTRA')
+            assert obtener_configuracion('ubicacion') == 'OTRA'
+            raise RuntimeError('cancelada')
+    assert obtener_configuracion('ubicacion') == 'Tezontepec de Aldama, Hgo.'
+
+
+def test_valor_no_numerico_usa_default(bd_temporal):
+    actualizar_configuracion('tarifa_hectarea', 'abc')
+    assert obtener_configuracion_float('tarifa_hectarea', 450.0) == 450.0
+    assert models.obtener_configuracion_int('no_existe', 5) == 5
@@ -0,0 +1,192 @@
+import os
+import sqlite3
+import time
+
+import pytest
+
+from modules import cuotas
+
+
+def _campesinos(cantidad, superficie=2.0):
+    return [{'id': i, 'numero_lote': str(100 + i), 'nombre': f'CAMPESINO {i}',
+             'barrio': 'CENTRO', 'superficie': superficie} for i in range(1, cantidad + 1)]
+
+
+def test_asignacion_masiva_reporta_cada_campesino(bd_temporal):
+    tipo_id = cuotas.crear_tipo_cuota('LIMPIEZA CANAL', 100.0)
+    lista = _campesinos(3)
+    lista.append(dict(lista[0]))                  # repetido en la lista
+    lista.append({'id': 9, 'numero_lote': '109', 'nombre': 'SIN SUPERFICIE',
+                  'barrio': 'CENTRO', 'superficie': None})
+
+    reporte = cuotas.asignar_cuota_masiva(tipo_id, lista)
+
+    assert (reporte['total_asignados'], reporte['total_ya_asignados'], reporte['total_invalidos']) == (3, 1, 1)
+    assert [r['resultado'] for r in reporte['resultados']] == [
+        cuotas.ASIGNADA, cuotas.ASIGNADA, cuotas.ASIGNADA, cuotas.YA_ASIGNADA, cuotas.DATOS_INVALIDOS]
+    assert reporte['resultados'][0]['monto'] == 200.0
+
+    # Repetir la asignación no duplica
+    segunda = cuotas.asignar_cuota_masiva(tipo_id, _campesinos(4))
+    assert (segunda['total_asignados'], segunda['total_ya_asignados']) == (1, 3)
+    assert len(cuotas.obtener_cuotas_campesino(1)) == 1
+
+
+def test_indice_unico_impide_doble_asignacion(bd_temporal):
+    tipo_id = cuotas.crear_tipo_cuota('BOMBA', 50.0)
+    cuotas.asignar_cuota_a_campesino(1, '101', 'JUAN PEÑA', 'CENTRO', tipo_id, 2.0)
+
+    with pytest.raises(ValueError, match='ya tiene asignada'):
+        cuotas.asignar_cuota_a_campesino(1, '101', 'JUAN PEÑA', 'CENTRO', tipo_id, 2.0)
+    with pytest.raises(sqlite3.IntegrityError):
+        cuotas.get_cuotas_connection().execute(
+            "INSERT INTO cuotas_campesinos (campesino_id, tipo_cuota_id, numero_lote, nombre_campesino, barrio, monto) "
+            "VALUES (1, ?, '101', 'JUAN PEÑA', 'CENTRO', 1)", (tipo_id,))
+
+
+def test_asignacion_masiva_es_rapida(bd_temporal):
+    tipo_id = cuotas.crear_tipo_cuota('DESAZOLVE', 10.0)
+    inicio = time.perf_counter()
+    reporte = cuotas.asignar_cuota_masiva(tipo_id, _campesinos(2000))
+    assert reporte['total_asignados'] == 2000
+    assert time.perf_counter() - inicio < 1.0
+
+
+def _pagar_primera(campesino_id):
+    cuota = cuotas.obtener_cuotas_pendientes_campesino(campesino_id)[0]
+    cuotas.pagar_cuota(cuota['id'])
+
+
+def test_cambio_de_superficie_solo_recalcula_pendientes(bd_temporal, capsys):
+    canal = cuotas.crear_tipo_cuota('CANAL', 100.0)
+    bomba = cuotas.crear_tipo_cuota('BOMBA', 10.0)
+    cuotas.asignar_cuota_masiva(canal, _campesinos(2))
+    cuotas.asignar_cuota_masiva(bomba, _campesinos(2))
+    _pagar_primera(1)
+    capsys.readouterr()
+
+    cuotas.actualizar_datos_campesino_en_cuotas(1, {'superficie': 3.0, 'nombre': 'NUEVO'})
+
+    montos = {c['nombre_tipo_cuota']: (c['monto'], c['pagado'], c['nombre_campesino'])
+              for c in cuotas.obtener_cuotas_campesino(1)}
+    pagada = 'CANAL' if montos['CANAL'][1] else 'BOMBA'
+    pendiente = 'BOMBA' if pagada == 'CANAL' else 'CANAL'
+    tarifa = {'CANAL': 100.0, 'BOMBA': 10.0}
+    assert montos[pagada][0] == 2.0 * tarifa[pagada]
+    assert montos[pendiente][0] == 3.0 * tarifa[pendiente]
+    assert {m[2] for m in montos.values()} == {'NUEVO'}
+    # El campesino 2 no se toca y ya no hay mensajes de depuración
+    assert all(c['monto'] in (200.0, 20.0) for c in cuotas.obtener_cuotas_campesino(2))
+    assert 'DEBUG' not in capsys.readouterr().out
+
+
+def test_resincronizar_superficies_por_lote(bd_temporal):
+    from modules import models
+    tipo_id = cuotas.crear_tipo_cuota('CANAL', 100.0)
+    ids = [models.crear_campesino({'numero_lote': str(200 + i), 'nombre': f'C{i}', 'localidad': 'X',
+                                   'barrio': 'CENTRO', 'superficie': 1.0}) for i in range(3)]
+    cuotas.asignar_cuota_masiva(tipo_id, models.obtener_todos_campesinos())
+
+    conn = models.get_connection()
+    conn.execute('UPDATE campesinos SET superficie = superficie * 2')
+    assert models.sincronizar_superficies_en_cuotas(ids[:2]) == 2
+    assert [cuotas.obtener_cuotas_campesino(i)[0]['monto'] for i in ids] == [200.0, 200.0, 100.0]
+    assert models.sincronizar_superficies_en_cuotas() == 3
+    assert cuotas.obtener_cuotas_campesino(ids[2])[0]['monto'] == 200.0
+
+
+def _resumen_calculado(tipo_id):
+    conn = cuotas.get_cuotas_connection()
+    return conn.execute('''
+        SELECT COUNT(*), COALESCE(SUM(pagado), 0), COALESCE(SUM(CASE WHEN pagado THEN monto END), 0),
+               COALESCE(SUM(CASE WHEN pagado THEN 0 ELSE monto END), 0)
+        FROM cuotas_campesinos WHERE tipo_cuota_id = ?
+    ''', (tipo_id,)).fetchone()
+
+
+def test_resumen_por_tipo_se_mantiene_con_triggers(bd_temporal):
+    canal = cuotas.crear_tipo_cuota('CANAL', 100.0)
+    bomba = cuotas.crear_tipo_cuota('BOMBA', 10.0)
+    cuotas.asignar_cuota_masiva(canal, _campesinos(3))
+    cuotas.asignar_cuota_masiva(bomba, _campesinos(2))
+    pendiente = [c for c in cuotas.obtener_cuotas_pendientes_campesino(1) if c['tipo_cuota_id'] == canal][0]
+    cuotas.pagar_cuota(pendiente['id'])
+    cuotas.actualizar_datos_campesino_en_cuotas(2, {'superficie': 1.5})
+    cuotas.get_cuotas_connection().execute('DELETE FROM cuotas_campesinos WHERE campesino_id = 3')
+
+    resumen = cuotas.obtener_resumen_cuota(canal)
+    assert resumen == {'total_asignados': 2, 'monto_total': 350.0,
+                       'total_pagados': 1, 'monto_recaudado': 200.0,
+                       'total_pendientes': 1, 'monto_pendiente': 150.0}
+    for tipo_id in (canal, bomba):
+        r = cuotas.obtener_resumen_cuota(tipo_id)
+        assert (r['total_asignados'], r['total_pagados'], r['monto_recaudado'], r['monto_pendiente']) == \
+            tuple(_resumen_calculado(tipo_id))
+
+    stats = cuotas.obtener_estadisticas_generales_cuotas()
+    assert (stats['total_tipos_cuotas'], stats['total_cuotas_asignadas'], stats['total_pagadas']) == (2, 4, 1)
+    assert stats['monto_total'] == 350.0 + 35.0
+
+    por_nombre = {c['nombre']: c for c in cuotas.obtener_todas_cuotas_con_estado()}
+    assert por_nombre['BOMBA']['total_pendientes'] == 2
+    assert por_nombre['CANAL']['monto_recaudado'] == 200.0
+
+
+def test_reconstruir_resumen_cuotas(bd_temporal):
+    tipo_id = cuotas.crear_tipo_cuota('CANAL', 100.0)
+    cuotas.asignar_cuota_masiva(tipo_id, _campesinos(2))
+    antes = cuotas.obtener_resumen_cuota(tipo_id)
+    cuotas.get_cuotas_connection().execute('DELETE FROM resumen_tipos_cuota')
+    cuotas.reconstruir_resumen_cuotas()
+    assert cuotas.obtener_resumen_cuota(tipo_id) == antes
+    assert cuotas.obtener_resumen_cuota(999)['total_asignados'] == 0
+
+
+def test_cobro_de_varias_cuotas_con_folio_por_tipo(bd_temporal):
+    canal = cuotas.crear_tipo_cuota('CANAL', 100.0)
+    bomba = cuotas.crear_tipo_cuota('BOMBA', 10.0)
+    cuotas.asignar_cuota_masiva(canal, _campesinos(2))
+    cuotas.asignar_cuota_masiva(bomba, _campesinos(2))
+    ids = [c['id'] for i in (1, 2) for c in cuotas.obtener_cuotas_pendientes_campesino(i)]
+
+    recibos = cuotas.pagar_cuotas(ids + ids[:1])
+
+    assert len(recibos) == 4
+    por_tipo = {}
+    for r in recibos:
+        por_tipo.setdefault(r['nombre_cuota'], []).append(r['folio'])
+    assert {k: sorted(v) for k, v in por_tipo.items()} == {'CANAL': [1, 2], 'BOMBA': [1, 2]}
+    assert len({(r['fecha'], r['hora']) for r in recibos}) == 1
+    assert cuotas.obtener_resumen_cuota(canal)['total_pagados'] == 2
+    assert [r['id'] for r in cuotas.obtener_recibos_cuota([r['recibo_id'] for r in recibos])] == \
+        [r['recibo_id'] for r in recibos]
+
+
+def test_cobro_multiple_se_revierte_completo(bd_temporal):
+    canal = cuotas.crear_tipo_cuota('CANAL', 100.0)
+    cuotas.asignar_cuota_masiva(canal, _campesinos(3))
+    ids = [cuotas.obtener_cuotas_pendientes_campesino(i)[0]['id'] for i in (1, 2, 3)]
+    cuotas.pagar_cuota(ids[1])
+
+    with pytest.raises(ValueError, match='ya fue pagada'):
+        cuotas.pagar_cuotas(ids)
+    with pytest.raises(ValueError, match='no encontrada'):
+        cuotas.pagar_cuotas([ids[0], 9999])
+
+    assert cuotas.obtener_resumen_cuota(canal)['total_pagados'] == 1
+    assert [r['folio'] for r in cuotas.pagar_cuotas([ids[0], ids[2]])] == [2, 3]
+
+
+def test_recibos_de_un_cobro_en_un_solo_pdf(bd_temporal):
+    from modules import reports
+    canal = cuotas.crear_tipo_cuota('CANAL', 100.0)
+    cuotas.asignar_cuota_masiva(canal, _campesinos(3))
+    ids = [cuotas.obtener_cuotas_pendientes_campesino(i)[0]['id'] for i in (1, 2, 3)]
+    recibos = cuotas.pagar_cuotas(ids)
+
+    ruta = reports.generar_recibos_cuota_pdf_temporal([r['recibo_id'] for r in recibos])
+    try:
+        with open(ruta, 'rb') as f:
+            assert f.read().count(b'/Type /Page\n') == 3
+    finally:
+        os.remove(ruta)
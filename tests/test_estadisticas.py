@@ -0,0 +1,36 @@
+from modules import logic, models
+from modules.estadisticas import obtener_estadisticas
+
+
+def test_instantanea_se_reutiliza_hasta_que_cambian_los_datos(campesino):
+    models.crear_campesino({'numero_lote': '102', 'nombre': 'ANA RUIZ', 'localidad': 'X',
+                            'barrio': 'NORTE', 'superficie': 1.5})
+    logic.nueva_siembra(campesino['id'], 'MAIZ', 2)
+
+    primera = obtener_estadisticas()
+    assert obtener_estadisticas() is primera
+    assert primera['total_campesinos'] == 2
+    assert primera['total_hectareas'] == 3.5
+    assert primera['hectareas_sembradas'] == 2.0
+    assert primera['campesinos_sin_siembra'] == 1
+    assert primera['hectareas_por_barrio'] == {'CENTRO': 2.0, 'NORTE': 1.5}
+    assert primera['siembras_por_cultivo'] == {'MAIZ': 1}
+    assert primera['total_recibos'] == 2
+    assert primera['ingreso_real'] == models.obtener_total_ciclo(primera['ciclo_actual'])
+
+    maiz = primera['por_cultivo']['MAIZ']
+    assert (maiz['total_campesinos'], maiz['total_riegos'], maiz['num_recibos']) == (1, 2, 2)
+    assert models.obtener_estadisticas_por_cultivo('MAIZ')['total_hectareas'] == 2.0
+
+    logic.vender_riego(campesino['id'], 1)
+    segunda = obtener_estadisticas()
+    assert segunda is not primera
+    assert segunda['por_cultivo']['MAIZ']['total_riegos'] == 3
+    assert segunda['total_recibos'] == 3
+
+
+def test_estadisticas_generales_conserva_claves(bd_temporal):
+    estadisticas = models.obtener_estadisticas_generales()
+    assert 'por_cultivo' not in estadisticas
+    assert estadisticas['ingreso_real'] == 0
+    assert models.obtener_estadisticas_por_cultivo('TRIGO')['total_campesinos'] == 0
@@ -0,0 +1,49 @@
+import openpyxl
+
+from modules import reports
+from modules.excel import EscritorExcel
+
+
+def _recibo(folio, costo, tipo='Riego adicional', **extra):
+    recibo = {'folio': folio, 'fecha': '2025-03-01', 'hora': '10:00:00', 'numero_lote': 101,
+              'nombre': 'JUAN PEÑA', 'localidad': 'X', 'barrio': 'CENTRO', 'superficie': 2.0,
+              'cultivo': 'MAIZ', 'numero_riego': 1, 'tipo_accion': tipo, 'costo': costo,
+              'ciclo': 'OCTUBRE 2025'}
+    recibo.update(extra)
+    return recibo
+
+
+def test_escritor_fija_anchos_y_combina(tmp_path):
+    excel = EscritorExcel(str(tmp_path / 'x.xlsx'), 'Hoja', [8, 30])
+    excel.agregar_fila(['TITULO'])
+    excel.combinar(1, 2)
+    excel.agregar_fila([1, 'UNO'], {'number_format': '0.00'})
+    ws = openpyxl.load_workbook(excel.guardar()).active
+
+    assert ws.column_dimensions['B'].width == 30
+    assert [str(r) for r in ws.merged_cells.ranges] == ['A1:B1']
+    assert ws['A2'].number_format == '0.00'
+
+
+def test_corte_de_caja(bd_temporal, monkeypatch):
+    monkeypatch.chdir(bd_temporal)
+    recibos = [_recibo(1, 100.0, 'Nueva siembra'), _recibo(2, 50.0),
+               _recibo(3, 999.0, eliminado=1)]
+    ws = openpyxl.load_workbook(reports.generar_corte_caja_excel('2025-03-01', recibos)).active
+
+    assert ws['A5'].value == 'FOLIO'
+    assert [ws.cell(row=6, column=c).value for c in (1, 9)] == [1, 100.0]
+    assert ws['A9'].value == 'TOTAL DEL DÍA:' and ws['I9'].value == 150.0
+    assert ws['I9'].number_format == '$#,##0.00'
+    assert 'A9:H9' in [str(r) for r in ws.merged_cells.ranges]
+    assert [ws['B12'].value, ws['B13'].value, ws['B14'].value] == [2, 1, 1]
+
+
+def test_reporte_mensual_acepta_un_generador(bd_temporal, monkeypatch):
+    monkeypatch.chdir(bd_temporal)
+    recibos = (_recibo(folio, 10.0) for folio in range(1, 1001))
+    ws = openpyxl.load_workbook(reports.generar_reporte_mensual_excel(2025, 3, recibos)).active
+
+    assert ws['A3'].value == 'FOLIO'
+    assert ws['A1003'].value == 1000
+    assert (ws['H1005'].value, ws['I1005'].value) == ('TOTAL:', 10000.0)
@@ -0,0 +1,58 @@
+import threading
+from datetime import datetime
+
+from modules import logic
+from modules.models import reservar_folio, consultar_folio, fijar_folio, liberar_folio, obtener_recibos_campesino
+
+
+def test_reservas_concurrentes_no_repiten_folio(bd_temporal):
+    from modules import models
+    folios = []
+    lock = threading.Lock()
+
+    def ventanilla():
+        for _ in range(20):
+            folio = reservar_folio()
+            with lock:
+                folios.append(folio)
+        models._gestor_riego.cerrar_hilo_actual()
+
+    hilos = [threading.Thread(target=ventanilla) for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    assert sorted(folios) == list(range(1, 81))
+    assert consultar_folio() == 81
+
+
+def test_migra_folio_desde_configuracion(bd_temporal):
+    from modules.models import init_db, get_connection
+    conn = get_connection()
+    conn.execute('DROP TABLE secuencias')
+    conn.execute("INSERT INTO configuracion (clave, valor) VALUES ('folio_actual', '57')")
+    conn.execute('PRAGMA user_version = 0')  # Base anterior a la versión de esquema
+    init_db()
+    assert consultar_folio() == 57
+
+
+def test_folio_compartido_no_se_libera(campesino):
+    venta = logic.nueva_siembra(campesino['id'], 'MAIZ', 2)
+    hoy = datetime.now().strftime('%Y-%m-%d')
+
+    logic.eliminar_recibo_dia(venta['recibo_ids'][1], 'error de captura')
+    # El otro riego sigue usando el folio
+    assert consultar_folio() == venta['folio'] + 1
+
+    logic.eliminar_recibo_dia(venta['recibo_ids'][0], 'error de captura')
+    assert consultar_folio() == venta['folio']
+    assert obtener_recibos_campesino(campesino['id']) == []
+    assert not liberar_folio(venta['folio'], hoy)
+
+
+def test_fijar_folio(bd_temporal):
+    fijar_folio(40)
+    assert reservar_folio() == 40
+    assert logic.obtener_folio_actual() == 41
+    assert not logic.actualizar_folio_actual(0)
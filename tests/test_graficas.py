@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from modules import graficas
+
+pytest.importorskip('matplotlib')
+
+DATOS = {'cultivos': ['MAIZ', 'FRIJOL'], 'superficies': [12.5, 4.0], 'siembras': [6, 2]}
+
+
+def test_ruta_depende_solo_del_contenido(tmp_path):
+    ruta = graficas.ruta_grafica('barras_cultivos', DATOS, str(tmp_path))
+    assert ruta == graficas.ruta_grafica('barras_cultivos', dict(reversed(DATOS.items())), str(tmp_path))
+    assert ruta != graficas.ruta_grafica('barras_cultivos', dict(DATOS, superficies=[12.5, 4.5]), str(tmp_path))
+    assert ruta != graficas.ruta_grafica('dona_cultivos', DATOS, str(tmp_path))
+
+
+def test_graficas_en_proceso_aparte_y_luego_desde_cache(tmp_path, monkeypatch):
+    peticiones = [(tipo, DATOS) for tipo in ('barras_cultivos', 'dona_cultivos', 'comparativo_cultivos')]
+    rutas = graficas.obtener_graficas(peticiones, str(tmp_path))
+    assert all(os.path.getsize(r) > 0 for r in rutas)
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(r) for r in rutas)
+
+    def sin_proceso():
+        raise AssertionError("Con los mismos datos no debe dibujarse nada")
+    monkeypatch.setattr(graficas, '_obtener_ejecutor', sin_proceso)
+    assert graficas.obtener_graficas(peticiones, str(tmp_path)) == rutas
+
+
+def test_limpiar_cache_conserva_las_recientes(tmp_path):
+    for i in range(5):
+        ruta = tmp_path / f"barras_{i}.png"
+        ruta.write_bytes(b'png')
+        os.utime(ruta, (i, i))
+    assert graficas.limpiar_cache(mantener=2, directorio=str(tmp_path)) == 3
+    assert sorted(os.listdir(tmp_path)) == ['barras_3.png', 'barras_4.png']
@@ -0,0 +1,107 @@
+import os
+import stat
+import time
+
+import pytest
+
+from modules import impresion
+from modules.impresion import ColaImpresion, COMPLETADO, FALLIDO, REINTENTANDO
+
+# En Windows la cola usa ShellExecute en lugar de lp
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason='usa un lp falso de shell')
+
+
+def _lp_falso(tmp_path, fallos):
+    """Script 'lp' que falla las primeras `fallos` veces y anota sus argumentos"""
+    contador = tmp_path / 'intentos'
+    registro = tmp_path / 'lp.log'
+    script = tmp_path / 'lp'
+    script.write_text(f'''#!/bin/sh
+n=$(cat {contador} 2>/dev/null || echo 0)
+n=$((n + 1))
+echo $n > {contador}
+if [ $n -le {fallos} ]; then echo "impresora ocupada" >&2; exit 1; fi
+echo "$@" >> {registro}
+''')
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script), registro
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    ruta = tmp_path / 'recibo_1.pdf'
+    ruta.write_bytes(b'%PDF-1.4\n')
+    return str(ruta)
+
+
+def test_reintenta_y_borra_el_temporal(tmp_path, pdf, monkeypatch):
+    comando, registro = _lp_falso(tmp_path, fallos=2)
+    monkeypatch.setattr(impresion, 'COMANDO_LP', comando)
+    estados = []
+
+    cola = ColaImpresion(espera_inicial=0.01)
+    trabajo = cola.encolar(pdf, impresora='CAJA', al_cambiar=lambda t: estados.append(t.estado))
+    assert trabajo.esperar(timeout=5)
+
+    assert trabajo.estado == COMPLETADO
+    assert trabajo.intentos == 3
+    assert estados.count(REINTENTANDO) == 2
+    assert registro.read_text().split() == ['-d', 'CAJA', pdf]
+    assert not os.path.exists(pdf)
+
+
+def test_falla_tras_agotar_intentos(tmp_path, pdf, monkeypatch):
+    comando, _ = _lp_falso(tmp_path, fallos=10)
+    monkeypatch.setattr(impresion, 'COMANDO_LP', comando)
+
+    cola = ColaImpresion(max_intentos=2, espera_inicial=0.01)
+    trabajo = cola.encolar(pdf)
+    assert cola.esperar(timeout=5)
+    assert trabajo.estado == FALLIDO
+    assert trabajo.intentos == 2
+
+
+def test_sin_lp_no_reintenta(tmp_path, pdf, monkeypatch):
+    monkeypatch.setattr(impresion, 'COMANDO_LP', str(tmp_path / 'no_existe'))
+
+    cola = ColaImpresion(espera_inicial=0.01)
+    trabajo = cola.encolar(pdf, eliminar_al_terminar=False)
+    assert trabajo.esperar(timeout=5)
+    assert trabajo.estado == FALLIDO
+    assert trabajo.intentos == 1
+    assert os.path.exists(pdf)
+
+
+def test_borrado_pospuesto_lo_hace_la_cola(tmp_path, pdf, monkeypatch):
+    comando, _ = _lp_falso(tmp_path, fallos=0)
+    monkeypatch.setattr(impresion, 'COMANDO_LP', comando)
+
+    cola = ColaImpresion(espera_borrado=0.2)
+    trabajo = cola.encolar(pdf)
+    assert trabajo.esperar(timeout=5)
+    assert os.path.exists(pdf)
+    # Sin temporizadores: el hilo de la cola lo borra al vencer la espera
+    for _ in range(50):
+        if not os.path.exists(pdf):
+            break
+        time.sleep(0.05)
+    assert not os.path.exists(pdf)
+
+
+def test_al_arrancar_limpia_temporales_viejos(tmp_path, monkeypatch):
+    comando, _ = _lp_falso(tmp_path, fallos=0)
+    monkeypatch.setattr(impresion, 'COMANDO_LP', comando)
+    temporales = tmp_path / 'recibos_temp'
+    temporales.mkdir()
+    viejo = temporales / 'recibo_1_viejo.pdf'
+    reciente = temporales / 'recibo_2.pdf'
+    for ruta in (viejo, reciente):
+        ruta.write_bytes(b'%PDF-1.4\n')
+    hace_dos_horas = time.time() - 7200
+    os.utime(viejo, (hace_dos_horas, hace_dos_horas))
+
+    cola = ColaImpresion(directorio_temporal=str(temporales))
+    assert cola.encolar(str(reciente), eliminar_al_terminar=False).esperar(timeout=5)
+
+    assert not viejo.exists()
+    assert reciente.exists()
@@ -0,0 +1,38 @@
+from modules.models import crear_campesino, renombrar_campesino, eliminar_campesino
+from modules.indice_agenda import IndiceAgenda
+
+
+def _alta(lote, nombre, barrio='CENTRO'):
+    return crear_campesino({'numero_lote': lote, 'nombre': nombre, 'localidad': 'X',
+                            'barrio': barrio, 'superficie': 1.0})
+
+
+def test_orden_por_lote_numerico(bd_temporal):
+    _alta('S/N', 'SIN NUMERO')
+    _alta('100', 'CIEN')
+    _alta('9-A', 'NUEVE')
+    assert [c['nombre'] for c in IndiceAgenda().todos()] == ['NUEVE', 'CIEN', 'SIN NUMERO']
+
+
+def test_refina_mientras_se_escribe(bd_temporal):
+    juan = _alta('1', 'JUAN PEÑA', barrio='SAN JOSÉ')
+    _alta('2', 'JUANA LOPEZ')
+    indice = IndiceAgenda()
+    assert len(indice.buscar('jua')) == 2
+    assert [c['id'] for c in indice.buscar('juan pen')] == [juan]
+    assert [c['id'] for c in indice.buscar('juan pena jose')] == [juan]
+    # Al borrar caracteres se vuelve a buscar en todo el padrón
+    assert len(indice.buscar('jua')) == 2
+
+
+def test_recarga_cuando_cambia_el_padron(bd_temporal):
+    cid = _alta('7', 'PEDRO RAMIREZ')
+    indice = IndiceAgenda()
+    assert [c['id'] for c in indice.buscar('ramirez')] == [cid]
+
+    renombrar_campesino(cid, 'PEDRO NUÑEZ')
+    assert indice.buscar('ramirez') == []
+    assert [c['id'] for c in indice.buscar('nunez')] == [cid]
+
+    eliminar_campesino(cid)
+    assert indice.todos() == []
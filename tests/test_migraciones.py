@@ -0,0 +1,59 @@
+from modules import cuotas
+
+
+def test_recibos_cuotas_no_se_recrean_si_ya_estan_migrados(bd_temporal):
+    conn = cuotas.get_cuotas_connection()
+    conn.execute('''
+        INSERT INTO recibos_cuotas (folio, tipo_cuota_id, fecha, hora, cuota_campesino_id,
+            campesino_id, numero_lote, nombre_campesino, barrio, nombre_cuota, monto,
+            eliminado, motivo_eliminacion)
+        VALUES (1, 1, '2025-01-01', '10:00:00', 1, 1, '101', 'JUAN', 'CENTRO', 'CANAL', 50, 1, 'ERROR DE CAPTURA')
+    ''')
+    sql_antes = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'recibos_cuotas'").fetchone()[0]
+
+    cuotas.recrear_tabla_recibos_cuotas()
+
+    assert conn.execute('SELECT motivo_eliminacion FROM recibos_cuotas').fetchone()[0] == 'ERROR DE CAPTURA'
+    assert conn.execute("SELECT sql FROM sqlite_master WHERE name = 'recibos_cuotas'").fetchone()[0] == sql_antes
+
+
+def test_recibos_cuotas_antiguos_se_migran(bd_temporal):
+    conn = cuotas.get_cuotas_connection()
+    conn.execute('DROP TABLE recibos_cuotas')
+    conn.execute('''
+        CREATE TABLE recibos_cuotas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, folio INTEGER UNIQUE NOT NULL,
+            fecha TEXT, hora TEXT, cuota_campesino_id INTEGER, campesino_id INTEGER,
+            numero_lote TEXT, nombre_campesino TEXT, barrio TEXT, nombre_cuota TEXT,
+            monto REAL, eliminado BOOLEAN DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT INTO tipos_cuota (nombre, monto) VALUES ('CANAL', 50)")
+    conn.execute('''
+        INSERT INTO recibos_cuotas (folio, fecha, hora, cuota_campesino_id, campesino_id,
+            numero_lote, nombre_campesino, barrio, nombre_cuota, monto)
+        VALUES (7, '2025-01-01', '10:00:00', 1, 1, '101', 'JUAN', 'CENTRO', 'CANAL', 50)
+    ''')
+
+    cuotas.recrear_tabla_recibos_cuotas()
+
+    assert cuotas._recibos_cuotas_migrados(conn.cursor())
+    assert conn.execute('SELECT folio FROM recibos_cuotas').fetchone()[0] == 7
+
+
+def test_arranque_con_bases_al_dia_no_repite_migraciones(bd_temporal):
+    from modules import models
+    assert models.get_connection().execute('PRAGMA user_version').fetchone()[0] == models.VERSION_ESQUEMA
+    assert cuotas.get_cuotas_connection().execute('PRAGMA user_version').fetchone()[0] == cuotas.VERSION_ESQUEMA_CUOTAS
+
+    consultas = []
+    for conn in (models.get_connection(), cuotas.get_cuotas_connection()):
+        conn.set_trace_callback(consultas.append)
+    try:
+        models.init_db()
+        cuotas.init_cuotas_db()
+    finally:
+        for conn in (models.get_connection(), cuotas.get_cuotas_connection()):
+            conn.set_trace_callback(None)
+
+    assert consultas == ['PRAGMA user_version', 'PRAGMA user_version']
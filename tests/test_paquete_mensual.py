@@ -0,0 +1,50 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from modules import logic, reports
+from modules.paquete_mensual import generar_paquete_mensual, PASO_EXCEL, PASO_RECIBOS
+
+
+@pytest.fixture
+def venta_del_mes(campesino, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # reportes y respaldos van a database/ relativo
+    logic.nueva_siembra(campesino['id'], 'MAIZ', 2)
+    hoy = datetime.now()
+    return hoy.year, hoy.month
+
+
+def test_paquete_completo_en_paralelo(venta_del_mes):
+    avisos = []
+
+    def al_progresar(paso, terminados, total):
+        avisos.append((paso, terminados, total))
+
+    paquete = generar_paquete_mensual(*venta_del_mes, al_progresar=al_progresar)
+
+    assert paquete.errores == {}
+    assert paquete.cantidad_recibos == 2
+    assert paquete.adjuntos()[:2] == [paquete.pdf, paquete.excel]
+    assert paquete.adjuntos()[-1] == paquete.auditoria
+    assert len(paquete.respaldos) == 2
+    assert all(os.path.exists(ruta) for ruta in paquete.adjuntos())
+
+    assert avisos[0] == (PASO_RECIBOS, 1, 4)
+    assert [terminados for _, terminados, _ in avisos] == [1, 2, 3, 4]
+
+
+def test_paso_fallido_no_detiene_los_demas(venta_del_mes, monkeypatch):
+    def fallar(*args):
+        raise RuntimeError('disco lleno')
+    monkeypatch.setattr(reports, 'generar_reporte_mensual_excel', fallar)
+
+    paquete = generar_paquete_mensual(*venta_del_mes, con_respaldos=False)
+    assert paquete.errores == {PASO_EXCEL: 'disco lleno'}
+    assert paquete.excel is None
+    assert paquete.adjuntos() == [paquete.pdf]
+
+
+def test_mes_sin_recibos(bd_temporal):
+    with pytest.raises(ValueError):
+        generar_paquete_mensual(2001, 1)
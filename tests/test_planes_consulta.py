@@ -0,0 +1,79 @@
+"""Las consultas de recibos por fecha y ciclo deben resolverse con índice"""
+import pytest
+
+from modules import models, logic
+
+
+@pytest.fixture
+def consultas_ejecutadas(bd_temporal):
+    """Registra el SQL (con parámetros ya sustituidos) que pasa por la conexión de riego"""
+    conn = models.get_connection()
+    ejecutadas = []
+    conn.set_trace_callback(ejecutadas.append)
+    yield ejecutadas
+    conn.set_trace_callback(None)
+
+
+def plan_de(sql_recibos):
+    conn = models.get_connection()
+    conn.set_trace_callback(None)
+    filas = conn.execute(f"EXPLAIN QUERY PLAN {sql_recibos}").fetchall()
+    return [fila[3] for fila in filas]
+
+
+def sql_sobre_recibos(ejecutadas):
+    consultas = [sql for sql in ejecutadas if 'FROM recibos' in sql]
+    assert consultas, "No se ejecutó ninguna consulta sobre recibos"
+    return consultas[-1]
+
+
+def assert_usa_indice(plan, indice):
+    assert not any(paso.startswith('SCAN r') or paso == 'SCAN recibos' for paso in plan), plan
+    assert any(indice in paso for paso in plan), plan
+
+
+def test_rango_mes_cruza_diciembre():
+    assert models.rango_mes(2025, 2) == ('2025-02-01', '2025-03-01')
+    assert models.rango_mes(2025, 12) == ('2025-12-01', '2026-01-01')
+
+
+def test_recibos_mes_usa_indice_de_fecha(consultas_ejecutadas):
+    models.obtener_recibos_mes(2025, 12)
+    plan = plan_de(sql_sobre_recibos(consultas_ejecutadas))
+    assert_usa_indice(plan, 'idx_recibo_activo_fecha')
+
+
+def test_recibos_dia_usa_indice_de_fecha(consultas_ejecutadas):
+    models.obtener_recibos_dia('2025-06-01')
+    plan = plan_de(sql_sobre_recibos(consultas_ejecutadas))
+    assert_usa_indice(plan, 'idx_recibo_activo_fecha')
+
+
+def test_busqueda_avanzada_por_fechas_usa_indice(consultas_ejecutadas):
+    logic.buscar_recibos_avanzado({'fecha_inicio': '2025-06-01', 'fecha_fin': '2025-06-30'})
+    sql = sql_sobre_recibos(consultas_ejecutadas)
+    assert "r.fecha < '2025-07-01'" in sql
+    assert_usa_indice(plan_de(sql), 'idx_recibo_activo_fecha')
+
+
+def test_busqueda_avanzada_por_ciclo_usa_indice(consultas_ejecutadas):
+    logic.buscar_recibos_avanzado({'ciclo': 'OCTUBRE 2025'})
+    plan = plan_de(sql_sobre_recibos(consultas_ejecutadas))
+    assert_usa_indice(plan, 'idx_recibo_activo_ciclo')
+
+
+def test_recibos_mes_respeta_limites(campesino):
+    siembra_id = models.crear_siembra(campesino['id'], 'MAIZ', '2025')
+    for folio, fecha in enumerate(['2025-01-31', '2025-02-01', '2025-02-28', '2025-03-01'], 1):
+        models.crear_recibo({
+            'folio': folio, 'fecha': fecha, 'hora': '10:00:00',
+            'campesino_id': campesino['id'], 'siembra_id': siembra_id, 'cultivo': 'MAIZ',
+            'numero_riego': folio, 'tipo_accion': 'Riego adicional', 'costo': 100.0,
+            'ciclo': '2025'
+        })
+
+    fechas = [r['fecha'] for r in models.obtener_recibos_mes(2025, 2)]
+    assert fechas == ['2025-02-01', '2025-02-28']
+
+    encontrados = logic.buscar_recibos_avanzado({'fecha_inicio': '2025-02-28', 'fecha_fin': '2025-03-01'})
+    assert sorted(r['fecha'] for r in encontrados) == ['2025-02-28', '2025-03-01']
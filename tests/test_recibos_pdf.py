@@ -0,0 +1,61 @@
+import os
+
+from reportlab.pdfgen import canvas
+
+from modules import reports
+from modules.logic import nueva_siembra
+
+
+def test_recibo_temporal_se_genera(campesino):
+    resultado = nueva_siembra(campesino['id'], 'MAIZ', 2)
+    ruta = reports.generar_recibo_pdf_temporal(resultado['recibo_id'])
+    try:
+        with open(ruta, 'rb') as f:
+            assert f.read(5) == b'%PDF-'
+        # El logo se incrusta reducido, no el PNG original de varios MB
+        assert os.path.getsize(ruta) < 500 * 1024
+    finally:
+        os.remove(ruta)
+
+
+def test_plantilla_se_define_una_vez_por_documento(campesino, tmp_path, monkeypatch):
+    resultado = nueva_siembra(campesino['id'], 'MAIZ', 1)
+    recibo = reports.obtener_recibo_por_id(resultado['recibo_id'])
+
+    definiciones = []
+    original = reports._definir_plantilla_recibo
+    monkeypatch.setattr(reports, '_definir_plantilla_recibo',
+                        lambda c: (definiciones.append(c), original(c)))
+
+    c = canvas.Canvas(str(tmp_path / 'varios.pdf'), pagesize=(reports.RECIBO_ANCHO, reports.RECIBO_ALTO))
+    for _ in range(3):
+        reports._dibujar_recibo_principal(c, recibo, '', '', False)
+        c.showPage()
+    c.save()
+
+    assert len(definiciones) == 1
+
+
+
+def test_qr_vectorial_usa_los_riegos_del_llamador(campesino, monkeypatch):
+    resultado = nueva_siembra(campesino['id'], 'MAIZ', 3)
+    recibo = reports.obtener_recibo_por_id(resultado['recibo_id'])
+
+    def no_consultar(folio):
+        raise AssertionError('el folio ya se consultó al armar el recibo')
+    monkeypatch.setattr(reports, 'obtener_recibos_por_folio', no_consultar)
+
+    datos_qr = []
+    original = reports.dibujar_qr_vectorial
+    monkeypatch.setattr(reports, 'dibujar_qr_vectorial',
+                        lambda c, datos, *args, **kw: (datos_qr.append(datos), original(c, datos, *args, **kw)))
+
+    reports._trazos_qr.cache_clear()
+    c = canvas.Canvas(os.devnull, pagesize=(reports.RECIBO_ANCHO, reports.RECIBO_ALTO))
+    for _ in range(2):
+        reports._dibujar_recibo_principal(c, recibo, '', '', True, riegos=[3, 1, 2])
+
+    assert datos_qr[0].endswith('|1,2,3|CENTRO')
+    # La reimpresión reutiliza la matriz del QR
+    info = reports._trazos_qr.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
@@ -0,0 +1,49 @@
+import os
+import sqlite3
+
+from modules import models, cuotas
+from modules.respaldos import (crear_respaldo, verificar_respaldo, descomprimir_respaldo,
+                               limpiar_respaldos, ultimo_manifiesto)
+
+
+def test_respaldo_incluye_datos_del_wal(campesino, bd_temporal):
+    # La conexión compartida sigue abierta: lo último puede vivir sólo en el -wal
+    directorio = str(bd_temporal / 'backups')
+    generados = crear_respaldo({'riego': models.DB_PATH, 'cuotas': cuotas.CUOTAS_DB_PATH},
+                               'prueba', directorio)
+    assert [os.path.basename(r)[:6] for r in generados] == ['riego_', 'cuotas']
+    assert verificar_respaldo(ultimo_manifiesto(directorio)) == []
+
+    extraido = str(bd_temporal / 'extraido.db')
+    descomprimir_respaldo(generados[0], extraido)
+    conn = sqlite3.connect(extraido)
+    nombre = conn.execute('SELECT nombre FROM campesinos').fetchone()[0]
+    conn.close()
+    assert nombre == campesino['nombre']
+
+
+def test_manifiesto_detecta_archivo_alterado(bd_temporal):
+    directorio = str(bd_temporal / 'backups')
+    generados = crear_respaldo({'riego': models.DB_PATH}, 'prueba', directorio)
+    with open(generados[0], 'ab') as f:
+        f.write(b'x')
+    assert verificar_respaldo(ultimo_manifiesto(directorio)) == [os.path.basename(generados[0])]
+
+
+def test_retencion_incluye_cuotas_y_respaldos_antiguos(tmp_path):
+    directorio = tmp_path / 'backups'
+    directorio.mkdir()
+    for dia in range(1, 5):
+        marca = f"202501{dia:02d}_120000"
+        for nombre in (f"riego_backup_{marca}.db", f"cuotas_backup_{marca}.db.gz",
+                       f"manifiesto_{marca}.json"):
+            (directorio / nombre).write_text('')
+    (directorio / 'otro_archivo.txt').write_text('')
+
+    assert limpiar_respaldos(2, str(directorio)) == 6
+    assert sorted(os.listdir(directorio)) == [
+        'cuotas_backup_20250103_120000.db.gz', 'cuotas_backup_20250104_120000.db.gz',
+        'manifiesto_20250103_120000.json', 'manifiesto_20250104_120000.json',
+        'otro_archivo.txt',
+        'riego_backup_20250103_120000.db', 'riego_backup_20250104_120000.db',
+    ]
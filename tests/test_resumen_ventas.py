@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from modules import logic, models
+
+
+def resumen_desde_recibos(fecha):
+    recibos = models.obtener_recibos_dia(fecha)
+    return {'cantidad': len(recibos), 'total': round(sum(r['costo'] for r in recibos), 2)}
+
+
+def test_resumen_sigue_ventas_y_eliminaciones(campesino):
+    hoy = datetime.now().strftime('%Y-%m-%d')
+    ciclo = models.obtener_configuracion('ciclo_actual')
+
+    venta = logic.nueva_siembra(campesino['id'], 'MAIZ', 3)
+    logic.vender_riego(campesino['id'], 2)
+    assert models.obtener_resumen_dia(hoy) == resumen_desde_recibos(hoy)
+    assert models.obtener_resumen_dia(hoy)['cantidad'] == 5
+
+    logic.eliminar_recibo_dia(venta['recibo_ids'][0], 'error de captura')
+    resumen = models.obtener_resumen_dia(hoy)
+    assert resumen == resumen_desde_recibos(hoy)
+    assert resumen['cantidad'] == 4
+    assert logic.calcular_total_dia(hoy) == resumen['total']
+    assert models.obtener_total_ciclo(ciclo) == resumen['total']
+    assert models.obtener_ventas_por_cultivo(ciclo) == {'MAIZ': resumen}
+
+    cierre = logic.cerrar_dia()
+    assert (cierre['total'], cierre['cantidad_recibos']) == (resumen['total'], 4)
+
+
+def test_editar_costo_y_reconstruir(campesino):
+    hoy = datetime.now().strftime('%Y-%m-%d')
+    venta = logic.nueva_siembra(campesino['id'], 'FRIJOL', 2)
+    models.actualizar_recibo(venta['recibo_ids'][1], {'costo': 99.5})
+    esperado = resumen_desde_recibos(hoy)
+    assert models.obtener_resumen_dia(hoy) == esperado
+
+    conn = models.get_connection()
+    conn.execute('DELETE FROM resumen_ventas')
+    models.reconstruir_resumen_ventas()
+    assert models.obtener_resumen_dia(hoy) == esperado
+    assert models.obtener_resumen_dia('1999-01-01') == {'cantidad': 0, 'total': 0}
@@ -4,7 +4,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from modules.models import obtener_estadisticas_generales, init_db
 
-def test_stats():
+def test_stats(bd_temporal):
     print("Testing statistics generation...")
     try:
         stats = obtener_estadisticas_generales()
@@ -0,0 +1,69 @@
+import pytest
+
+from modules import models, cuotas, unificada
+
+
+def _recibo(campesino, siembra_id, folio, hora, costo):
+    return models.crear_recibo({
+        'folio': folio, 'fecha': '2025-03-01', 'hora': hora,
+        'campesino_id': campesino['id'], 'siembra_id': siembra_id, 'cultivo': 'MAIZ',
+        'numero_riego': 1, 'tipo_accion': 'Riego adicional', 'costo': costo, 'ciclo': '2025'
+    })
+
+
+def test_estado_de_cuenta_en_una_consulta(campesino):
+    siembra_id = models.crear_siembra(campesino['id'], 'MAIZ', '2025')
+    _recibo(campesino, siembra_id, 1, '09:00:00', 100.0)
+    _recibo(campesino, siembra_id, 2, '10:00:00', 50.0)
+    tipo_id = cuotas.crear_tipo_cuota('CANAL', 100.0)
+    unificada.asignar_cuota_desde_padron(campesino['id'], tipo_id)
+
+    consultas = []
+    conn = unificada.get_conexion_unificada()
+    conn.set_trace_callback(consultas.append)
+    try:
+        cuenta = unificada.obtener_estado_cuenta(campesino['id'])
+    finally:
+        conn.set_trace_callback(None)
+
+    assert len(consultas) == 1
+    assert cuenta['campesino']['nombre'] == 'JUAN PEÑA'
+    assert [s['id'] for s in cuenta['siembras']] == [s['id'] for s in models.obtener_historial_siembras(campesino['id'])]
+    assert [r['id'] for r in cuenta['recibos']] == [r['id'] for r in models.obtener_recibos_campesino(campesino['id'])]
+    assert [(c['nombre_tipo_cuota'], c['monto'], c['pagado']) for c in cuenta['cuotas']] == [('CANAL', 200.0, 0)]
+
+
+def test_asignar_cuota_desde_padron(campesino):
+    tipo_id = cuotas.crear_tipo_cuota('BOMBA', 25.0)
+    cuota_id = unificada.asignar_cuota_desde_padron(campesino['id'], tipo_id)
+
+    cuota = cuotas.obtener_cuotas_campesino(campesino['id'])[0]
+    assert (cuota['id'], cuota['numero_lote'], cuota['barrio'], cuota['monto']) == (cuota_id, '101', 'CENTRO', 50.0)
+    assert cuotas.obtener_resumen_cuota(tipo_id)['total_pendientes'] == 1
+
+    with pytest.raises(ValueError, match='ya tiene asignada'):
+        unificada.asignar_cuota_desde_padron(campesino['id'], tipo_id)
+    with pytest.raises(ValueError, match='no encontrado'):
+        unificada.asignar_cuota_desde_padron(9999, tipo_id)
+
+
+def test_superficie_y_cuotas_cambian_juntas(campesino, monkeypatch):
+    tipo_id = cuotas.crear_tipo_cuota('CANAL', 100.0)
+    unificada.asignar_cuota_desde_padron(campesino['id'], tipo_id)
+
+    models.actualizar_superficie_campesino(campesino['id'], 3.0)
+    assert models.obtener_campesino_por_id(campesino['id'])['superficie'] == 3.0
+    assert cuotas.obtener_cuotas_campesino(campesino['id'])[0]['monto'] == 300.0
+
+    # Si falla a la mitad no cambia ninguno de los dos archivos
+    conn = unificada.get_conexion_unificada()
+    conn.execute('''
+        CREATE TEMP TRIGGER falla_cuotas BEFORE UPDATE ON cuotas.cuotas_campesinos
+        BEGIN SELECT RAISE(ABORT, 'falla simulada'); END
+    ''')
+    with pytest.raises(Exception, match='falla simulada'):
+        models.actualizar_superficie_campesino(campesino['id'], 5.0)
+    conn.execute('DROP TRIGGER falla_cuotas')
+
+    assert models.obtener_campesino_por_id(campesino['id'])['superficie'] == 3.0
+    assert cuotas.obtener_cuotas_campesino(campesino['id'])[0]['monto'] == 300.0
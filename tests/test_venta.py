@@ -0,0 +1,47 @@
+import pytest
+from modules import logic
+from modules.models import obtener_recibos_por_folio, obtener_siembra_activa, obtener_recibos_campesino
+
+
+def test_venta_multiple_en_un_folio(campesino):
+    venta = logic.nueva_siembra(campesino['id'], 'MAIZ', 3)
+    assert len(venta['recibo_ids']) == 3
+
+    venta = logic.vender_riego(campesino['id'], 2)
+    recibos = obtener_recibos_por_folio(venta['folio'])
+    assert [r['numero_riego'] for r in recibos] == [4, 5]
+    assert [r['id'] for r in recibos] == venta['recibo_ids']
+    assert obtener_siembra_activa(campesino['id'])['numero_riegos'] == 5
+    assert logic.obtener_folio_actual() == venta['folio'] + 1
+
+
+def test_venta_fallida_no_deja_recibos(campesino, monkeypatch):
+    logic.nueva_siembra(campesino['id'], 'MAIZ', 1)
+    folio = logic.obtener_folio_actual()
+
+    def fallar(*args):
+        raise RuntimeError('falla de disco')
+    monkeypatch.setattr(logic, 'registrar_auditoria', fallar)
+
+    with pytest.raises(RuntimeError):
+        logic.vender_riego(campesino['id'], 4)
+
+    assert len(obtener_recibos_campesino(campesino['id'])) == 1
+    assert obtener_siembra_activa(campesino['id'])['numero_riegos'] == 1
+    assert logic.obtener_folio_actual() == folio
+
+
+def test_grid_con_siembra_activa_en_una_consulta(campesino):
+    from modules.models import crear_campesino, obtener_campesinos_con_siembra_activa
+    for lote in ('20', '3', '3-1'):
+        crear_campesino({'numero_lote': lote, 'nombre': f'LOTE {lote}', 'localidad': 'X',
+                         'barrio': 'CENTRO', 'superficie': 1.0})
+    logic.nueva_siembra(campesino['id'], 'FRIJOL', 2)
+
+    filas = obtener_campesinos_con_siembra_activa()
+    assert [f['numero_lote'] for f in filas] == ['3', '20', '101', '3-1']
+    fila = next(f for f in filas if f['id'] == campesino['id'])
+    assert (fila['cultivo'], fila['numero_riegos']) == ('FRIJOL', 2)
+
+    solo = obtener_campesinos_con_siembra_activa([campesino['id']])
+    assert [f['id'] for f in solo] == [campesino['id']]